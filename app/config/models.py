@@ -1,5 +1,4 @@
-from django.core.cache import cache
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
@@ -158,5 +157,6 @@ class ConfigOption(models.Model):
 
 @receiver([post_save, post_delete], sender=NotificationMessage)
 def invalidate_notification_message_related_cache_values(sender, instance, **kwargs):
-    """delete cache values that are somehow related to the Notification Message data model"""
-    cache.delete("PDB_HOMEPAGE_CONTEXT")
+    """the recent events of the homepage are refreshed in the background, see productdb.update_homepage_context task"""
+    from app.productdb import utils
+    transaction.on_commit(lambda: utils.increment_data_version(utils.NOTIFICATION_MESSAGE_DATA_VERSION_CACHE_KEY))
@@ -2,8 +2,9 @@
 Settings file class for the product database
 """
 import logging
-from app.config.models import ConfigOption
 from django.core.cache import cache
+from app.config.models import ConfigOption
+from django_project import cache as protected_cache
 
 logger = logging.getLogger("productdb")
 
@@ -15,17 +16,24 @@ class AppSettings:
     CONFIG_OPTIONS_DICT_CACHE_KEY = "PRODUCTDB_CONFIG_OPTIONS"
 
     def __init__(self):
-        self._config_options = cache.get(self.CONFIG_OPTIONS_DICT_CACHE_KEY, None)
-        if not self._config_options or len(self._config_options) < 12:
+        # the config options are loaded by a single worker if they are not cached
+        self._config_options = protected_cache.get_or_compute(
+            self.CONFIG_OPTIONS_DICT_CACHE_KEY,
+            self._load_config_options,
+            timeout=None
+        )
+        if len(self._config_options) < 12:
             # populate cache
-            self.create_defaults()
-            self._config_options = dict(ConfigOption.objects.all().values_list("key", "value"))
-            cache.set(self.CONFIG_OPTIONS_DICT_CACHE_KEY, self._config_options, timeout=None)
+            self._config_options = self._load_config_options()
+            protected_cache.set_value(self.CONFIG_OPTIONS_DICT_CACHE_KEY, self._config_options, timeout=None)
+
+    def _load_config_options(self):
+        self.create_defaults()
+        return dict(ConfigOption.objects.all().values_list("key", "value"))
 
     def _rebuild_config_cache(self):
-        cache.delete(self.CONFIG_OPTIONS_DICT_CACHE_KEY)
         self._config_options = dict(ConfigOption.objects.all().values_list("key", "value"))
-        cache.set(self.CONFIG_OPTIONS_DICT_CACHE_KEY, self._config_options, timeout=None)
+        protected_cache.set_value(self.CONFIG_OPTIONS_DICT_CACHE_KEY, self._config_options, timeout=None)
 
     def _set_boolean(self, config_object, value):
         if value:
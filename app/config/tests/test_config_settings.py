@@ -7,6 +7,7 @@ from django.utils.dateparse import parse_datetime
 from django.core.cache import cache
 from app.config.settings import AppSettings
 from app.config.models import ConfigOption
+from django_project import cache as protected_cache
 
 pytestmark = pytest.mark.django_db
 
@@ -20,7 +21,7 @@ def test_config_options_cache():
 
     # key exists and contains a dictionary
     assert cache.get(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY) is not None
-    assert type(cache.get(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY)) is dict
+    assert type(protected_cache.get_value(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY)) is dict
 
 
 class TestConfigSettings:
@@ -34,6 +34,29 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline, )
 
 
+class LifecycleStateListFilter(admin.SimpleListFilter):
+    """filter the Products by the lifecycle state (computed within the database)"""
+    title = "lifecycle state"
+    parameter_name = "lifecycle_state"
+
+    def lookups(self, request, model_admin):
+        states = [
+            Product.NO_EOL_ANNOUNCEMENT_STR,
+            Product.EOS_ANNOUNCED_STR,
+            Product.END_OF_SALE_STR,
+        ]
+        states += [e[2] for e in Product.END_OF_SALE_SUB_STATES]
+        states.append(Product.END_OF_SUPPORT_STR)
+
+        return [(e, e) for e in states]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter_lifecycle_state(self.value())
+
+        return queryset
+
+
 @admin.register(Product)
 class ProductAdmin(CompareVersionAdmin, admin.ModelAdmin):
     list_display = (
@@ -55,6 +78,10 @@ class ProductAdmin(CompareVersionAdmin, admin.ModelAdmin):
         'vendor__name',
     )
 
+    list_filter = (
+        LifecycleStateListFilter,
+    )
+
     readonly_fields = (
         'current_lifecycle_states',
         'has_migration_options',
@@ -73,12 +100,22 @@ class ProductAdmin(CompareVersionAdmin, admin.ModelAdmin):
     def product_migration_source_names(self, obj):
         return "\n".join(obj.get_product_migration_source_names_set())
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_lifecycle_state()
+
     def current_lifecycle_states(self, obj):
-        val = obj.current_lifecycle_states
+        if hasattr(obj, "lifecycle_state"):
+            val = Product.get_annotated_lifecycle_states(obj)
+
+        else:
+            val = obj.current_lifecycle_states
+
         if val:
-            return "<br>".join(obj.current_lifecycle_states)
+            return "<br>".join(val)
         return ""
 
+    current_lifecycle_states.admin_order_field = "lifecycle_state_order"
+
     history_latest_first = True
     ignore_duplicate_revisions = True
 
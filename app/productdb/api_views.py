@@ -1,22 +1,104 @@
+import hashlib
+from collections import OrderedDict
 import django_filters
+from django.db.models import Q
+from django.views.decorators.http import condition
 from rest_framework import permissions
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import HyperlinkedIdentityField
 from rest_framework.response import Response
 from app.productdb.serializers import ProductSerializer, VendorSerializer, ProductGroupSerializer, ProductListSerializer, \
-    ProductMigrationSourceSerializer, ProductMigrationOptionSerializer
+    ProductMigrationSourceSerializer, ProductMigrationOptionSerializer, ChangeLogEntrySerializer
+from app.productdb.serializers import get_sparse_field_names
 from app.productdb.models import Product, Vendor, ProductGroup, ProductList, ProductMigrationSource, \
-    ProductMigrationOption
+    ProductMigrationOption, ProductMigrationPath, ChangeLogEntry
+from app.productdb import bulk
+from app.productdb import export
+from app.productdb import reports
+from app.productdb import search
+from app.productdb import utils
+from django_project.pagination import FeedPagination
+from rest_framework import mixins
 from rest_framework import viewsets
 from rest_framework.decorators import list_route
 
 
-class VendorViewSet(viewsets.ReadOnlyModelViewSet):
+class SparseFieldsetMixin:
+    """
+    loads only the columns of the fields that are selected by the ?fields= and ?omit= query parameters (see
+    SparseFieldsetMixin within the productdb.serializers module)
+    """
+    # model fields that are always loaded (used within the __init__ method of the model)
+    always_loaded_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query_params = self.request.query_params
+        if self.request.method not in permissions.SAFE_METHODS or not (query_params.get("fields") or
+                                                                        query_params.get("omit")):
+            return queryset
+
+        model_field_names = {e.name for e in queryset.model._meta.concrete_fields}
+        field_names = set(self.always_loaded_fields)
+        for field in self.get_serializer().fields.values():
+            if isinstance(field, HyperlinkedIdentityField):
+                field_names.add(field.lookup_field)
+
+            elif field.source_attrs and field.source_attrs[0] in model_field_names:
+                field_names.add(field.source_attrs[0])
+
+            else:
+                # value that is not directly based on a column of the model
+                return queryset
+
+        return queryset.only(*field_names)
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified headers for the list and detail views based on a data version counter (see productdb.utils
+    module), requests for unchanged resources are answered with a 304 response before any data is loaded
+    """
+    # cache key of the data version counter, conditional requests are not supported if None
+    data_version_cache_key = None
+
+    def get_etag(self, request, *args, **kwargs):
+        if self.data_version_cache_key is None:
+            return None
+
+        # the representation depends on the URL, the renderer and the user (browsable API)
+        value = "%s|%s|%s|%s" % (
+            utils.get_data_version(self.data_version_cache_key),
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            request.user.pk
+        )
+        return hashlib.md5(value.encode()).hexdigest()
+
+    def get_last_modified(self, request, *args, **kwargs):
+        if self.data_version_cache_key is None:
+            return None
+
+        return utils.get_data_last_modified(self.data_version_cache_key)
+
+    def list(self, request, *args, **kwargs):
+        view = condition(etag_func=self.get_etag, last_modified_func=self.get_last_modified)(super().list)
+        return view(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        view = condition(etag_func=self.get_etag, last_modified_func=self.get_last_modified)(super().retrieve)
+        return view(request, *args, **kwargs)
+
+
+class VendorViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for the Vendor objects
     """
     queryset = Vendor.objects.all().order_by("id")
     serializer_class = VendorSerializer
     lookup_field = 'id'
+    data_version_cache_key = utils.PRODUCT_DATA_VERSION_CACHE_KEY
     filter_backends = (
         filters.DjangoFilterBackend,
         filters.SearchFilter,
@@ -26,13 +108,14 @@ class VendorViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (permissions.DjangoModelPermissions,)
 
 
-class ProductMigrationSourceViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductMigrationSourceViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for the ProductMigrationSource objects
     """
     queryset = ProductMigrationSource.objects.all().order_by("name")
     serializer_class = ProductMigrationSourceSerializer
     lookup_field = 'id'
+    always_loaded_fields = ('preference',)
     filter_backends = (
         filters.DjangoFilterBackend,
         filters.SearchFilter,
@@ -52,7 +135,7 @@ class ProductMigrationOptionFilter(filters.FilterSet):
         fields = ['id', 'replacement_product_id', 'migration_source', 'product']
 
 
-class ProductMigrationOptionViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductMigrationOptionViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for the ProductMigrationOption objects
     """
@@ -77,13 +160,14 @@ class ProductGroupFilter(filters.FilterSet):
         fields = ['id', 'name', 'vendor']
 
 
-class ProductGroupViewSet(viewsets.ModelViewSet):
+class ProductGroupViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for the ProductGroup objects
     """
     queryset = ProductGroup.objects.all().order_by("name")
     serializer_class = ProductGroupSerializer
     lookup_field = 'id'
+    data_version_cache_key = utils.PRODUCT_DATA_VERSION_CACHE_KEY
     filter_backends = (
         filters.DjangoFilterBackend,
         filters.SearchFilter,
@@ -108,6 +192,49 @@ class ProductGroupViewSet(viewsets.ModelViewSet):
         return Response(result)
 
 
+class ChangeLogEntryFilter(filters.FilterSet):
+    since = django_filters.NumberFilter(
+        method="filter_since",
+        help_text="ID of the last processed change"
+    )
+    object_type = django_filters.MultipleChoiceFilter(
+        choices=ChangeLogEntry.OBJECT_TYPE_CHOICES,
+        help_text="type of the changed objects, multiple values are combined using OR"
+    )
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = ['since', 'object_type', 'action']
+
+    def filter_since(self, queryset, name, value):
+        """changes after the given entry within the order of the change feed (see ChangeLogEntryManager.get_feed)"""
+        transaction_id = ChangeLogEntry.objects.filter(id=value).values_list("transaction_id", flat=True).first()
+        if transaction_id is None:
+            # the entry was removed after the retention period
+            return queryset.filter(id__gt=value)
+
+        return queryset.filter(Q(transaction_id__gt=transaction_id) | Q(transaction_id=transaction_id, id__gt=value))
+
+
+class ChangeLogEntryViewSet(SparseFieldsetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    API endpoint for the change feed of the Products, Product Groups, Product Lists and Product Migration Options,
+    ordered by the writing transaction and the ID of the changes. Deleted objects are part of the feed (deleted
+    action), a client synchronizes the changes after the ID of the last processed change using the since parameter
+    (also used by the next page link). Changes that are older than the retention period are removed from the feed.
+    """
+    queryset = ChangeLogEntry.objects.all()
+    serializer_class = ChangeLogEntrySerializer
+    pagination_class = FeedPagination
+    filter_backends = (filters.DjangoFilterBackend,)
+    filter_class = ChangeLogEntryFilter
+    permission_classes = (permissions.DjangoModelPermissions,)
+
+    def get_queryset(self):
+        # only the changes of finished transactions are part of the feed
+        return ChangeLogEntry.objects.get_feed()
+
+
 class ProductListFilter(filters.FilterSet):
     name = django_filters.CharFilter(name="name", lookup_expr="icontains")
     description = django_filters.CharFilter(name="description", lookup_expr="icontains")
@@ -117,13 +244,14 @@ class ProductListFilter(filters.FilterSet):
         fields = ['id', 'name', 'description']
 
 
-class ProductListViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductListViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for the ProductList object
     """
     queryset = ProductList.objects.all().order_by("name")
     serializer_class = ProductListSerializer
     lookup_field = "id"
+    data_version_cache_key = utils.PRODUCT_LIST_DATA_VERSION_CACHE_KEY
     filter_backends = (
         filters.DjangoFilterBackend,
         filters.SearchFilter,
@@ -133,29 +261,186 @@ class ProductListViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class ProductFilter(filters.FilterSet):
+    DATE_RANGE_HELP_TEXT = "date or range, e.g. 2017-03-31, 2017-03, 2017, 2017-01..2017-06 or >2017-03-31"
+
+    # short names for the lifecycle states within the lifecycle_state filter
+    LIFECYCLE_STATES = OrderedDict([
+        ("no_eol", Product.NO_EOL_ANNOUNCEMENT_STR),
+        ("eos_announced", Product.EOS_ANNOUNCED_STR),
+        ("eos", Product.END_OF_SALE_STR),
+        ("eonsa", Product.END_OF_NEW_SERVICE_ATTACHMENT_STR),
+        ("eoswm", Product.END_OF_SW_MAINTENANCE_RELEASES_STR),
+        ("eorfa", Product.END_OF_ROUTINE_FAILURE_ANALYSIS_STR),
+        ("eoscr", Product.END_OF_SERVICE_CONTRACT_RENEWAL_STR),
+        ("eovss", Product.END_OF_VUL_SUPPORT_STR),
+        ("ldos", Product.END_OF_SUPPORT_STR),
+    ])
+
     vendor = django_filters.CharFilter(name="vendor__name", lookup_expr="startswith")
     product_id = django_filters.CharFilter(name="product_id", lookup_expr="iexact")
     product_group = django_filters.CharFilter(name="product_group__name", lookup_expr="exact")
+    lifecycle_state = django_filters.MultipleChoiceFilter(
+        choices=LIFECYCLE_STATES.items(),
+        method="filter_lifecycle_state",
+        help_text="current lifecycle state, multiple values are combined using OR"
+    )
+    end_of_sale_date_after = django_filters.DateFilter(name="end_of_sale_date", lookup_expr="gte")
+    end_of_sale_date_before = django_filters.DateFilter(name="end_of_sale_date", lookup_expr="lte")
+    end_of_support_date_after = django_filters.DateFilter(name="end_of_support_date", lookup_expr="gte")
+    end_of_support_date_before = django_filters.DateFilter(name="end_of_support_date", lookup_expr="lte")
+    eox_update_time_stamp_after = django_filters.DateFilter(name="eox_update_time_stamp", lookup_expr="gte")
+    eox_update_time_stamp_before = django_filters.DateFilter(name="eox_update_time_stamp", lookup_expr="lte")
+    updated_since = django_filters.DateFilter(name="update_timestamp", lookup_expr="gte")
+    list_price = django_filters.CharFilter(method="filter_range", help_text="value or range, e.g. 100-500 or >1000")
+    eox_update_time_stamp = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    eol_ext_announcement_date = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_sale_date = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_new_service_attachment_date = django_filters.CharFilter(
+        method="filter_range",
+        help_text=DATE_RANGE_HELP_TEXT
+    )
+    end_of_sw_maintenance_date = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_routine_failure_analysis = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_service_contract_renewal = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_sec_vuln_supp_date = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+    end_of_support_date = django_filters.CharFilter(method="filter_range", help_text=DATE_RANGE_HELP_TEXT)
+
+    # fields with a typed range filter
+    RANGE_FILTERS = OrderedDict([
+        ("list_price", search.RANGE_FILTER_NUMBER),
+        ("eox_update_time_stamp", search.RANGE_FILTER_DATE),
+        ("eol_ext_announcement_date", search.RANGE_FILTER_DATE),
+        ("end_of_sale_date", search.RANGE_FILTER_DATE),
+        ("end_of_new_service_attachment_date", search.RANGE_FILTER_DATE),
+        ("end_of_sw_maintenance_date", search.RANGE_FILTER_DATE),
+        ("end_of_routine_failure_analysis", search.RANGE_FILTER_DATE),
+        ("end_of_service_contract_renewal", search.RANGE_FILTER_DATE),
+        ("end_of_sec_vuln_supp_date", search.RANGE_FILTER_DATE),
+        ("end_of_support_date", search.RANGE_FILTER_DATE),
+    ])
+
+    def filter_lifecycle_state(self, queryset, name, value):
+        return queryset.filter_lifecycle_state(*[self.LIFECYCLE_STATES[e] for e in value])
+
+    def filter_range(self, queryset, name, value):
+        q = search.get_range_q(name, value, self.RANGE_FILTERS[name])
+        if q is None:
+            raise ValidationError({
+                name: "invalid value or range, e.g. 100-500, >1000 or 2017-01..2017-06"
+            })
+
+        return queryset.filter(q)
 
     class Meta:
         model = Product
-        fields = ['id', 'product_id', 'vendor', 'product_group']
+        fields = [
+            'id',
+            'product_id',
+            'vendor',
+            'product_group',
+            'lifecycle_state',
+            'end_of_sale_date',
+            'end_of_support_date',
+            'eox_update_time_stamp',
+            'updated_since',
+        ]
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    search filter for the Product objects (uses the trigram and full-text indexes), if all search terms are plain
+    words, they also match the words within the description and the results are ordered by the full-text rank
+    """
+    def filter_queryset(self, request, queryset, view):
+        search_fields = getattr(view, 'search_fields', None)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        if any([e.startswith("$") for e in search_fields]):
+            for search_term in search_terms:
+                if not search.is_safe_regex(search_term):
+                    raise ValidationError({
+                        "search": "the regular expression '%s' is too complex (maximum length of %d characters, no "
+                                  "back references or nested quantifiers)" % (search_term, search.MAX_REGEX_LENGTH)
+                    })
+
+        for search_term in search_terms:
+            q = Q()
+            for search_field in search_fields:
+                q |= search.get_search_q(
+                    [search_field.lstrip("$")],
+                    search_term,
+                    regex=search_field.startswith("$"),
+                    full_text=True
+                )
+            queryset = queryset.filter(q)
+
+        if all([search.is_plain_search_term(e) for e in search_terms]):
+            queryset = search.annotate_search_rank(queryset, " ".join(search_terms))
+            queryset = queryset.order_by("-search_rank", *queryset.model._meta.ordering)
+
+        return queryset
+
+
+class ProductViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint for the Product objects
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     lookup_field = 'id'
+    always_loaded_fields = ('list_price', 'lc_state_sync', 'vendor')
+    data_version_cache_key = utils.PRODUCT_DATA_VERSION_CACHE_KEY
     filter_backends = (
         filters.DjangoFilterBackend,
-        filters.SearchFilter,
+        ProductSearchFilter,
     )
     filter_class = ProductFilter
     search_fields = ('$product_id', '$description', '$tags')
     permission_classes = (permissions.DjangoModelPermissions,)
+    MIGRATION_PATHS_MAX_PRODUCT_IDS = 5000
+    LOOKUP_MAX_PRODUCT_IDS = 5000
+
+    def get_request_product_ids(self, request, max_product_ids):
+        """
+        returns the unique Product IDs of the request, either the comma separated product_ids query parameter or a list
+        within the JSON body of a POST request (the list or the product_ids key of an object)
+        """
+        if request.method == "POST":
+            data = request.data if isinstance(request.data, dict) else {"product_ids": request.data}
+            product_ids = data.get("product_ids", [])
+
+        else:
+            product_ids = []
+            for value in request.query_params.getlist("product_ids"):
+                product_ids += value.split(",")
+
+        if not isinstance(product_ids, list) or not all([isinstance(e, str) for e in product_ids]):
+            raise ValidationError({"product_ids": "must be a list of Product IDs"})
+
+        product_ids = list(OrderedDict.fromkeys([e.strip() for e in product_ids if e.strip()]))
+        if len(product_ids) > max_product_ids:
+            raise ValidationError({
+                "product_ids": "maximum of %d Product IDs per request exceeded" % max_product_ids
+            })
+
+        return product_ids
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get(ProductSearchFilter.search_param):
+            return super().list(request, *args, **kwargs)
+
+        # the search uses regular expressions, limit the execution time of the queries
+        try:
+            with search.statement_timeout(search.REGEX_SEARCH_STATEMENT_TIMEOUT):
+                return super().list(request, *args, **kwargs)
+
+        except search.SearchTimeout:
+            raise ValidationError({
+                "search": "the search took too long, please use a more specific search term"
+            })
 
     @list_route()
     def count(self, request):
@@ -171,3 +456,177 @@ class ProductViewSet(viewsets.ModelViewSet):
             "count": Product.objects.count()
         }
         return Response(result)
+
+    @list_route(methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        """
+        create (POST), update (PATCH) or delete (DELETE) multiple Products within a single request, the JSON body is a
+        list of Products (same fields as the Product endpoint). The Products are identified by the id or the
+        product_id for an update or a delete operation. All valid items are written within a single transaction, the
+        result contains the status of every item.
+        ---
+        omit_serializer: true
+        parameters_strategy:
+            form: replace
+            query: merge
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"products": "must be a list of Products"})
+
+        if len(items) > bulk.MAX_ITEMS:
+            raise ValidationError({
+                "products": "maximum of %d Products per request exceeded" % bulk.MAX_ITEMS
+            })
+
+        if request.method == "POST":
+            result = bulk.create_products(items)
+
+        elif request.method == "PATCH":
+            result = bulk.update_products(items)
+
+        else:
+            result = bulk.delete_products(items)
+
+        return Response({"data": result})
+
+    @list_route()
+    def export(self, request):
+        """
+        streaming export of all Products that match the filters (same filters as the Product endpoint) within a single
+        request, ordered by ID
+        ---
+        omit_serializer: true
+        parameters_strategy:
+            form: replace
+            query: merge
+        parameters:
+            - name: export_format
+              description: csv (default), jsonl (JSON lines) or xlsx
+              paramType: query
+            - name: fields
+              description: comma separated list of the exported fields (default all fields)
+              paramType: query
+            - name: omit
+              description: comma separated list of fields that are not exported
+              paramType: query
+        """
+        export_format = request.query_params.get("export_format", export.EXPORT_FORMAT_CSV)
+        if export_format not in export.EXPORT_GENERATORS:
+            raise ValidationError({
+                "export_format": "must be one of %s" % ", ".join(sorted(export.EXPORT_GENERATORS.keys()))
+            })
+
+        return export.get_export_response(
+            self.filter_queryset(Product.objects.all()),
+            export_format,
+            get_sparse_field_names(request, export.PRODUCT_EXPORT_FIELDS)
+        )
+
+    @list_route(methods=["get", "post"], permission_classes=(permissions.IsAuthenticated,))
+    def lookup(self, request):
+        """
+        returns the Products for a list of Product IDs (case insensitive, single query) and the Product IDs that are
+        not found, the Products are ordered like the requested Product IDs
+        ---
+        omit_serializer: true
+        parameters_strategy:
+            form: replace
+            query: merge
+        parameters:
+            - name: product_ids
+              description: comma separated list of Product IDs (or a list within the JSON body of a POST request)
+              paramType: query
+        """
+        product_ids = self.get_request_product_ids(request, self.LOOKUP_MAX_PRODUCT_IDS)
+        positions = {}
+        for position, product_id in enumerate(product_ids):
+            positions.setdefault(product_id.upper(), position)
+
+        products = sorted(
+            Product.objects.filter(product_id__iexact_in=product_ids),
+            key=lambda e: (positions.get(e.product_id.upper(), len(product_ids)), e.product_id)
+        )
+        found_product_ids = {e.product_id.upper() for e in products}
+
+        return Response({
+            "data": self.get_serializer(products, many=True).data,
+            "not_found": [e for e in product_ids if e.upper() not in found_product_ids]
+        })
+
+    @list_route(methods=["get", "post"], permission_classes=(permissions.IsAuthenticated,))
+    def migration_paths(self, request):
+        """
+        returns the migration path and the valid replacement for a list of Product IDs (preferred migration path if no
+        migration source is specified)
+        ---
+        omit_serializer: true
+        parameters_strategy:
+            form: replace
+            query: merge
+        parameters:
+            - name: product_ids
+              description: comma separated list of Product IDs (or a list within the JSON body of a POST request)
+              paramType: query
+            - name: migration_source
+              description: name of the Product Migration Source
+              paramType: query
+        """
+        product_ids = self.get_request_product_ids(request, self.MIGRATION_PATHS_MAX_PRODUCT_IDS)
+        if request.method == "POST":
+            migration_source_name = request.data.get("migration_source") if isinstance(request.data, dict) else None
+
+        else:
+            migration_source_name = request.query_params.get("migration_source")
+
+        if migration_source_name and not ProductMigrationSource.objects.filter(name=migration_source_name).exists():
+            raise ValidationError({"migration_source": "Product Migration Source not found"})
+
+        products = dict(Product.objects.filter(product_id__in=product_ids).values_list("product_id", "id"))
+        migration_paths = ProductMigrationPath.objects.get_migration_paths(
+            products.values(),
+            migration_source_name=migration_source_name
+        )
+
+        result = []
+        for product_id in product_ids:
+            migration_path, options = migration_paths.get(products.get(product_id), (None, []))
+            replacement_option = options[-1] if options and options[-1].is_valid_replacement() else None
+            result.append({
+                "product_id": product_id,
+                "id": products.get(product_id),
+                "migration_source": migration_path.migration_source.name if migration_path else None,
+                "migration_path": ProductMigrationOptionSerializer(
+                    options,
+                    many=True,
+                    context={"request": request}
+                ).data,
+                "valid_replacement_product_id": replacement_option.replacement_product_id if replacement_option else None,
+                "valid_replacement_product": replacement_option.replacement_db_product_id if replacement_option else None
+            })
+
+        return Response({"data": result})
+
+    @list_route()
+    def lifecycle_timeline(self, request):
+        """
+        returns the amount of Products that reach the End of Sale and the Last Date of Support per month, grouped by
+        Vendor and Product Group
+        ---
+        omit_serializer: true
+        parameters_strategy:
+            form: replace
+            query: merge
+        parameters:
+            - name: months
+              description: number of months within the report, starting with the current month (default 36)
+              paramType: query
+              type: integer
+        """
+        months = request.query_params.get("months", str(reports.LIFECYCLE_TIMELINE_DEFAULT_MONTHS))
+        if not months.isdigit() or not 0 < int(months) <= reports.LIFECYCLE_TIMELINE_MAX_MONTHS:
+            raise ValidationError({
+                "months": "must be a number between 1 and %d" % reports.LIFECYCLE_TIMELINE_MAX_MONTHS
+            })
+
+        return Response(reports.get_lifecycle_timeline(months=int(months)))
@@ -0,0 +1,375 @@
+"""
+bulk operations on the Products for the REST API
+
+All items of a batch are validated together (the Vendors, Product Groups, Products and the existing Product IDs are
+loaded with a single query per batch), the valid items are written within a single transaction using bulk database
+operations and the result contains the status of every item. The migration paths, the product data version and the
+change log are updated once per batch (see the receivers within the productdb.models module).
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Case, When, Value, F
+from cacheops import invalidate_model, no_invalidation
+from app.productdb.models import Product, Vendor, ProductGroup, ProductMigrationOption, ProductMigrationPath, \
+    ChangeLogEntry, bulk_product_operation
+from app.productdb.serializers import BulkProductSerializer
+from app.productdb import utils
+
+# maximum amount of items within a single request
+MAX_ITEMS = 10000
+
+# amount of Products within a single INSERT or UPDATE statement
+BATCH_SIZE = 500
+
+STATUS_CREATED = "created"
+STATUS_UPDATED = "updated"
+STATUS_DELETED = "deleted"
+STATUS_ERROR = "error"
+
+# fields that are always written by an update (see Product.prepare_save)
+UPDATE_TIMESTAMP_FIELDS = ("update_timestamp", "list_price_timestamp", "eol_reference_url")
+
+INVALID_ITEM_ERRORS = {"non_field_errors": ["each item must be an object with the values of a Product"]}
+MISSING_LOOKUP_ERRORS = {"id": ["the id or the product_id of the Product is required"]}
+
+
+def get_item_result(index, status, item=None, product=None, errors=None):
+    """
+    returns the result of a single item, the Product is identified by the database ID and the Product ID
+    """
+    item = item if isinstance(item, dict) else {}
+    result = {
+        "index": index,
+        "status": status,
+        "id": product.id if product else item.get("id"),
+        "product_id": product.product_id if product else item.get("product_id"),
+    }
+    if errors:
+        result["errors"] = errors
+
+    return result
+
+
+def get_int_values(items, key):
+    """returns the set of all integer values of the given key within the items"""
+    result = set()
+    for item in items:
+        try:
+            result.add(int(item[key]))
+
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    return result
+
+
+def get_serializer_context(items):
+    """
+    returns the serializer context with the Vendors and the Product Groups that are referenced within the items
+    """
+    return {
+        "related_objects": {
+            "vendor": Vendor.objects.in_bulk(),
+            "product_group": ProductGroup.objects.select_related("vendor").in_bulk(
+                list(get_int_values(items, "product_group"))
+            ),
+        }
+    }
+
+
+def get_lookup(item):
+    """
+    returns the lookup field and value that identify the Product of an item for an update or a delete operation (the
+    database ID is used if both values are given)
+    """
+    if item.get("id") is not None:
+        try:
+            return "id", int(item["id"])
+
+        except (TypeError, ValueError):
+            return None
+
+    if isinstance(item.get("product_id"), str):
+        return "product_id", item["product_id"]
+
+    return None
+
+
+def get_products(lookups):
+    """
+    returns the Products for the given lookups (single query), the key of the dictionary is the lookup
+    """
+    ids = [e[1] for e in lookups if e[0] == "id"]
+    product_ids = [e[1] for e in lookups if e[0] == "product_id"]
+    if not ids and not product_ids:
+        return {}
+
+    result = {}
+    for product in Product.objects.select_related("vendor", "product_group__vendor").filter(
+        Q(id__in=ids) | Q(product_id__in=product_ids)
+    ):
+        result[("id", product.id)] = product
+        result[("product_id", product.product_id)] = product
+
+    return result
+
+
+def clean_product(product, vendors):
+    """
+    validate the Product before it is written, the relations were already validated by the serializer and the unique
+    Product IDs are verified for the entire batch
+
+    :return: dictionary with the errors per field or None if the Product is valid
+    """
+    if product.vendor_id in vendors:
+        # avoid a query within the clean method of the Product
+        product.vendor = vendors[product.vendor_id]
+
+    product.prepare_save()
+    try:
+        product.full_clean(exclude=["vendor", "product_group"], validate_unique=False)
+
+    except ValidationError as ex:
+        return ex.message_dict
+
+    return None
+
+
+def get_unique_product_id_errors(product):
+    return {"product_id": product.unique_error_message(Product, ["product_id"]).messages}
+
+
+def update_product_data(products, vendor_ids, action):
+    """
+    link the Product Migration Options with the written Products, update the affected migration paths, write the
+    change log entries and increment the product data version after the commit (see the receivers within the
+    productdb.models module)
+
+    :param action: ChangeLogEntry.ACTION_CREATED, ChangeLogEntry.ACTION_UPDATED or ChangeLogEntry.ACTION_DELETED
+    """
+    if products:
+        changed_products = []
+        if action != ChangeLogEntry.ACTION_DELETED:
+            changed_product_ids = ProductMigrationOption.objects.update_replacement_db_products(products)
+            changed_products = list(Product.objects.filter(id__in=changed_product_ids))
+
+        ProductMigrationPath.objects.refresh(products + changed_products)
+        ChangeLogEntry.objects.log_changes(Product, [e.id for e in products], action)
+
+    utils.increment_product_data_version_on_commit(vendor_ids)
+
+
+def create_products(items):
+    """
+    create the Products of all valid items
+
+    :param items: list of dictionaries with the values of the Products (same fields as the API endpoint)
+    :return: list with the result of every item
+    """
+    results = [None] * len(items)
+    context = get_serializer_context([e for e in items if isinstance(e, dict)])
+    vendors = context["related_objects"]["vendor"]
+
+    product_ids = [e.get("product_id") for e in items if isinstance(e, dict) and isinstance(e.get("product_id"), str)]
+    existing_product_ids = set(Product.objects.filter(product_id__in=product_ids).values_list("product_id", flat=True))
+
+    products = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = get_item_result(index, STATUS_ERROR, errors=INVALID_ITEM_ERRORS)
+            continue
+
+        serializer = BulkProductSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors=serializer.errors)
+            continue
+
+        product = Product(**serializer.validated_data)
+        errors = clean_product(product, vendors)
+        if not errors and product.product_id in existing_product_ids:
+            errors = get_unique_product_id_errors(product)
+
+        if errors:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors=errors)
+            continue
+
+        existing_product_ids.add(product.product_id)
+        products[index] = product
+
+    if products:
+        with transaction.atomic():
+            with no_invalidation:
+                Product.objects.bulk_create(products.values(), batch_size=BATCH_SIZE)
+
+            # the IDs of the new Products are not set by bulk_create
+            ids = dict(Product.objects.filter(
+                product_id__in=[e.product_id for e in products.values()]
+            ).values_list("product_id", "id"))
+            for product in products.values():
+                product.id = ids[product.product_id]
+
+            update_product_data(
+                list(products.values()),
+                {e.vendor_id for e in products.values()},
+                ChangeLogEntry.ACTION_CREATED
+            )
+
+        invalidate_model(Product)
+
+    for index, product in products.items():
+        results[index] = get_item_result(index, STATUS_CREATED, product=product)
+
+    return results
+
+
+def update_products(items):
+    """
+    update the Products of all valid items (partial update, only the given values are changed)
+
+    :param items: list of dictionaries with the values of the Products, every item must contain the id or the
+                  product_id of the Product (a Product ID is changed if the item contains also the id)
+    :return: list with the result of every item
+    """
+    results = [None] * len(items)
+    lookups = [get_lookup(e) if isinstance(e, dict) else None for e in items]
+    existing_products = get_products([e for e in lookups if e])
+    context = get_serializer_context([e for e in items if isinstance(e, dict)])
+    vendors = context["related_objects"]["vendor"]
+
+    new_product_ids = [
+        e.get("product_id") for e in items if isinstance(e, dict) and isinstance(e.get("product_id"), str)
+    ]
+    existing_product_ids = dict(Product.objects.filter(
+        product_id__in=new_product_ids
+    ).values_list("product_id", "id"))
+
+    products = {}
+    processed_ids = set()
+    vendor_ids = set()
+    update_fields = set(UPDATE_TIMESTAMP_FIELDS)
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = get_item_result(index, STATUS_ERROR, errors=INVALID_ITEM_ERRORS)
+            continue
+
+        if lookups[index] is None:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors=MISSING_LOOKUP_ERRORS)
+            continue
+
+        product = existing_products.get(lookups[index])
+        if product is None:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors={
+                lookups[index][0]: ["Product not found"]
+            })
+            continue
+
+        if product.id in processed_ids:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors={
+                lookups[index][0]: ["the Product is part of another item of the batch"]
+            })
+            continue
+
+        processed_ids.add(product.id)
+
+        serializer = BulkProductSerializer(product, data=item, partial=True, context=context)
+        if not serializer.is_valid():
+            results[index] = get_item_result(index, STATUS_ERROR, product=product, errors=serializer.errors)
+            continue
+
+        for field_name, value in serializer.validated_data.items():
+            setattr(product, field_name, value)
+
+        errors = clean_product(product, vendors)
+        if not errors and existing_product_ids.get(product.product_id, product.id) != product.id:
+            errors = get_unique_product_id_errors(product)
+
+        if errors:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors=errors)
+            continue
+
+        existing_product_ids[product.product_id] = product.id
+        products[index] = product
+        vendor_ids |= {product.vendor_id, product.loaded_vendor_id}
+        update_fields |= set(serializer.validated_data.keys())
+
+    if products:
+        product_list = list(products.values())
+        fields = [Product._meta.get_field(e) for e in sorted(update_fields)]
+        with transaction.atomic():
+            with no_invalidation:
+                for start in range(0, len(product_list), BATCH_SIZE):
+                    batch = product_list[start:start + BATCH_SIZE]
+                    Product.objects.filter(id__in=[e.id for e in batch]).update(**{
+                        field.name: Case(
+                            *[When(id=e.id, then=Value(getattr(e, field.attname), output_field=field)) for e in batch],
+                            default=F(field.name),
+                            output_field=field
+                        ) for field in fields
+                    })
+
+            update_product_data(product_list, vendor_ids, ChangeLogEntry.ACTION_UPDATED)
+
+        invalidate_model(Product)
+
+    for index, product in products.items():
+        results[index] = get_item_result(index, STATUS_UPDATED, product=product)
+
+    return results
+
+
+def delete_products(items):
+    """
+    delete the Products of all valid items
+
+    :param items: list of dictionaries with the id or the product_id of the Products
+    :return: list with the result of every item
+    """
+    results = [None] * len(items)
+    lookups = [get_lookup(e) if isinstance(e, dict) else None for e in items]
+    existing_products = get_products([e for e in lookups if e])
+
+    products = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = get_item_result(index, STATUS_ERROR, errors=INVALID_ITEM_ERRORS)
+            continue
+
+        if lookups[index] is None:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors=MISSING_LOOKUP_ERRORS)
+            continue
+
+        product = existing_products.get(lookups[index])
+        if product is None:
+            results[index] = get_item_result(index, STATUS_ERROR, item=item, errors={
+                lookups[index][0]: ["Product not found"]
+            })
+            continue
+
+        products[index] = product
+
+    if products:
+        # the same Product may be part of multiple items
+        product_list = list({e.id: e for e in products.values()}.values())
+        product_ids = [e.id for e in product_list]
+        with transaction.atomic():
+            # the Product Migration Options of the Products are deleted by the database cascade, the options that
+            # refer to the Products as replacement are unlinked
+            option_ids = list(ProductMigrationOption.objects.filter(product_id__in=product_ids).values_list(
+                "id", flat=True
+            ))
+            unlinked_option_ids = list(ProductMigrationOption.objects.filter(
+                replacement_db_product_id__in=product_ids
+            ).exclude(id__in=option_ids).values_list("id", flat=True))
+            with bulk_product_operation():
+                Product.objects.filter(id__in=product_ids).delete()
+
+            update_product_data(product_list, {e.vendor_id for e in product_list}, ChangeLogEntry.ACTION_DELETED)
+            ChangeLogEntry.objects.log_changes(ProductMigrationOption, option_ids, ChangeLogEntry.ACTION_DELETED)
+            ChangeLogEntry.objects.log_changes(
+                ProductMigrationOption, unlinked_option_ids, ChangeLogEntry.ACTION_UPDATED
+            )
+
+    for index, product in products.items():
+        results[index] = get_item_result(index, STATUS_DELETED, product=product)
+
+    return results
@@ -1,7 +1,82 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
 from django_datatables_view.base_datatable_view import BaseDatatableView
 from .models import Product, ProductGroup
-from django.db.models import Q
-from app.productdb.utils import is_valid_regex
+from app.productdb import search
+from app.productdb.utils import is_valid_regex, get_product_data_version
+from django_project import cache as protected_cache
+
+logger = logging.getLogger("productdb")
+
+TOTAL_RECORDS_CACHE_KEY = "PDB_DATATABLES_TOTAL_RECORDS_%s_%s_%d"
+TOTAL_RECORDS_CACHE_TIMEOUT = 60 * 60
+KEYSET_CACHE_KEY = "PDB_DATATABLES_KEYSET_%s_%d_%d"
+KEYSET_CACHE_TIMEOUT = 60 * 30
+RESPONSE_CACHE_KEY = "PDB_DATATABLES_RESPONSE_%s_%d"
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# request parameters that don't change the result set of a datatables request
+PAGING_PARAMETERS = ("draw", "start", "length", "_")
+
+# request parameters that don't change the response of a datatables request (except the draw counter)
+NON_RESPONSE_PARAMETERS = ("draw", "_")
+
+# JSON keys of the Product rows and the related field lookups (the lifecycle_state is computed from the annotations of
+# ProductQuerySet.with_lifecycle_state)
+PRODUCT_ROW_FIELDS = OrderedDict([
+    ("id", "id"),
+    ("vendor", "vendor__name"),
+    ("product_id", "product_id"),
+    ("product_group", "product_group__name"),
+    ("product_group_id", "product_group_id"),
+    ("description", "description"),
+    ("list_price", "list_price"),
+    ("currency", "currency"),
+    ("tags", "tags"),
+    ("lifecycle_state", None),
+    ("eox_update_time_stamp", "eox_update_time_stamp"),
+    ("eol_ext_announcement_date", "eol_ext_announcement_date"),
+    ("end_of_sale_date", "end_of_sale_date"),
+    ("end_of_new_service_attachment_date", "end_of_new_service_attachment_date"),
+    ("end_of_sw_maintenance_date", "end_of_sw_maintenance_date"),
+    ("end_of_routine_failure_analysis", "end_of_routine_failure_analysis"),
+    ("end_of_service_contract_renewal", "end_of_service_contract_renewal"),
+    ("end_of_sec_vuln_supp_date", "end_of_sec_vuln_supp_date"),
+    ("end_of_support_date", "end_of_support_date"),
+    ("eol_reference_number", "eol_reference_number"),
+    ("eol_reference_url", "eol_reference_url"),
+    ("lc_state_sync", "lc_state_sync"),
+    ("internal_product_id", "internal_product_id"),
+])
+
+# additional JSON keys that are required to render a column in the browser
+PRODUCT_ROW_DEPENDENCIES = {
+    "product_group": ("product_group_id",),
+    "list_price": ("currency",),
+    "lifecycle_state": ("eox_update_time_stamp",),
+    "eol_reference_url": ("eol_reference_number",),
+}
+
+# JSON keys that contain an empty string instead of null
+PRODUCT_ROW_EMPTY_STRING_FIELDS = ("product_group", "product_group_id")
+
+# lifecycle date columns in the order of the Product tables
+LIFECYCLE_DATE_COLUMNS = (
+    "eol_ext_announcement_date",
+    "end_of_sale_date",
+    "end_of_new_service_attachment_date",
+    "end_of_sw_maintenance_date",
+    "end_of_routine_failure_analysis",
+    "end_of_service_contract_renewal",
+    "end_of_sec_vuln_supp_date",
+    "end_of_support_date",
+)
 
 
 def get_try_regex_from_user_profile(request):
@@ -13,6 +88,358 @@ def get_try_regex_from_user_profile(request):
         return False
 
 
+def get_lifecycle_date_column_filters(first_column):
+    """
+    returns the column based filters for the lifecycle date columns (see ColumnSearchMixin) that start at the given
+    column
+    """
+    return {
+        field_name: {
+            "order": first_column + index,
+            "expr": field_name,
+            "type": search.RANGE_FILTER_DATE
+        } for index, field_name in enumerate(LIFECYCLE_DATE_COLUMNS)
+    }
+
+
+def use_regex_search(search_string, try_regex):
+    """
+    True if the search string should be used as regular expression (valid and with a bounded complexity)
+    """
+    return try_regex and is_valid_regex(search_string) and search.is_safe_regex(search_string)
+
+
+def get_approximate_count(model):
+    """
+    returns the estimated amount of rows within the table of the model from the PostgreSQL statistics (updated by
+    VACUUM/ANALYZE, -1 or 0 if the table was never analyzed)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+
+    return row[0] if row else -1
+
+
+class CachedTotalRecordsMixin:
+    """
+    caches the amount of records before filtering (recordsTotal) per view and scope (e.g. the Vendor), the cache key
+    contains the product data version, therefore any write to the product data invalidates the value; the filtered
+    amount of records is only counted if a search is applied
+    """
+    # use the estimated amount of rows from the PostgreSQL statistics if the table contains at least
+    # DATATABLES_APPROXIMATE_COUNT_THRESHOLD rows (only valid if the initial queryset contains the entire table)
+    use_approximate_count = False
+
+    def get_total_records_scope(self):
+        """
+        returns the value that identifies the initial queryset of the view (e.g. the Vendor ID)
+        """
+        return ""
+
+    def get_data_version(self):
+        """
+        returns the version of the product data that is used by the view (see utils.get_product_data_version)
+        """
+        return get_product_data_version()
+
+    def count_total_records(self, qs):
+        threshold = getattr(settings, "DATATABLES_APPROXIMATE_COUNT_THRESHOLD", None)
+        if self.use_approximate_count and threshold:
+            approximate_count = get_approximate_count(qs.model)
+            if approximate_count >= threshold:
+                return approximate_count
+
+        return qs.count()
+
+    def get_total_records(self, qs):
+        key = TOTAL_RECORDS_CACHE_KEY % (
+            self.__class__.__name__,
+            self.get_total_records_scope(),
+            self.get_data_version()
+        )
+        return protected_cache.get_or_compute(
+            key,
+            lambda: self.count_total_records(qs),
+            timeout=TOTAL_RECORDS_CACHE_TIMEOUT
+        )
+
+    def get_filtered_results(self, qs, total_records):
+        """
+        returns the number of records after filtering and the results of the requested page
+        """
+        filtered_qs = self.filter_queryset(qs)
+
+        # number of records after filtering (the filter methods return the initial queryset if no search is applied)
+        total_display_records = total_records if filtered_qs is qs else filtered_qs.count()
+
+        qs = self.ordering(filtered_qs)
+        qs = self.paging(qs)
+
+        return total_display_records, self.prepare_results(qs)
+
+    def get_context_data(self, *args, **kwargs):
+        try:
+            self.initialize(*args, **kwargs)
+
+            qs = self.get_initial_queryset()
+
+            # number of records before filtering
+            total_records = self.get_total_records(qs)
+
+            total_display_records, data = self.get_filtered_results(qs, total_records)
+
+            return {
+                "draw": int(self._querydict.get("draw", 0)),
+                "recordsTotal": total_records,
+                "recordsFiltered": total_display_records,
+                "data": data
+            }
+
+        except Exception as ex:
+            logger.exception("datatables request failed: %s" % str(ex))
+
+            return {
+                "error": "\nAn error occurred while processing an AJAX request.",
+                "data": [],
+                "recordsTotal": 0,
+                "recordsFiltered": 0,
+                "draw": int(self._querydict.get("draw", 0))
+            }
+
+
+def get_field_value(obj, field_name):
+    """
+    returns the value of a field lookup (e.g. vendor__name) from the given object or values() dictionary
+    """
+    if isinstance(obj, dict):
+        return obj[field_name]
+
+    for name in field_name.split("__"):
+        obj = getattr(obj, name)
+    return obj
+
+
+class KeysetPaginationMixin:
+    """
+    keyset (seek) pagination for the datatables start/length protocol: the sort key of the last row of each page is
+    cached, the next page is fetched using a WHERE clause on the sort column and the id instead of an OFFSET,
+    therefore sequential paging costs the same on every page. If no key is available (e.g. a jump to the last page),
+    the OFFSET based paging is used.
+    """
+    # cache key and value of the sort key for the next page (restored with a cached response, see CachedResponseMixin)
+    next_keyset = None
+
+    # order columns (see order_columns) that can be used for the keyset pagination and the related field lookup, the
+    # fields must not contain NULL values
+    keyset_columns = {}
+
+    keyset_field = None
+    keyset_descending = False
+
+    def ordering(self, qs):
+        order_columns = self.get_order_columns()
+        try:
+            sort_col = int(self._querydict.get("order[0][column]", ""))
+            order_column = order_columns[sort_col]
+
+        except (ValueError, IndexError):
+            order_column = None
+
+        if "order[1][column]" in self._querydict or order_column not in self.keyset_columns:
+            return super().ordering(qs)
+
+        self.keyset_field = self.keyset_columns[order_column]
+        self.keyset_descending = self._querydict.get("order[0][dir]") == "desc"
+        sdir = "-" if self.keyset_descending else ""
+
+        # the id is required for a stable order of rows with the same value
+        return qs.order_by(sdir + self.keyset_field, sdir + "id")
+
+    def get_keyset_cache_key(self, start):
+        params = sorted((k, v) for k, v in self._querydict.items() if k not in PAGING_PARAMETERS)
+        params += sorted(self.kwargs.items())
+        params.append(("try_regex", self.get_try_regex()))
+        signature = hashlib.md5(
+            (self.__class__.__name__ + urlencode(params)).encode("utf-8")
+        ).hexdigest()
+
+        return KEYSET_CACHE_KEY % (signature, start, self.get_data_version())
+
+    def paging(self, qs):
+        if self.keyset_field is None:
+            return super().paging(qs)
+
+        limit = min(int(self._querydict.get("length", 10)), self.max_display_length)
+        start = int(self._querydict.get("start", 0))
+
+        if limit == -1:
+            return qs
+
+        key = self.get_keyset_cache_key(start) if start > 0 else None
+        keyset = cache.get(key) if key else None
+        if keyset is not None:
+            value, pk = keyset
+            lookup = "lt" if self.keyset_descending else "gt"
+            page = list(qs.filter(
+                Q(**{"%s__%s" % (self.keyset_field, lookup): value}) |
+                Q(**{self.keyset_field: value, "id__%s" % lookup: pk})
+            )[:limit])
+
+        else:
+            page = list(qs[start:start + limit])
+
+        if page:
+            # store the key for the next page
+            last = page[-1]
+            self.next_keyset = (
+                self.get_keyset_cache_key(start + len(page)),
+                (get_field_value(last, self.keyset_field), last.id)
+            )
+            cache.set(*self.next_keyset, timeout=KEYSET_CACHE_TIMEOUT)
+
+        return page
+
+
+class ProductRowProjectionMixin:
+    """
+    creates the JSON rows of the Product datatables endpoints without Product model instances: only the required
+    columns are read using values(), the names of the Vendor and the Product Group are joined in SQL
+    """
+    # JSON keys (see PRODUCT_ROW_FIELDS) that are provided by the endpoint
+    row_fields = tuple(PRODUCT_ROW_FIELDS.keys())
+
+    result_fields = ()
+
+    def get_row_fields(self):
+        """
+        returns the JSON keys of the rows, limited to the data sources of the DataTables columns within the request;
+        all keys are returned if no columns are given or if a column uses no key as data source
+        """
+        requested_fields = []
+        counter = 0
+        while "columns[%d][data]" % counter in self._querydict:
+            requested_fields.append(self._querydict.get("columns[%d][data]" % counter))
+            counter += 1
+
+        if not requested_fields or any(e not in self.row_fields for e in requested_fields):
+            return self.row_fields
+
+        fields = {"id"}
+        for field in requested_fields:
+            fields.add(field)
+            fields.update(PRODUCT_ROW_DEPENDENCIES.get(field, ()))
+
+        return tuple(e for e in self.row_fields if e in fields)
+
+    def get_value_lookups(self):
+        lookups = set()
+        for field in self.result_fields:
+            if field == "lifecycle_state":
+                lookups.add("lifecycle_state")
+                lookups.update(e[0] for e in Product.END_OF_SALE_SUB_STATES)
+
+            else:
+                lookups.add(PRODUCT_ROW_FIELDS[field])
+
+        # required to store the key of the keyset pagination
+        if getattr(self, "keyset_field", None):
+            lookups.update([self.keyset_field, "id"])
+
+        return lookups
+
+    def paging(self, qs):
+        self.result_fields = self.get_row_fields()
+        return super().paging(qs.values(*self.get_value_lookups()))
+
+    def prepare_results(self, qs):
+        json_data = []
+
+        for values in qs:
+            row = {}
+            for field in self.result_fields:
+                if field == "lifecycle_state":
+                    row[field] = Product.get_annotated_lifecycle_states(values)
+                    continue
+
+                value = values[PRODUCT_ROW_FIELDS[field]]
+                if value is None and field in PRODUCT_ROW_EMPTY_STRING_FIELDS:
+                    value = ""
+                row[field] = value
+
+            json_data.append(row)
+
+        return json_data
+
+
+class CachedResponseMixin:
+    """
+    caches the response of a datatables request, the cache key contains the normalized request parameters, the
+    regular expression search setting of the user and the version of the product data (see get_data_version of the
+    CachedTotalRecordsMixin), therefore any write to the product data invalidates the cached responses. The sort key
+    for the next page of the KeysetPaginationMixin is stored with the response and restored on every cache hit.
+    """
+    def get_response_cache_key(self):
+        params = sorted(
+            (k, v) for k, v in self._querydict.items() if k not in NON_RESPONSE_PARAMETERS and v != ""
+        )
+        params += sorted(self.kwargs.items())
+        params.append(("try_regex", self.get_try_regex()))
+        signature = hashlib.md5(
+            (self.__class__.__name__ + urlencode(params)).encode("utf-8")
+        ).hexdigest()
+
+        return RESPONSE_CACHE_KEY % (signature, self.get_data_version())
+
+    def get_context_data(self, *args, **kwargs):
+        key = self.get_response_cache_key()
+        cached_value = cache.get(key)
+        if cached_value is None:
+            result = super().get_context_data(*args, **kwargs)
+            if "error" in result:
+                return result
+
+            # the plain text result of a cancelled regular expression search is not stored for the regex request
+            if not result.get("regex_search_timed_out"):
+                cache.set(key, (result, getattr(self, "next_keyset", None)), RESPONSE_CACHE_TIMEOUT)
+
+        else:
+            result, next_keyset = cached_value
+            if next_keyset is not None:
+                # the key may have expired, the next page would use the OFFSET otherwise
+                cache.set(*next_keyset, timeout=KEYSET_CACHE_TIMEOUT)
+
+        # the draw counter of the request is always returned
+        return dict(result, draw=int(self._querydict.get("draw", 0)))
+
+
+class RegexSearchGuardMixin:
+    """
+    executes the queries of a regular expression search with a statement_timeout, if the search is cancelled, the
+    search string is used as plain text (requires the get_filtered_results method of the CachedTotalRecordsMixin) and
+    the response contains the regex_search_timed_out flag (shown as notice above the table)
+    """
+    def get_context_data(self, *args, **kwargs):
+        result = super().get_context_data(*args, **kwargs)
+        if self.regex_search_timed_out:
+            result["regex_search_timed_out"] = True
+
+        return result
+
+    def get_filtered_results(self, qs, total_records):
+        if not self.is_regex_search_request():
+            return super().get_filtered_results(qs, total_records)
+
+        try:
+            with search.statement_timeout(search.REGEX_SEARCH_STATEMENT_TIMEOUT):
+                return super().get_filtered_results(qs, total_records)
+
+        except search.SearchTimeout:
+            logger.warning("regular expression search timed out, use plain text search: %s" % self.request.path)
+            self.regex_search_timed_out = True
+            return super().get_filtered_results(qs, total_records)
+
+
 class ColumnSearchMixin:
     """
     column search implementation for datatables
@@ -20,9 +447,43 @@ class ColumnSearchMixin:
     # the following dictionary is required in the class, that implements the column based search function
     column_based_filter = {}
 
+    # set if the regular expression search was cancelled by the statement_timeout
+    regex_search_timed_out = False
+
+    def get_try_regex(self):
+        """
+        indicates that the search terms should try regular expression first
+        """
+        return not self.regex_search_timed_out and get_try_regex_from_user_profile(self.request)
+
+    def is_regex_search_request(self):
+        """
+        True if any search string within the request is used as a regular expression
+        """
+        try_regex = self.get_try_regex()
+        search_strings = [self.request.GET.get("search[value]", None)]
+        for param in self.column_based_filter.values():
+            column_search_string = self.request.GET.get("columns[%d][search][value]" % param["order"], None)
+            if column_search_string and self.get_range_q(param, column_search_string) is None:
+                search_strings.append(column_search_string)
+
+        return any([e and use_regex_search(e, try_regex) for e in search_strings])
+
+    @staticmethod
+    def get_range_q(param, column_search_string):
+        """
+        returns the native comparison for a typed column (see search.get_range_q), None if the column has no type or
+        if the search string is not a valid range
+        """
+        if "type" not in param:
+            return None
+
+        return search.get_range_q(param["expr"], column_search_string, param["type"])
+
     def apply_column_based_search(self, request, query_set, try_regex=True):
         """
-        apply the column based search parameters from datatables to the query_set
+        apply the column based search parameters from datatables to the query_set, typed columns (number and date)
+        accept ranges like "100-500" or ">1000"
 
         :param request: the request object
         :param query_set: the query_set that should be used to apply the filters
@@ -34,23 +495,34 @@ class ColumnSearchMixin:
             column_search_string = request.GET.get(get_param, None)
 
             if column_search_string:
-                query_set = query_set.filter(**{
-                    "%s__%s" % (
-                        param["expr"],
-                        "iregex" if is_valid_regex(column_search_string) and try_regex else "icontains"
-                    ): column_search_string
-                })
+                range_q = self.get_range_q(param, column_search_string)
+                if range_q is not None:
+                    query_set = query_set.filter(range_q)
+                    continue
+
+                query_set = query_set.filter(search.get_search_q(
+                    [param["expr"]],
+                    column_search_string,
+                    regex=use_regex_search(column_search_string, try_regex)
+                ))
         return query_set
 
 
-class VendorProductListJson(BaseDatatableView, ColumnSearchMixin):
+class VendorProductListJson(CachedResponseMixin, RegexSearchGuardMixin, CachedTotalRecordsMixin,
+                            ProductRowProjectionMixin, KeysetPaginationMixin, BaseDatatableView,
+                            ColumnSearchMixin):
     order_columns = [
         'product_id',
         'product_group',
         'description',
         'list_price',
-        'tags'
+        'tags',
+        'lifecycle_state_order'
     ]
+    keyset_columns = {
+        "product_id": "product_id",
+    }
+    row_fields = tuple(e for e in PRODUCT_ROW_FIELDS.keys() if e != "vendor")
 
     column_based_filter = {  # parameters that are required for the column based filtering
         "product_id": {
@@ -69,13 +541,18 @@ class VendorProductListJson(BaseDatatableView, ColumnSearchMixin):
         "list_price": {
             "order": 3,
             "expr": "list_price",
+            "type": search.RANGE_FILTER_NUMBER,
         },
         "tags": {
             "order": 4,
             "expr": "tags",
+        },
+        "lifecycle_state": {
+            "order": 5,
+            "expr": "lifecycle_state",
         }
-
     }
+    column_based_filter.update(get_lifecycle_date_column_filters(6))
 
     # if no vendor is given, we use the "unassigned" vendor
     vendor_id = 0
@@ -84,57 +561,35 @@ class VendorProductListJson(BaseDatatableView, ColumnSearchMixin):
         if "vendor_id" in self.kwargs:
             if self.kwargs['vendor_id']:
                 self.vendor_id = self.kwargs['vendor_id']
-        return Product.objects.filter(vendor__id=self.vendor_id).prefetch_related("vendor", "product_group")
+        return Product.objects.filter(vendor__id=self.vendor_id).with_lifecycle_state()
+
+    def get_total_records_scope(self):
+        return self.vendor_id
+
+    def get_data_version(self):
+        # the view only contains the Products of a single Vendor
+        return get_product_data_version(vendor_id=int(self.kwargs.get("vendor_id") or self.vendor_id))
 
     def filter_queryset(self, qs):
         search_string = self.request.GET.get('search[value]', None)
-        try_regex = get_try_regex_from_user_profile(self.request)
+        try_regex = self.get_try_regex()
 
         if search_string:
             # search in the Product Group name and Vendor name by default
-            operation = "iregex" if is_valid_regex(search_string) and try_regex else "icontains"
-            qs = qs.filter(
-                Q(**{"product_id__%s" % operation: search_string}) |
-                Q(**{"description__%s" % operation: search_string})
-            )
+            qs = qs.filter(search.get_search_q(
+                ["product_id", "description"],
+                search_string,
+                regex=use_regex_search(search_string, try_regex)
+            ))
 
         # apply column based search
         qs = self.apply_column_based_search(request=self.request, query_set=qs, try_regex=try_regex)
 
         return qs
 
-    def prepare_results(self, qs):
-        json_data = []
-
-        for item in qs:
-            json_data.append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_group": item.product_group.name if item.product_group else "",
-                "product_group_id": item.product_group.id if item.product_group else "",
-                "description": item.description,
-                "list_price": item.list_price,
-                "currency": item.currency,
-                "tags": item.tags,
-                "lifecycle_state": item.current_lifecycle_states,
-                "eox_update_time_stamp": item.eox_update_time_stamp,
-                "eol_ext_announcement_date": item.eol_ext_announcement_date,
-                "end_of_sale_date": item.end_of_sale_date,
-                "end_of_new_service_attachment_date": item.end_of_new_service_attachment_date,
-                "end_of_sw_maintenance_date": item.end_of_sw_maintenance_date,
-                "end_of_routine_failure_analysis": item.end_of_routine_failure_analysis,
-                "end_of_service_contract_renewal": item.end_of_service_contract_renewal,
-                "end_of_sec_vuln_supp_date": item.end_of_sec_vuln_supp_date,
-                "end_of_support_date": item.end_of_support_date,
-                "eol_reference_number": item.eol_reference_number,
-                "eol_reference_url": item.eol_reference_url,
-                "lc_state_sync": item.lc_state_sync,
-                "internal_product_id": item.internal_product_id
-            })
-        return json_data
-
 
-class ListProductGroupsJson(BaseDatatableView, ColumnSearchMixin):
+class ListProductGroupsJson(CachedResponseMixin, RegexSearchGuardMixin, CachedTotalRecordsMixin, BaseDatatableView,
+                            ColumnSearchMixin):
     """
     Product Group datatable endpoint
     """
@@ -159,15 +614,15 @@ class ListProductGroupsJson(BaseDatatableView, ColumnSearchMixin):
     def filter_queryset(self, qs):
         # use request parameters to filter queryset
         search_string = self.request.GET.get('search[value]', None)
-        try_regex = get_try_regex_from_user_profile(self.request)
+        try_regex = self.get_try_regex()
 
         if search_string:
             # search in the Product Group name and Vendor name by default
-            operation = "iregex" if is_valid_regex(search_string) and try_regex else "icontains"
-            qs = qs.filter(
-                Q(**{"name__%s" % operation: search_string}) |
-                Q(**{"vendor__name__%s" % operation: search_string})
-            )
+            qs = qs.filter(search.get_search_q(
+                ["name", "vendor__name"],
+                search_string,
+                regex=use_regex_search(search_string, try_regex)
+            ))
 
         # apply column based search
         qs = self.apply_column_based_search(request=self.request, query_set=qs, try_regex=try_regex)
@@ -187,7 +642,9 @@ class ListProductGroupsJson(BaseDatatableView, ColumnSearchMixin):
         return json_data
 
 
-class ListProductsByGroupJson(BaseDatatableView, ColumnSearchMixin):
+class ListProductsByGroupJson(CachedResponseMixin, RegexSearchGuardMixin, CachedTotalRecordsMixin,
+                              ProductRowProjectionMixin, KeysetPaginationMixin, BaseDatatableView,
+                              ColumnSearchMixin):
     """
     Product datatables endpoint for a a specific Product Group
     """
@@ -195,8 +652,14 @@ class ListProductsByGroupJson(BaseDatatableView, ColumnSearchMixin):
         'product_id',
         'description',
         'list_price',
-        'tags'
+        'tags',
+        'lifecycle_state_order'
     ]
+    keyset_columns = {
+        "product_id": "product_id",
+    }
+    row_fields = tuple(e for e in PRODUCT_ROW_FIELDS.keys() if e not in ("vendor", "product_group", "product_group_id"))
+
     column_based_filter = {  # parameters that are required for the column based filtering
         "product_id": {
             "order": 0,
@@ -208,77 +671,66 @@ class ListProductsByGroupJson(BaseDatatableView, ColumnSearchMixin):
         },
         "list_price": {
             "order": 2,
-            "expr": "list_price"
+            "expr": "list_price",
+            "type": search.RANGE_FILTER_NUMBER
         },
         "tags": {
             "order": 3,
             "expr": "tags"
         },
+        "lifecycle_state": {
+            "order": 4,
+            "expr": "lifecycle_state"
+        },
     }
+    column_based_filter.update(get_lifecycle_date_column_filters(5))
 
     # used if only products from a specific product ID should be shown
     product_group_id = None
 
     def get_initial_queryset(self):
         self.product_group_id = self.kwargs.get('product_group_id', 0)
-        return Product.objects.filter(product_group__id=self.product_group_id)
+        return Product.objects.filter(product_group__id=self.product_group_id).with_lifecycle_state()
+
+    def get_total_records_scope(self):
+        return self.product_group_id
 
     def filter_queryset(self, qs):
         # use request parameters to filter queryset
         search_string = self.request.GET.get('search[value]', None)
-        try_regex = get_try_regex_from_user_profile(self.request)
+        try_regex = self.get_try_regex()
 
         if search_string:
             # search in the Product Group name and Vendor name by default
-            operation = "iregex" if is_valid_regex(search_string) and try_regex else "icontains"
-            qs = qs.filter(
-                Q(**{"product_id__%s" % operation: search_string}) |
-                Q(**{"description__%s" % operation: search_string})
-            )
+            qs = qs.filter(search.get_search_q(
+                ["product_id", "description"],
+                search_string,
+                regex=use_regex_search(search_string, try_regex)
+            ))
 
         # apply column based search
         qs = self.apply_column_based_search(request=self.request, query_set=qs, try_regex=try_regex)
 
         return qs
 
-    def prepare_results(self, qs):
-        json_data = []
-
-        for item in qs:
-            json_data.append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "description": item.description,
-                "list_price": item.list_price,
-                "currency": item.currency,
-                "tags": item.tags,
-                "lifecycle_state": item.current_lifecycle_states,
-                "eox_update_time_stamp": item.eox_update_time_stamp,
-                "eol_ext_announcement_date": item.eol_ext_announcement_date,
-                "end_of_sale_date": item.end_of_sale_date,
-                "end_of_new_service_attachment_date": item.end_of_new_service_attachment_date,
-                "end_of_sw_maintenance_date": item.end_of_sw_maintenance_date,
-                "end_of_routine_failure_analysis": item.end_of_routine_failure_analysis,
-                "end_of_service_contract_renewal": item.end_of_service_contract_renewal,
-                "end_of_sec_vuln_supp_date": item.end_of_sec_vuln_supp_date,
-                "end_of_support_date": item.end_of_support_date,
-                "eol_reference_number": item.eol_reference_number,
-                "eol_reference_url": item.eol_reference_url,
-                "lc_state_sync": item.lc_state_sync,
-                "internal_product_id": item.internal_product_id
-            })
-        return json_data
-
 
-class ListProductsJson(BaseDatatableView, ColumnSearchMixin):
+class ListProductsJson(CachedResponseMixin, RegexSearchGuardMixin, CachedTotalRecordsMixin,
+                       ProductRowProjectionMixin, KeysetPaginationMixin, BaseDatatableView,
+                       ColumnSearchMixin):
     order_columns = [
         'vendor',
         'product_id',
         'product_group',
         'description',
         'list_price',
-        'tags'
+        'tags',
+        'lifecycle_state_order'
     ]
+    keyset_columns = {
+        "vendor": "vendor__name",
+        "product_id": "product_id",
+    }
+
     column_based_filter = {  # parameters that are required for the column based filtering
         "vendor": {
             "order": 0,
@@ -298,62 +750,40 @@ class ListProductsJson(BaseDatatableView, ColumnSearchMixin):
         },
         "list_price": {
             "order": 4,
-            "expr": "list_price"
+            "expr": "list_price",
+            "type": search.RANGE_FILTER_NUMBER
         },
         "tags": {
             "order": 5,
             "expr": "tags"
+        },
+        "lifecycle_state": {
+            "order": 6,
+            "expr": "lifecycle_state"
         }
     }
+    column_based_filter.update(get_lifecycle_date_column_filters(7))
+
+    # the initial queryset contains the entire Product table
+    use_approximate_count = True
 
     def get_initial_queryset(self):
-        return Product.objects.all().prefetch_related("vendor", "product_group")
+        return Product.objects.all().with_lifecycle_state()
 
     def filter_queryset(self, qs):
         # use request parameters to filter queryset
         search_string = self.request.GET.get('search[value]', None)
-        try_regex = get_try_regex_from_user_profile(self.request)
+        try_regex = self.get_try_regex()
 
         if search_string:
             # search in the Product Group name and Vendor name by default
-            operation = "iregex" if is_valid_regex(search_string) and try_regex else "icontains"
-            qs = qs.filter(
-                Q(**{"product_id__%s" % operation: search_string}) |
-                Q(**{"description__%s" % operation: search_string})
-            )
+            qs = qs.filter(search.get_search_q(
+                ["product_id", "description"],
+                search_string,
+                regex=use_regex_search(search_string, try_regex)
+            ))
 
         # apply column based search
         qs = self.apply_column_based_search(request=self.request, query_set=qs, try_regex=try_regex)
 
         return qs
-
-    def prepare_results(self, qs):
-        json_data = []
-
-        for item in qs:
-            json_data.append({
-                "id": item.id,
-                "vendor": item.vendor.name,
-                "product_id": item.product_id,
-                "product_group": item.product_group.name if item.product_group else "",
-                "product_group_id": item.product_group.id if item.product_group else "",
-                "description": item.description,
-                "list_price": item.list_price,
-                "currency": item.currency,
-                "tags": item.tags,
-                "lifecycle_state": item.current_lifecycle_states,
-                "eox_update_time_stamp": item.eox_update_time_stamp,
-                "eol_ext_announcement_date": item.eol_ext_announcement_date,
-                "end_of_sale_date": item.end_of_sale_date,
-                "end_of_new_service_attachment_date": item.end_of_new_service_attachment_date,
-                "end_of_sw_maintenance_date": item.end_of_sw_maintenance_date,
-                "end_of_routine_failure_analysis": item.end_of_routine_failure_analysis,
-                "end_of_service_contract_renewal": item.end_of_service_contract_renewal,
-                "end_of_sec_vuln_supp_date": item.end_of_sec_vuln_supp_date,
-                "end_of_support_date": item.end_of_support_date,
-                "eol_reference_number": item.eol_reference_number,
-                "eol_reference_url": item.eol_reference_url,
-                "lc_state_sync": item.lc_state_sync,
-                "internal_product_id": item.internal_product_id
-            })
-        return json_data
@@ -0,0 +1,138 @@
+"""
+streaming export of the Products (CSV, JSON lines and Excel), the Products are read in chunks ordered by their ID
+(keyset pagination), therefore the memory usage is independent from the amount of exported Products
+"""
+import csv
+import json
+import tempfile
+import xlsxwriter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from app.productdb.serializers import ProductSerializer
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSON_LINES = "jsonl"
+EXPORT_FORMAT_XLSX = "xlsx"
+
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_CSV: "text/csv",
+    EXPORT_FORMAT_JSON_LINES: "application/x-ndjson",
+    EXPORT_FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# exported Product fields (same values as the REST API)
+PRODUCT_EXPORT_FIELDS = tuple([e for e in ProductSerializer.Meta.fields if e != "url"])
+
+# fields that are converted like in the REST API (e.g. the list price with two decimal places)
+PRODUCT_EXPORT_CONVERTERS = {
+    "list_price": ProductSerializer().fields["list_price"].to_representation,
+}
+
+# amount of Products that are read with a single query
+EXPORT_CHUNK_SIZE = 2000
+
+# size of the chunks of the streamed Excel file
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class Echo:
+    """file-like object that returns the written value (used to stream the rows of the csv writer)"""
+    def write(self, value):
+        return value
+
+
+def get_value(value):
+    """convert a value to a string within a CSV or Excel file"""
+    if value is None:
+        return ""
+
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+
+    return str(value)
+
+
+def get_converters(field_names):
+    return [PRODUCT_EXPORT_CONVERTERS.get(e) for e in field_names]
+
+
+def iter_rows(queryset, field_names, chunk_size=None):
+    """
+    yields the values of the given fields for all Products of the queryset, ordered by ID (a query per chunk that
+    continues after the last ID of the previous chunk), the values are converted like in the REST API
+    """
+    converters = get_converters(field_names)
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    queryset = queryset.nocache().order_by("id")
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk.values_list("id", *field_names)[:chunk_size])
+        for row in rows:
+            yield [
+                value if convert is None or value is None else convert(value)
+                for convert, value in zip(converters, row[1:])
+            ]
+
+        if len(rows) < chunk_size:
+            return
+
+        last_id = rows[-1][0]
+
+
+def iter_csv(queryset, field_names):
+    writer = csv.writer(Echo())
+    yield writer.writerow(field_names)
+    for row in iter_rows(queryset, field_names):
+        yield writer.writerow([get_value(e) for e in row])
+
+
+def iter_json_lines(queryset, field_names):
+    for row in iter_rows(queryset, field_names):
+        yield json.dumps(dict(zip(field_names, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_xlsx(queryset, field_names):
+    """
+    the Excel file is written to a temporary file (the worksheet is flushed row by row), afterwards the file is
+    streamed in chunks
+    """
+    with tempfile.TemporaryFile() as f:
+        workbook = xlsxwriter.Workbook(f, {"constant_memory": True})
+        worksheet = workbook.add_worksheet("products")
+        worksheet.write_row(0, 0, field_names)
+        for index, row in enumerate(iter_rows(queryset, field_names), start=1):
+            worksheet.write_row(index, 0, [get_value(e) for e in row])
+        workbook.close()
+
+        f.seek(0)
+        while True:
+            data = f.read(FILE_CHUNK_SIZE)
+            if not data:
+                return
+
+            yield data
+
+
+EXPORT_GENERATORS = {
+    EXPORT_FORMAT_CSV: iter_csv,
+    EXPORT_FORMAT_JSON_LINES: iter_json_lines,
+    EXPORT_FORMAT_XLSX: iter_xlsx,
+}
+
+
+def get_export_response(queryset, export_format, field_names=PRODUCT_EXPORT_FIELDS):
+    """
+    returns a streaming response with the Products of the queryset
+
+    :param queryset: Product queryset
+    :param export_format: EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSON_LINES or EXPORT_FORMAT_XLSX
+    :param field_names: exported Product fields
+    """
+    response = StreamingHttpResponse(
+        EXPORT_GENERATORS[export_format](queryset, list(field_names)),
+        content_type=EXPORT_CONTENT_TYPES[export_format]
+    )
+    response["Content-Disposition"] = 'attachment; filename="products.%s"' % export_format
+
+    return response
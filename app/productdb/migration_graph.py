@@ -0,0 +1,115 @@
+import logging
+from app.productdb.models import ProductMigrationOption
+
+logger = logging.getLogger("productdb")
+
+
+class MigrationGraph:
+    """
+    in-memory graph of the Product Migration Options, the replacement chains (migration paths) are resolved per
+    Migration Source with memoization, cycles within the chains are detected and reported
+    """
+    def __init__(self, migration_source=None, product_migration_options=None, lazy=False):
+        """
+        :param migration_source: load only the edges of the given Product Migration Source (default all sources)
+        :param product_migration_options: use the given Product Migration Options instead of the database content
+        :param lazy: fetch edges that are not loaded from the database on demand (one query per hop)
+        """
+        self.lazy = lazy
+        self.cycles = []
+        self._options = {}
+        self._paths = {}
+
+        if product_migration_options is None:
+            product_migration_options = ProductMigrationOption.objects.all()
+            if migration_source is not None:
+                product_migration_options = product_migration_options.filter(migration_source=migration_source)
+
+            product_migration_options = product_migration_options.select_related("replacement_db_product")
+
+        for pmo in product_migration_options:
+            self._options[(pmo.product_id, pmo.migration_source_id)] = pmo
+
+    def __len__(self):
+        return len([e for e in self._options.values() if e is not None])
+
+    def get_option(self, product_id, migration_source_id):
+        """
+        returns the Product Migration Option of the given Product and Migration Source (database IDs) or None
+        """
+        key = (product_id, migration_source_id)
+        if key not in self._options and self.lazy:
+            self._options[key] = ProductMigrationOption.objects.filter(
+                product_id=product_id,
+                migration_source_id=migration_source_id
+            ).select_related("replacement_db_product").first()
+
+        return self._options.get(key)
+
+    def _report_cycle(self, cycle):
+        self.cycles.append(cycle)
+        logger.warning("cycle detected in the migration paths of source %d: %s" % (
+            cycle[0].migration_source_id,
+            " -> ".join([e.replacement_product_id for e in cycle[-1:] + cycle])
+        ))
+
+    def resolve(self, product_migration_option):
+        """
+        returns the migration path that starts with the given Product Migration Option, the result is an ordered list,
+        the first element is the direct replacement and the last one is the valid replacement (if any)
+        """
+        key = (product_migration_option.product_id, product_migration_option.migration_source_id)
+        if key in self._paths:
+            return self._paths[key]
+
+        # follow the chain until a valid replacement, the end of the chain, an already resolved option or a cycle
+        chain = [product_migration_option]
+        positions = {product_migration_option.product_id: 0}
+        tail = []
+        while not chain[-1].is_valid_replacement() and chain[-1].replacement_db_product_id:
+            next_key = (chain[-1].replacement_db_product_id, chain[-1].migration_source_id)
+            if next_key in self._paths:
+                tail = self._paths[next_key]
+                break
+
+            next_option = self.get_option(*next_key)
+            if next_option is None:
+                break
+
+            if next_option.product_id in positions:
+                # every option within the cycle follows the cycle until it reaches itself again
+                start = positions[next_option.product_id]
+                cycle = chain[start:]
+                self._report_cycle(cycle)
+                for index, option in enumerate(cycle):
+                    self._paths[(option.product_id, option.migration_source_id)] = cycle[index:] + cycle[:index]
+
+                tail = self._paths[next_key]
+                chain = chain[:start]
+                break
+
+            positions[next_option.product_id] = len(chain)
+            chain.append(next_option)
+
+        for option in reversed(chain):
+            tail = [option] + tail
+            self._paths[(option.product_id, option.migration_source_id)] = tail
+
+        return self._paths[key]
+
+    def get_migration_path(self, product_id, migration_source_id):
+        """
+        returns the migration path of the given Product and Migration Source (database IDs), empty list if the Product
+        has no option within the Migration Source
+        """
+        product_migration_option = self.get_option(product_id, migration_source_id)
+        return self.resolve(product_migration_option) if product_migration_option else []
+
+    def resolve_all(self):
+        """
+        resolve the migration paths of all loaded Product Migration Options in a single pass, returns a dictionary with
+        a (product ID, migration source ID) key and the migration path as value
+        """
+        return {
+            key: self.resolve(pmo) for key, pmo in list(self._options.items()) if pmo is not None
+        }
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# the Product Migration Sources with a preference greater than this value are considered preferred
+LESS_PREFERRED_PREFERENCE_VALUE = 25
+
+
+def is_valid_replacement(option, products):
+    """same rules as ProductMigrationOption.is_valid_replacement() based on the historical models"""
+    if not option.replacement_product_id:
+        return False
+
+    replacement = products.get(option.replacement_db_product_id)
+    if replacement is None:
+        return True
+
+    # a Product without an EoL announcement is a valid replacement
+    return not replacement.end_of_sale_date or \
+        (not replacement.eol_ext_announcement_date and replacement.eox_update_time_stamp is not None)
+
+
+def resolve_path(option, options, products):
+    """
+    follow the replacement chain of the given option until a valid replacement, the end of the chain or a cycle
+    """
+    path = [option]
+    visited = {option.product_id}
+    while not is_valid_replacement(path[-1], products) and path[-1].replacement_db_product_id:
+        next_option = options.get((path[-1].replacement_db_product_id, path[-1].migration_source_id))
+        if next_option is None or next_option.product_id in visited:
+            break
+
+        visited.add(next_option.product_id)
+        path.append(next_option)
+
+    return path
+
+
+def populate_product_migration_paths(apps, schema_editor):
+    Product = apps.get_model("productdb", "Product")
+    ProductMigrationOption = apps.get_model("productdb", "ProductMigrationOption")
+    ProductMigrationPath = apps.get_model("productdb", "ProductMigrationPath")
+
+    options = {(e.product_id, e.migration_source_id): e for e in ProductMigrationOption.objects.all()}
+    if not options:
+        return
+
+    products = Product.objects.filter(
+        id__in={e.replacement_db_product_id for e in options.values() if e.replacement_db_product_id}
+    ).in_bulk()
+
+    new_paths = []
+    for option in options.values():
+        path = resolve_path(option, options, products)
+        valid = is_valid_replacement(path[-1], products)
+        new_paths.append(ProductMigrationPath(
+            product_id=option.product_id,
+            migration_source_id=option.migration_source_id,
+            path=",".join([str(e.id) for e in path]),
+            replacement_option_id=path[-1].id,
+            valid_replacement_product_id=path[-1].replacement_db_product_id if valid else None
+        ))
+
+    ProductMigrationPath.objects.bulk_create(new_paths, batch_size=1000)
+
+    # the path of the most preferred Product Migration Source is marked as preferred
+    preferred_paths = {}
+    for path_id, product_id, preference, name in ProductMigrationPath.objects.values_list(
+            "id", "product_id", "migration_source__preference", "migration_source__name"):
+        if preference > LESS_PREFERRED_PREFERENCE_VALUE:
+            if product_id not in preferred_paths or (-preference, name) < preferred_paths[product_id][0]:
+                preferred_paths[product_id] = ((-preference, name), path_id)
+
+    ProductMigrationPath.objects.filter(id__in=[e[1] for e in preferred_paths.values()]).update(is_preferred=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0027_auto_20170302_2319'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductMigrationPath',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.TextField(blank=True, default='', help_text='ordered, comma separated list of the Product Migration Option IDs within the migration path')),
+                ('is_preferred', models.BooleanField(default=False, help_text='migration path of the most preferred Migration Source of the Product')),
+                ('migration_source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='productdb.ProductMigrationSource')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='migration_paths', to='productdb.Product')),
+                ('replacement_option', models.ForeignKey(blank=True, help_text='last Product Migration Option of the migration path', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='productdb.ProductMigrationOption')),
+                ('valid_replacement_product', models.ForeignKey(blank=True, help_text='valid replacement Product at the end of the migration path (if part of the database)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='productdb.Product')),
+            ],
+            options={
+                'verbose_name': 'product migration path',
+                'verbose_name_plural': 'product migration paths',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='productmigrationpath',
+            unique_together=set([('product', 'migration_source')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='productmigrationpath',
+            index_together=set([('product', 'is_preferred')]),
+        ),
+        migrations.RunPython(populate_product_migration_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.12 on 2017-03-10 21:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0028_productmigrationpath'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productmigrationoption',
+            name='replacement_product_id',
+            field=models.CharField(blank=True, db_index=True, help_text='the suggested replacement option', max_length=512),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.12 on 2017-03-12 17:24
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0029_auto_20170310_2105'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_sale_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End-of-Sale Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_support_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='Last Date of Support'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='eol_ext_announcement_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End-of-Life Announcement Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='eox_update_time_stamp',
+            field=models.DateField(blank=True, db_index=True, help_text='Indicates that the product has lifecycle data and when they were last updated. If no EoL announcement date is set, the product is considered as not EoL/EoS.', null=True, verbose_name='EoX lifecycle data timestamp'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='update_timestamp',
+            field=models.DateField(auto_created=True, db_index=True, default=django.utils.timezone.now, help_text='last changes to the product data', verbose_name='update timestamp'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.12 on 2017-03-14 19:42
+from __future__ import unicode_literals
+
+from django.contrib.postgres.operations import CreateExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    trigram indexes for the substring and regular expression search and a full-text index on the Product description
+    (used by the app.productdb.search module)
+    """
+
+    dependencies = [
+        ('productdb', '0030_auto_20170312_1724'),
+    ]
+
+    operations = [
+        CreateExtension("pg_trgm"),
+        migrations.RunSQL(
+            "CREATE INDEX productdb_product_product_id_trgm ON productdb_product "
+            "USING gin (product_id gin_trgm_ops);",
+            reverse_sql="DROP INDEX productdb_product_product_id_trgm;"
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX productdb_product_description_trgm ON productdb_product "
+            "USING gin (description gin_trgm_ops);",
+            reverse_sql="DROP INDEX productdb_product_description_trgm;"
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX productdb_product_tags_trgm ON productdb_product "
+            "USING gin (tags gin_trgm_ops);",
+            reverse_sql="DROP INDEX productdb_product_tags_trgm;"
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX productdb_product_description_fulltext ON productdb_product "
+            "USING gin (to_tsvector('english', description));",
+            reverse_sql="DROP INDEX productdb_product_description_fulltext;"
+        ),
+    ]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.12 on 2017-03-18 14:12
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0031_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_new_service_attachment_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End of New Service Attachment Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_routine_failure_analysis',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End of Routine Failure Analysis Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_sec_vuln_supp_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End of Vulnerability/Security Support date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_service_contract_renewal',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End of Service Contract Renewal Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='end_of_sw_maintenance_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='End of SW Maintenance Releases Date'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='list_price',
+            field=models.FloatField(blank=True, db_index=True, help_text='list price of the element', null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='list price'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    expression index for the case insensitive Product ID lookups (iexact and iexact_in, see app.productdb.search
+    module)
+    """
+
+    dependencies = [
+        ('productdb', '0032_auto_20170318_1412'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX productdb_product_product_id_upper ON productdb_product (UPPER(product_id::text));",
+            reverse_sql="DROP INDEX productdb_product_product_id_upper;"
+        ),
+    ]
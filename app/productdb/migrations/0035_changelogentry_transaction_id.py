@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.12 on 2017-03-26 19:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0034_changelogentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='transaction_id',
+            field=models.BigIntegerField(default=0, help_text='ID of the database transaction that has written the entry'),
+            preserve_default=False,
+        ),
+        migrations.AlterModelOptions(
+            name='changelogentry',
+            options={'ordering': ('transaction_id', 'id'), 'verbose_name': 'change log entry', 'verbose_name_plural': 'change log entries'},
+        ),
+        migrations.AlterIndexTogether(
+            name='changelogentry',
+            index_together=set([('transaction_id', 'id'), ('object_type', 'id')]),
+        ),
+    ]
@@ -1,5 +1,7 @@
 import hashlib
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
 from datetime import timedelta
 from django.contrib.auth.models import User
 from django.conf import settings
@@ -8,11 +10,12 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction, connection
+from django.db.models import Q, Case, When, Value
 from django.db.models.signals import pre_delete, post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils.timezone import datetime, now
+from cacheops import invalidate_model, no_invalidation
 from app.config.settings import AppSettings
 from app.productdb.validators import validate_product_list_string
 from app.productdb import utils
@@ -22,6 +25,27 @@ CURRENCY_CHOICES = (
     ('USD', 'US-Dollar'),
 )
 
+# state of the bulk operations on the Product data within the current thread
+_bulk_product_operation = threading.local()
+
+
+@contextmanager
+def bulk_product_operation():
+    """
+    the receivers that maintain the migration paths and the product data version are skipped for the Products and
+    Product Migration Options within the block, the bulk operation applies these changes once for all objects
+    """
+    _bulk_product_operation.active = True
+    try:
+        yield
+
+    finally:
+        _bulk_product_operation.active = False
+
+
+def in_bulk_product_operation():
+    return getattr(_bulk_product_operation, "active", False)
+
 
 class JobFile(models.Model):
     """Uploaded files for tasks"""
@@ -122,6 +146,90 @@ class ProductGroup(models.Model):
         unique_together = ("name", "vendor")
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_lifecycle_state(self, today=None):
+        """
+        annotate the lifecycle state of the Products (same logic as Product.current_lifecycle_states) using CASE
+        expressions against a single date (default is today):
+         * lifecycle_state - main lifecycle state (None if no lifecycle data are available)
+         * lifecycle_state_order - sortable value of the main lifecycle state
+         * a boolean value for every additional End of Sale state (see Product.END_OF_SALE_SUB_STATES)
+        """
+        today = today or datetime.now().date()
+        product = self.model
+
+        annotations = {
+            "lifecycle_state": Case(
+                When(
+                    eol_ext_announcement_date__isnull=True,
+                    eox_update_time_stamp__isnull=False,
+                    then=Value(product.NO_EOL_ANNOUNCEMENT_STR)
+                ),
+                When(eol_ext_announcement_date__isnull=True, then=Value(None)),
+                When(end_of_sale_date__lte=today, end_of_support_date__lte=today, then=Value(product.END_OF_SUPPORT_STR)),
+                When(end_of_sale_date__lte=today, then=Value(product.END_OF_SALE_STR)),
+                default=Value(product.EOS_ANNOUNCED_STR),
+                output_field=models.CharField()
+            ),
+            "lifecycle_state_order": Case(
+                When(eol_ext_announcement_date__isnull=True, eox_update_time_stamp__isnull=False, then=Value(1)),
+                When(eol_ext_announcement_date__isnull=True, then=Value(0)),
+                When(end_of_sale_date__lte=today, end_of_support_date__lte=today, then=Value(4)),
+                When(end_of_sale_date__lte=today, then=Value(3)),
+                default=Value(2),
+                output_field=models.IntegerField()
+            )
+        }
+        for annotation_name, field_name, _ in product.END_OF_SALE_SUB_STATES:
+            annotations[annotation_name] = Case(
+                When(**{"%s__lte" % field_name: today, "then": Value(True)}),
+                default=Value(False),
+                output_field=models.BooleanField()
+            )
+
+        return self.annotate(**annotations)
+
+    def lifecycle_state_filter(self, state, today=None):
+        """
+        returns a Q object that selects the Products in the given lifecycle state (same values and logic as in
+        Product.current_lifecycle_states), the conditions are based on the date columns and can use their indexes
+        """
+        today = today or datetime.now().date()
+        product = self.model
+        sub_states = {e[2]: e[1] for e in product.END_OF_SALE_SUB_STATES}
+        announced = Q(eol_ext_announcement_date__isnull=False)
+        end_of_sale = announced & Q(end_of_sale_date__lte=today)
+
+        if state == product.NO_EOL_ANNOUNCEMENT_STR:
+            return Q(eol_ext_announcement_date__isnull=True, eox_update_time_stamp__isnull=False)
+
+        elif state == product.EOS_ANNOUNCED_STR:
+            return announced & (Q(end_of_sale_date__isnull=True) | Q(end_of_sale_date__gt=today))
+
+        elif state == product.END_OF_SUPPORT_STR:
+            return end_of_sale & Q(end_of_support_date__lte=today)
+
+        elif state == product.END_OF_SALE_STR or state in sub_states:
+            result = end_of_sale & (Q(end_of_support_date__isnull=True) | Q(end_of_support_date__gt=today))
+            if state in sub_states:
+                result &= Q(**{"%s__lte" % sub_states[state]: today})
+
+            return result
+
+        raise ValueError("unknown lifecycle state: %s" % state)
+
+    def filter_lifecycle_state(self, *states, today=None):
+        """
+        filter the Products that are in one of the given lifecycle states (same values as in
+        Product.current_lifecycle_states)
+        """
+        q_filter = Q()
+        for state in states:
+            q_filter |= self.lifecycle_state_filter(state, today=today)
+
+        return self.filter(q_filter)
+
+
 class Product(models.Model):
     END_OF_SUPPORT_STR = "End of Support"
     END_OF_SALE_STR = "End of Sale"
@@ -133,6 +241,17 @@ class Product(models.Model):
     EOS_ANNOUNCED_STR = "EoS announced"
     NO_EOL_ANNOUNCEMENT_STR = "No EoL announcement"
 
+    # additional states within the End of Sale state (annotation name, date field, lifecycle state)
+    END_OF_SALE_SUB_STATES = (
+        ("lc_end_of_new_service_attachment", "end_of_new_service_attachment_date", END_OF_NEW_SERVICE_ATTACHMENT_STR),
+        ("lc_end_of_sw_maintenance", "end_of_sw_maintenance_date", END_OF_SW_MAINTENANCE_RELEASES_STR),
+        ("lc_end_of_routine_failure_analysis", "end_of_routine_failure_analysis", END_OF_ROUTINE_FAILURE_ANALYSIS_STR),
+        ("lc_end_of_service_contract_renewal", "end_of_service_contract_renewal", END_OF_SERVICE_CONTRACT_RENEWAL_STR),
+        ("lc_end_of_sec_vuln_supp", "end_of_sec_vuln_supp_date", END_OF_VUL_SUPPORT_STR),
+    )
+
+    objects = ProductQuerySet.as_manager()
+
     # preference greater than the following constant is considered preferred
     LESS_PREFERRED_PREFERENCE_VALUE = 25
 
@@ -152,6 +271,7 @@ class Product(models.Model):
     list_price = models.FloatField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="list price",
         help_text="list price of the element",
         validators=[MinValueValidator(0)]
@@ -185,6 +305,7 @@ class Product(models.Model):
     eox_update_time_stamp = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="EoX lifecycle data timestamp",
         help_text="Indicates that the product has lifecycle data and when they were last updated. If no "
                   "EoL announcement date is set, the product is considered as not EoL/EoS."
@@ -193,48 +314,56 @@ class Product(models.Model):
     eol_ext_announcement_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End-of-Life Announcement Date"
     )
 
     end_of_sale_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End-of-Sale Date"
     )
 
     end_of_new_service_attachment_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End of New Service Attachment Date"
     )
 
     end_of_sw_maintenance_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End of SW Maintenance Releases Date"
     )
 
     end_of_routine_failure_analysis = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End of Routine Failure Analysis Date"
     )
 
     end_of_service_contract_renewal = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End of Service Contract Renewal Date"
     )
 
     end_of_support_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="Last Date of Support",
     )
 
     end_of_sec_vuln_supp_date = models.DateField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name="End of Vulnerability/Security Support date"
     )
 
@@ -281,7 +410,8 @@ class Product(models.Model):
         verbose_name="update timestamp",
         help_text="last changes to the product data",
         auto_created=True,
-        default=now
+        default=now,
+        db_index=True
     )
 
     list_price_timestamp = models.DateField(
@@ -301,22 +431,23 @@ class Product(models.Model):
             # check the current state
             result = []
             today = datetime.now().date()
+            future_date = today + timedelta(days=7)
 
             # if not defined, use a date in the future
             end_of_sale_date = self.end_of_sale_date \
-                if self.end_of_sale_date else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_sale_date else future_date
             end_of_support_date = self.end_of_support_date \
-                if self.end_of_support_date else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_support_date else future_date
             end_of_new_service_attachment_date = self.end_of_new_service_attachment_date \
-                if self.end_of_new_service_attachment_date else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_new_service_attachment_date else future_date
             end_of_sw_maintenance_date = self.end_of_sw_maintenance_date \
-                if self.end_of_sw_maintenance_date else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_sw_maintenance_date else future_date
             end_of_routine_failure_analysis = self.end_of_routine_failure_analysis \
-                if self.end_of_routine_failure_analysis else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_routine_failure_analysis else future_date
             end_of_service_contract_renewal = self.end_of_service_contract_renewal \
-                if self.end_of_service_contract_renewal else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_service_contract_renewal else future_date
             end_of_sec_vuln_supp_date = self.end_of_sec_vuln_supp_date \
-                if self.end_of_sec_vuln_supp_date else (datetime.now() + timedelta(days=7)).date()
+                if self.end_of_sec_vuln_supp_date else future_date
 
             if today >= end_of_sale_date:
                 if today >= end_of_support_date:
@@ -352,15 +483,42 @@ class Product(models.Model):
             else:
                 return None
 
+    @classmethod
+    def get_annotated_lifecycle_states(cls, values):
+        """
+        returns the lifecycle states (same result as current_lifecycle_states) from a Product object or a dictionary
+        with the annotations of ProductQuerySet.with_lifecycle_state
+        """
+        get_value = values.get if isinstance(values, dict) else lambda key: getattr(values, key, None)
+        lifecycle_state = get_value("lifecycle_state")
+        if lifecycle_state is None:
+            return None
+
+        result = [lifecycle_state]
+        if lifecycle_state == cls.END_OF_SALE_STR:
+            result += [e[2] for e in cls.END_OF_SALE_SUB_STATES if get_value(e[0])]
+
+        return result
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__loaded_list_price = self.list_price
         self.__loaded_lc_state_sync = self.lc_state_sync
+        self.__loaded_vendor_id = self.vendor_id
 
     def __str__(self):
         return self.product_id
 
-    def save(self, *args, **kwargs):
+    @property
+    def loaded_vendor_id(self):
+        """Vendor ID of the Product when it was loaded from the database"""
+        return self.__loaded_vendor_id
+
+    def prepare_save(self):
+        """
+        normalize the values and update the timestamps before the Product is saved (also used by the bulk operations,
+        that don't call the save method)
+        """
         # strip URL value
         if self.eol_reference_url is not None:
             self.eol_reference_url = self.eol_reference_url.strip()
@@ -374,6 +532,9 @@ class Product(models.Model):
             # state sync not changed, update of the update timestamp
             self.update_timestamp = datetime.today()
 
+    def save(self, *args, **kwargs):
+        self.prepare_save()
+
         # clean the object before save
         self.full_clean()
         super(Product, self).save(*args, **kwargs)
@@ -401,55 +562,29 @@ class Product(models.Model):
 
     def get_preferred_replacement_option(self):
         """Return the preferred replacement option (Product Migration Sources with a preference greater than 25)"""
-        if self.has_migration_options() and self.has_preferred_migration_option():
-            return self.get_migration_path(self.productmigrationoption_set.filter(
-                migration_source__preference__gt=self.LESS_PREFERRED_PREFERENCE_VALUE
-            ).first().migration_source.name)[-1]
-        return None
+        migration_path = self.migration_paths.filter(is_preferred=True).select_related(
+            "replacement_option__migration_source",
+            "replacement_option__replacement_db_product"
+        ).first()
+
+        return migration_path.replacement_option if migration_path else None
 
     def get_migration_path(self, migration_source_name=None):
         """
-        recursive lookup of the given migration source name, result is an ordered list, the first element
-        is the direct replacement and the last one is the valid replacement
+        lookup of the materialized migration path for the given migration source name, result is an ordered list,
+        the first element is the direct replacement and the last one is the valid replacement
         """
-        if not migration_source_name:
-            if not self.productmigrationoption_set.all().exists():
-                return []
-
-            else:
-                # use the preferred path (except all Migration sources with a preference of 25 and lower)
-                migration_source_name = self.productmigrationoption_set.filter(
-                    migration_source__preference__gt=self.LESS_PREFERRED_PREFERENCE_VALUE
-                ).first().migration_source.name
-
-        if type(migration_source_name) is not str:
+        if migration_source_name and type(migration_source_name) is not str:
             raise AttributeError("attribute 'migration_source_name' must be a string")
 
-        result = []
-        if self.productmigrationoption_set.filter(migration_source__name=migration_source_name).exists():
-            result.append(self.productmigrationoption_set.filter(migration_source__name=migration_source_name).first())
-
-            while True:
-                # test, that the product migration option is valid and that a replacement_product_id exists
-                if not result[-1].is_valid_replacement() and result[-1].replacement_product_id:
-                    # test if it is in the database
-                    if result[-1].is_replacement_in_db():
-                        # get replacement product ID from database
-                        p = Product.objects.get(product_id=result[-1].replacement_product_id)
-                        if p.productmigrationoption_set.filter(migration_source__name=migration_source_name).exists():
-                            result.append(
-                                p.productmigrationoption_set.filter(
-                                    migration_source__name=migration_source_name
-                                )[:1].first()
-                            )
-                        else:
-                            break
-                    else:
-                        break
-                else:
-                    break
+        if migration_source_name:
+            migration_path = self.migration_paths.filter(migration_source__name=migration_source_name).first()
 
-        return result
+        else:
+            # use the preferred path (except all Migration sources with a preference of 25 and lower)
+            migration_path = self.migration_paths.filter(is_preferred=True).first()
+
+        return migration_path.get_migration_options() if migration_path else []
 
     def get_product_migration_source_names_set(self):
         return list(self.productmigrationoption_set.all().values_list("migration_source__name", flat=True))
@@ -483,10 +618,21 @@ class ProductMigrationSource(models.Model):
         default=50
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__loaded_preference = self.preference
+
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         self.full_clean()
         super().save(force_insert, force_update, using, update_fields)
 
+        if self.__loaded_preference != self.preference:
+            # the preferred migration path of all Products with an option from this source may change
+            ProductMigrationPath.objects.update_preferred_flags(
+                self.productmigrationoption_set.values_list("product_id", flat=True)
+            )
+            self.__loaded_preference = self.preference
+
     def __str__(self):
         return self.name
 
@@ -496,7 +642,56 @@ class ProductMigrationSource(models.Model):
         ordering = ["-preference", "name"]  # sort descending, that the most preferred source is always on op
 
 
+class ProductMigrationOptionManager(models.Manager):
+    def update_replacement_db_products(self, products=None):
+        """
+        link the Product Migration Options with the database Products of their replacement Product ID using a single
+        UPDATE statement (only the options that refer to the given Products, all options if no Products are given), an
+        option is never linked with its own Product (see update_product_migration_replacement_id_relation_field)
+
+        :param products: list of Product objects
+        :return: set with the database IDs of the Products that have a changed Product Migration Option
+        """
+        sql = """
+            UPDATE {pmo_table} SET replacement_db_product_id = (
+                SELECT {product_table}.id FROM {product_table}
+                WHERE {product_table}.product_id = {pmo_table}.replacement_product_id
+                AND {product_table}.id <> {pmo_table}.product_id
+            )
+            WHERE replacement_db_product_id IS DISTINCT FROM (
+                SELECT {product_table}.id FROM {product_table}
+                WHERE {product_table}.product_id = {pmo_table}.replacement_product_id
+                AND {product_table}.id <> {pmo_table}.product_id
+            )
+        """.format(pmo_table=self.model._meta.db_table, product_table=Product._meta.db_table)
+        params = []
+
+        if products is not None:
+            products = list(products)
+            if not products:
+                return set()
+
+            # include the options that are linked to the Products, the Product ID may have changed
+            sql += " AND (replacement_product_id IN %s OR replacement_db_product_id IN %s)"
+            params = [tuple({p.product_id for p in products}), tuple({p.pk for p in products})]
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql + " RETURNING id, product_id", params)
+                rows = cursor.fetchall()
+
+            # the options are changed without a save signal
+            ChangeLogEntry.objects.log_changes(self.model, [row[0] for row in rows], ChangeLogEntry.ACTION_UPDATED)
+
+        if rows:
+            invalidate_model(self.model)
+
+        return {row[1] for row in rows}
+
+
 class ProductMigrationOption(models.Model):
+    objects = ProductMigrationOptionManager()
+
     product = models.ForeignKey(Product)
     migration_source = models.ForeignKey(ProductMigrationSource)
 
@@ -504,7 +699,8 @@ class ProductMigrationOption(models.Model):
         max_length=512,
         help_text="the suggested replacement option",
         null=False,
-        blank=True
+        blank=True,
+        db_index=True
     )
     replacement_db_product = models.ForeignKey(
         Product,
@@ -578,6 +774,217 @@ class ProductMigrationOption(models.Model):
         verbose_name_plural = "product migration options"
 
 
+class ProductMigrationPathManager(models.Manager):
+    def _build_paths(self, migration_paths):
+        """create (unsaved) migration path objects for the given resolved migration paths"""
+        result = []
+        for path in migration_paths:
+            result.append(ProductMigrationPath(
+                product_id=path[0].product_id,
+                migration_source_id=path[0].migration_source_id,
+                path=",".join([str(e.id) for e in path]),
+                replacement_option=path[-1],
+                valid_replacement_product=path[-1].get_valid_replacement_product()
+            ))
+
+        return result
+
+    def refresh(self, products, migration_source_ids=None):
+        """
+        recompute the materialized migration paths of the given Products and of all Products, that are replaced by
+        them (directly or within a migration path)
+
+        :param products: list of Product objects (objects that are deleted are allowed)
+        :param migration_source_ids: if set, only the paths of these Product Migration Sources are updated
+        """
+        affected_products = {p.pk: p.product_id for p in products}
+        unresolved_product_ids = set(affected_products.values())
+
+        # collect all Products with a migration path that contains one of the given Products
+        while unresolved_product_ids:
+            query = ProductMigrationOption.objects.filter(replacement_product_id__in=unresolved_product_ids)
+            if migration_source_ids is not None:
+                query = query.filter(migration_source_id__in=migration_source_ids)
+
+            unresolved_product_ids = set()
+            for product_pk, product_id in query.values_list("product_id", "product__product_id"):
+                if product_pk not in affected_products:
+                    affected_products[product_pk] = product_id
+                    unresolved_product_ids.add(product_id)
+
+        query = ProductMigrationOption.objects.filter(product_id__in=affected_products.keys())
+        current_paths = self.filter(product_id__in=affected_products.keys())
+        if migration_source_ids is not None:
+            query = query.filter(migration_source_id__in=migration_source_ids)
+            current_paths = current_paths.filter(migration_source_id__in=migration_source_ids)
+
+        from app.productdb.migration_graph import MigrationGraph
+        product_migration_options = list(query.select_related("replacement_db_product"))
+        migration_graph = MigrationGraph(product_migration_options=product_migration_options, lazy=True)
+        new_paths = self._build_paths([migration_graph.resolve(e) for e in product_migration_options])
+
+        with transaction.atomic():
+            current_paths.delete()
+            self.bulk_create(new_paths)
+            self.update_preferred_flags(affected_products.keys())
+
+    def rebuild(self):
+        """recompute all materialized migration paths"""
+        from app.productdb.migration_graph import MigrationGraph
+        new_paths = self._build_paths(MigrationGraph().resolve_all().values())
+
+        with transaction.atomic(), no_invalidation:
+            self.all().delete()
+            self.bulk_create(new_paths, batch_size=1000)
+            self.update_preferred_flags()
+
+        invalidate_model(ProductMigrationPath)
+
+    def _get_migration_options(self, migration_paths):
+        """
+        returns the ordered lists of Product Migration Options for the given migration paths (single query)
+        """
+        option_ids = set()
+        for migration_path in migration_paths:
+            option_ids.update(migration_path.path_option_ids)
+
+        options = ProductMigrationOption.objects.select_related("replacement_db_product").in_bulk(option_ids)
+
+        return [[options[e] for e in mp.path_option_ids if e in options] for mp in migration_paths]
+
+    def get_product_migration_paths(self, product):
+        """
+        returns an ordered dictionary with the migration paths of the given Product as key and the ordered list of the
+        Product Migration Options within the path as value (preferred path first), requires two queries
+        """
+        migration_paths = list(self.filter(product=product).select_related("migration_source").order_by(
+            "-is_preferred",
+            "-migration_source__preference",
+            "migration_source__name"
+        ))
+
+        return OrderedDict(zip(migration_paths, self._get_migration_options(migration_paths)))
+
+    def get_migration_paths(self, products, migration_source_name=None):
+        """
+        returns a dictionary with the database ID of the given Products as key and a tuple with the migration path and
+        the ordered list of Product Migration Options within the path as value (requires two queries)
+
+        :param products: list of Product objects or database IDs
+        :param migration_source_name: name of the Product Migration Source, if not set the preferred path is used
+        """
+        query = self.filter(product__in=products).select_related("migration_source")
+        if migration_source_name:
+            query = query.filter(migration_source__name=migration_source_name)
+
+        else:
+            query = query.filter(is_preferred=True)
+
+        migration_paths = list(query)
+
+        return {
+            mp.product_id: (mp, options)
+            for mp, options in zip(migration_paths, self._get_migration_options(migration_paths))
+        }
+
+    def update_preferred_flags(self, product_ids=None):
+        """
+        mark the migration path with the most preferred Product Migration Source (preference greater than 25) of the
+        given Products as preferred (all Products if no product_ids are given)
+        """
+        query = self.all() if product_ids is None else self.filter(product_id__in=set(product_ids))
+        current_paths = list(query.values_list(
+            "id", "product_id", "is_preferred", "migration_source__preference", "migration_source__name"
+        ))
+
+        preferred_paths = {}
+        for path_id, product_id, _, preference, name in current_paths:
+            if preference > Product.LESS_PREFERRED_PREFERENCE_VALUE:
+                if product_id not in preferred_paths or (-preference, name) < preferred_paths[product_id][0]:
+                    preferred_paths[product_id] = ((-preference, name), path_id)
+
+        preferred_path_ids = {e[1] for e in preferred_paths.values()}
+        set_preferred = [e[0] for e in current_paths if not e[2] and e[0] in preferred_path_ids]
+        unset_preferred = [e[0] for e in current_paths if e[2] and e[0] not in preferred_path_ids]
+
+        if set_preferred:
+            self.filter(id__in=set_preferred).invalidated_update(is_preferred=True)
+
+        if unset_preferred:
+            self.filter(id__in=unset_preferred).invalidated_update(is_preferred=False)
+
+
+class ProductMigrationPath(models.Model):
+    """
+    materialized migration path of a Product for a specific Product Migration Source (maintained automatically if a
+    Product, a Product Migration Source or a Product Migration Option changes)
+    """
+    objects = ProductMigrationPathManager()
+
+    product = models.ForeignKey(
+        Product,
+        related_name="migration_paths",
+        on_delete=models.CASCADE
+    )
+
+    migration_source = models.ForeignKey(
+        ProductMigrationSource,
+        on_delete=models.CASCADE
+    )
+
+    path = models.TextField(
+        help_text="ordered, comma separated list of the Product Migration Option IDs within the migration path",
+        blank=True,
+        default=""
+    )
+
+    replacement_option = models.ForeignKey(
+        ProductMigrationOption,
+        help_text="last Product Migration Option of the migration path",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+"
+    )
+
+    valid_replacement_product = models.ForeignKey(
+        Product,
+        help_text="valid replacement Product at the end of the migration path (if part of the database)",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+"
+    )
+
+    is_preferred = models.BooleanField(
+        help_text="migration path of the most preferred Migration Source of the Product",
+        default=False
+    )
+
+    @property
+    def path_option_ids(self):
+        return [int(e) for e in self.path.split(",") if e]
+
+    def get_migration_options(self):
+        """returns the ordered list of Product Migration Options within the migration path"""
+        path_option_ids = self.path_option_ids
+        options = ProductMigrationOption.objects.select_related(
+            "migration_source",
+            "replacement_db_product"
+        ).in_bulk(path_option_ids)
+
+        return [options[e] for e in path_option_ids if e in options]
+
+    def __str__(self):
+        return "migration path for %s" % self.product_id
+
+    class Meta:
+        unique_together = ["product", "migration_source"]
+        index_together = ["product", "is_preferred"]
+        verbose_name = "product migration path"
+        verbose_name_plural = "product migration paths"
+
+
 class ProductList(models.Model):
     name = models.CharField(
         max_length=2048,
@@ -922,6 +1329,107 @@ class ProductCheckEntry(models.Model):
         return "<Class 'ProductCheckEntry' %d> %s (ProductCheck '%d')" % (self.id, self.input_product_id, self.product_check_id)
 
 
+class ChangeLogEntryManager(models.Manager):
+    def log_changes(self, model, object_ids, action):
+        """
+        write a change log entry for every object ID (single INSERT statement), the entries contain the ID of the
+        writing transaction (see get_feed)
+
+        :param model: model class of the changed objects
+        :param object_ids: IDs of the changed objects
+        :param action: ChangeLogEntry.ACTION_CREATED, ChangeLogEntry.ACTION_UPDATED or ChangeLogEntry.ACTION_DELETED
+        """
+        entries = [self.model(object_type=model._meta.model_name, object_id=e, action=action) for e in object_ids]
+        if not entries:
+            return
+
+        # the transaction ID must be the ID of the transaction that writes the entries
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT txid_current()")
+                transaction_id = cursor.fetchone()[0]
+
+            for entry in entries:
+                entry.transaction_id = transaction_id
+
+            self.bulk_create(entries, batch_size=1000)
+
+    def get_feed(self):
+        """
+        returns the change log entries in the order of the change feed (transaction ID, ID). The IDs of concurrent
+        writers are not committed in their order, therefore only the entries of finished transactions (older than the
+        oldest running transaction of the database) and of the current transaction are part of the feed. A client
+        that continues after the last processed entry cannot skip an entry that is committed later. The writers are not
+        serialized, but a long running transaction delays the feed until it is finished.
+        """
+        return self.extra(where=[
+            "transaction_id < txid_snapshot_xmin(txid_current_snapshot()) OR transaction_id = txid_current()"
+        ]).order_by("transaction_id", "id")
+
+
+class ChangeLogEntry(models.Model):
+    """
+    persistent log of the changes on the Products, Product Groups, Product Lists and Product Migration Options (change
+    feed of the REST API), the entries are ordered by the ID of the writing transaction and their ID and deleted
+    objects are logged with the deleted action (tombstone). The entries are written by the receivers of this module
+    and by the productdb.bulk module.
+    """
+    ACTION_CREATED = "created"
+    ACTION_UPDATED = "updated"
+    ACTION_DELETED = "deleted"
+
+    ACTION_CHOICES = (
+        (ACTION_CREATED, "created"),
+        (ACTION_UPDATED, "updated"),
+        (ACTION_DELETED, "deleted"),
+    )
+
+    OBJECT_TYPE_CHOICES = (
+        ("product", "Product"),
+        ("productgroup", "Product Group"),
+        ("productlist", "Product List"),
+        ("productmigrationoption", "Product Migration Option"),
+    )
+
+    # entries that are older than the retention period are removed (see productdb.delete_old_change_log_entries task)
+    RETENTION_DAYS = 365
+
+    objects = ChangeLogEntryManager()
+
+    object_type = models.CharField(
+        max_length=32,
+        choices=OBJECT_TYPE_CHOICES
+    )
+
+    object_id = models.IntegerField()
+
+    transaction_id = models.BigIntegerField(
+        help_text="ID of the database transaction that has written the entry"
+    )
+
+    action = models.CharField(
+        max_length=16,
+        choices=ACTION_CHOICES
+    )
+
+    timestamp = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True
+    )
+
+    def __str__(self):
+        return "%s %d %s" % (self.object_type, self.object_id, self.action)
+
+    class Meta:
+        verbose_name = "change log entry"
+        verbose_name_plural = "change log entries"
+        ordering = ("transaction_id", "id")
+        index_together = [
+            ("object_type", "id"),
+            ("transaction_id", "id"),
+        ]
+
+
 @receiver(post_save, sender=User)
 def create_user_profile_if_not_exist(sender, instance, **kwargs):
     if not UserProfile.objects.filter(user=instance).exists():
@@ -939,18 +1447,65 @@ def invalidate_page_cache(sender, instance, **kwargs):
         cache.delete(key)
 
 
+@receiver([post_save, post_delete], sender=ProductList)
+def invalidate_product_list_data_version(sender, instance, **kwargs):
+    transaction.on_commit(lambda: utils.increment_data_version(utils.PRODUCT_LIST_DATA_VERSION_CACHE_KEY))
+
+
 @receiver(post_save, sender=Product)
 def update_db_state_for_the_migration_options_with_product_id(sender, instance, **kwargs):
-    """save all Product Migration Options where the replacement product ID is the same as the Product ID that was
-    saved to update the replacement_in_db flag"""
-    for pmo in ProductMigrationOption.objects.filter(replacement_product_id=instance.product_id):
-        pmo.save()
+    """link all Product Migration Options where the replacement product ID is the same as the Product ID that was
+    saved (single UPDATE statement) and update the migration paths that contain the Product"""
+    if in_bulk_product_operation():
+        return
+
+    changed_product_ids = ProductMigrationOption.objects.update_replacement_db_products([instance])
+
+    is_replacement = ProductMigrationOption.objects.filter(replacement_product_id=instance.product_id).exists()
+
+    if changed_product_ids or is_replacement:
+        ProductMigrationPath.objects.refresh([instance] + list(Product.objects.filter(id__in=changed_product_ids)))
+
+
+@receiver(post_delete, sender=Product)
+def update_migration_paths_for_deleted_product(sender, instance, **kwargs):
+    """update the migration paths of all Products that were replaced by the deleted Product"""
+    if in_bulk_product_operation():
+        return
+
+    ProductMigrationPath.objects.refresh([instance])
+
+
+@receiver([post_save, post_delete], sender=ProductMigrationOption)
+def update_migration_paths_for_product_migration_option(sender, instance, **kwargs):
+    """update the migration paths that are affected by the Product Migration Option"""
+    if in_bulk_product_operation():
+        return
+
+    ProductMigrationPath.objects.refresh([instance.product], migration_source_ids=[instance.migration_source_id])
 
 
 @receiver([post_save, post_delete], sender=Product)
 def invalidate_product_related_cache_values(sender, instance, **kwargs):
-    """delete cache values that are somehow related to the Product data model"""
-    cache.delete("PDB_HOMEPAGE_CONTEXT")
+    """invalidate cache values that are somehow related to the Product data model (the homepage context is refreshed
+    in the background, see productdb.update_homepage_context task)"""
+    if in_bulk_product_operation():
+        return
+
+    utils.increment_product_data_version_on_commit({instance.vendor_id, instance.loaded_vendor_id})
+
+
+@receiver([post_save, post_delete], sender=ProductGroup)
+def invalidate_product_group_data_version(sender, instance, **kwargs):
+    """Product Groups are part of the product data (e.g. within the lifecycle timeline report)"""
+    utils.increment_product_data_version_on_commit([instance.vendor_id])
+
+
+@receiver([post_save, post_delete], sender=Vendor)
+def invalidate_product_data_version(sender, instance, **kwargs):
+    """Vendors are part of the product data (e.g. within the lifecycle timeline report), the Products of a deleted
+    Vendor are moved to the default Vendor"""
+    utils.increment_product_data_version_on_commit([instance.id, Product._meta.get_field("vendor").default])
 
 
 @receiver(pre_save, sender=ProductMigrationOption)
@@ -974,3 +1529,64 @@ def update_product_migration_replacement_id_relation_field(sender, instance, **k
 
     except Exception:
         instance.replacement_db_product = None
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductGroup)
+@receiver(post_save, sender=ProductList)
+@receiver(post_save, sender=ProductMigrationOption)
+def write_change_log_entry_for_saved_object(sender, instance, created, **kwargs):
+    """the bulk operations write the change log entries once for all Products (see productdb.bulk module)"""
+    if sender in (Product, ProductMigrationOption) and in_bulk_product_operation():
+        return
+
+    action = ChangeLogEntry.ACTION_CREATED if created else ChangeLogEntry.ACTION_UPDATED
+    ChangeLogEntry.objects.log_changes(sender, [instance.id], action)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductGroup)
+@receiver(post_delete, sender=ProductList)
+@receiver(post_delete, sender=ProductMigrationOption)
+def write_change_log_entry_for_deleted_object(sender, instance, **kwargs):
+    """the bulk operations write the change log entries once for all Products (see productdb.bulk module)"""
+    if sender in (Product, ProductMigrationOption) and in_bulk_product_operation():
+        return
+
+    ChangeLogEntry.objects.log_changes(sender, [instance.id], ChangeLogEntry.ACTION_DELETED)
+
+
+@receiver(pre_delete, sender=ProductGroup)
+def write_change_log_entries_for_products_of_deleted_product_group(sender, instance, **kwargs):
+    """the Product Group of the associated Products is removed without a save signal"""
+    ChangeLogEntry.objects.log_changes(
+        Product,
+        Product.objects.filter(product_group=instance).values_list("id", flat=True),
+        ChangeLogEntry.ACTION_UPDATED
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def write_change_log_entries_for_migration_options_of_deleted_product(sender, instance, **kwargs):
+    """the replacement database Product of the Product Migration Options is removed without a save signal"""
+    if in_bulk_product_operation():
+        return
+
+    ChangeLogEntry.objects.log_changes(
+        ProductMigrationOption,
+        ProductMigrationOption.objects.filter(replacement_db_product=instance).exclude(
+            product=instance
+        ).values_list("id", flat=True),
+        ChangeLogEntry.ACTION_UPDATED
+    )
+
+
+@receiver(pre_delete, sender=Vendor)
+def write_change_log_entries_for_objects_of_deleted_vendor(sender, instance, **kwargs):
+    """the Products and Product Groups of a deleted Vendor are moved to the default Vendor without a save signal"""
+    for model in (Product, ProductGroup):
+        ChangeLogEntry.objects.log_changes(
+            model,
+            model.objects.filter(vendor=instance).values_list("id", flat=True),
+            ChangeLogEntry.ACTION_UPDATED
+        )
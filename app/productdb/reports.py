@@ -0,0 +1,216 @@
+"""
+aggregated reports that are computed from the product data
+"""
+from collections import OrderedDict
+from django.db import connection, models
+from django.db.models import Q, Case, When, Count
+from django.utils.timezone import timedelta, datetime, get_current_timezone
+from app.config.models import NotificationMessage
+from app.productdb.models import Product, ProductGroup, Vendor
+from app.productdb import utils
+from django_project import cache as protected_cache
+
+HOMEPAGE_CONTEXT_CACHE_KEY = "PDB_HOMEPAGE_CONTEXT"
+HOMEPAGE_CONTEXT_CACHE_TIMEOUT = 60 * 60
+# the periodic refresh recomputes the values before they become stale on the request path
+HOMEPAGE_CONTEXT_REFRESH_MARGIN = 60 * 5
+
+LIFECYCLE_TIMELINE_CACHE_KEY = "PDB_LIFECYCLE_TIMELINE_%d_%s_%d"
+LIFECYCLE_TIMELINE_CACHE_TIMEOUT = 60 * 60 * 24
+LIFECYCLE_TIMELINE_DEFAULT_MONTHS = 36
+LIFECYCLE_TIMELINE_MAX_MONTHS = 120
+
+# milestones within the lifecycle timeline report (key: date field of the Product)
+LIFECYCLE_TIMELINE_MILESTONES = OrderedDict([
+    ("eos", ("end_of_sale_date", Product.END_OF_SALE_STR)),
+    ("ldos", ("end_of_support_date", Product.END_OF_SUPPORT_STR)),
+])
+
+
+def add_months(date, months):
+    """returns the first day of the month that is the given amount of months after the given date"""
+    month = date.month - 1 + months
+    return date.replace(year=date.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def _compute_lifecycle_timeline(start_date, months):
+    end_date = add_months(start_date, months)
+    month_index = OrderedDict([(add_months(start_date, i), i) for i in range(months)])
+
+    # every milestone is a separate range query on the (indexed) date column, the results are counted with a single
+    # grouped aggregate
+    subqueries = []
+    params = []
+    for milestone, (field_name, _) in LIFECYCLE_TIMELINE_MILESTONES.items():
+        column = connection.ops.quote_name(Product._meta.get_field(field_name).column)
+        subqueries.append(
+            "SELECT vendor_id, product_group_id, %%s AS milestone, date_trunc('month', %(column)s)::date AS month "
+            "FROM %(product_table)s WHERE %(column)s >= %%s AND %(column)s < %%s" % {
+                "column": column,
+                "product_table": connection.ops.quote_name(Product._meta.db_table)
+            }
+        )
+        params += [milestone, start_date, end_date]
+
+    query = """
+        SELECT v.id, v.name, g.id, g.name, t.milestone, t.month, COUNT(*)
+        FROM (%(subqueries)s) t
+        INNER JOIN %(vendor_table)s v ON v.id = t.vendor_id
+        LEFT OUTER JOIN %(product_group_table)s g ON g.id = t.product_group_id
+        GROUP BY v.id, v.name, g.id, g.name, t.milestone, t.month
+    """ % {
+        "subqueries": " UNION ALL ".join(subqueries),
+        "vendor_table": connection.ops.quote_name(Vendor._meta.db_table),
+        "product_group_table": connection.ops.quote_name(ProductGroup._meta.db_table),
+    }
+
+    rows = OrderedDict()
+    totals = OrderedDict([(milestone, [0] * months) for milestone in LIFECYCLE_TIMELINE_MILESTONES.keys()])
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        result = sorted(cursor.fetchall(), key=lambda e: (e[1], e[0], e[3] is None, e[3] or "", e[2] or 0))
+
+    for vendor_id, vendor_name, group_id, group_name, milestone, month, count in result:
+        row = rows.get((vendor_id, group_id))
+        if row is None:
+            row = OrderedDict([
+                ("vendor", vendor_name),
+                ("vendor_id", vendor_id),
+                ("product_group", group_name),
+                ("product_group_id", group_id),
+            ])
+            for key in LIFECYCLE_TIMELINE_MILESTONES.keys():
+                row[key] = [0] * months
+            rows[(vendor_id, group_id)] = row
+
+        row[milestone][month_index[month]] += count
+        totals[milestone][month_index[month]] += count
+
+    return {
+        "months": [e.strftime("%Y-%m") for e in month_index.keys()],
+        "milestones": OrderedDict([(key, value[1]) for key, value in LIFECYCLE_TIMELINE_MILESTONES.items()]),
+        "totals": totals,
+        "data": list(rows.values()),
+    }
+
+
+def get_lifecycle_timeline(months=LIFECYCLE_TIMELINE_DEFAULT_MONTHS, today=None):
+    """
+    returns the amount of Products that reach the End of Sale and the Last Date of Support per month, starting with
+    the current month, grouped by Vendor and Product Group. The result is cached until the product data changes.
+
+    :param months: number of months within the report
+    :param today: reference date (default is the current date)
+    :return: dictionary with the months, the milestones, the totals per milestone and the data per Vendor and Product
+             Group (list with a count per month for every milestone)
+    """
+    if not 0 < months <= LIFECYCLE_TIMELINE_MAX_MONTHS:
+        raise ValueError("months must be between 1 and %d" % LIFECYCLE_TIMELINE_MAX_MONTHS)
+
+    if today is None:
+        today = datetime.now().date()
+
+    start_date = today.replace(day=1)
+    cache_key = LIFECYCLE_TIMELINE_CACHE_KEY % (utils.get_product_data_version(), start_date.isoformat(), months)
+
+    return protected_cache.get_or_compute(
+        cache_key,
+        lambda: _compute_lifecycle_timeline(start_date, months),
+        timeout=LIFECYCLE_TIMELINE_CACHE_TIMEOUT
+    )
+
+
+def _count_if(*args, **kwargs):
+    """conditional count of all Products that match the given filter"""
+    return Count(Case(When(*args, then=1, **kwargs), output_field=models.IntegerField()))
+
+
+def get_product_statistics(today=None):
+    """
+    returns the counters of the Products within the database (computed with a single conditional aggregate query)
+
+    :param today: reference date (default is the current date)
+    """
+    if today is None:
+        today = datetime.now().date()
+
+    return Product.objects.aggregate(
+        product_count=Count("id"),
+        product_lifecycle_count=_count_if(eox_update_time_stamp__isnull=False),
+        product_no_eol_announcement_count=_count_if(
+            eox_update_time_stamp__isnull=False,
+            eol_ext_announcement_date__isnull=True
+        ),
+        product_eol_announcement_count=_count_if(
+            eol_ext_announcement_date__isnull=False,
+            end_of_sale_date__gt=today
+        ),
+        product_eos_count=_count_if(
+            Q(end_of_sale_date__lte=today, end_of_support_date__gt=today) |
+            Q(end_of_sale_date__lte=today, end_of_support_date__isnull=True)
+        ),
+        product_eol_count=_count_if(end_of_support_date__lte=today),
+        product_price_count=_count_if(list_price__isnull=False),
+    )
+
+
+def _compute_homepage_context():
+    # read the versions first, changes during the computation are picked up by the next update
+    product_data_version = utils.get_product_data_version()
+    notification_data_version = utils.get_data_version(utils.NOTIFICATION_MESSAGE_DATA_VERSION_CACHE_KEY)
+
+    context = {
+        "recent_events": list(NotificationMessage.objects.filter(
+            created__gte=datetime.now(get_current_timezone()) - timedelta(days=30)
+        ).order_by('-created')[:5]),
+        "vendors": [x.name for x in Vendor.objects.all() if x.name != "unassigned"],
+        "product_data_version": product_data_version,
+        "notification_data_version": notification_data_version,
+    }
+    context.update(get_product_statistics())
+
+    return context
+
+
+def update_homepage_context():
+    """
+    compute the values of the homepage and store them in the cache
+    """
+    context = _compute_homepage_context()
+    protected_cache.set_value(HOMEPAGE_CONTEXT_CACHE_KEY, context, timeout=HOMEPAGE_CONTEXT_CACHE_TIMEOUT)
+
+    return context
+
+
+def get_homepage_context():
+    """
+    returns the cached values of the homepage, they are only computed on the request if the cache is empty or
+    expired (by a single worker, see django_project.cache)
+    """
+    return protected_cache.get_or_compute(
+        HOMEPAGE_CONTEXT_CACHE_KEY,
+        _compute_homepage_context,
+        timeout=HOMEPAGE_CONTEXT_CACHE_TIMEOUT
+    )
+
+
+def refresh_homepage_context():
+    """
+    recompute the values of the homepage if the product data or the Notification Messages have changed since the last
+    update or if the values become stale soon, this function is executed periodically in the background, therefore
+    the cache is updated at most once per interval (e.g. during an import) and not on the request path
+
+    :return: True if the values are recomputed, otherwise False
+    """
+    context = protected_cache.get_value(HOMEPAGE_CONTEXT_CACHE_KEY)
+    if context is None or protected_cache.is_stale(HOMEPAGE_CONTEXT_CACHE_KEY, margin=HOMEPAGE_CONTEXT_REFRESH_MARGIN):
+        update_homepage_context()
+        return True
+
+    notification_data_version = utils.get_data_version(utils.NOTIFICATION_MESSAGE_DATA_VERSION_CACHE_KEY)
+    if context.get("product_data_version") != utils.get_product_data_version() or \
+            context.get("notification_data_version") != notification_data_version:
+        update_homepage_context()
+        return True
+
+    return False
@@ -0,0 +1,282 @@
+"""
+search backend for the Product data, based on the PostgreSQL trigram (pg_trgm) and full-text indexes (see migration
+0031_product_search_indexes)
+"""
+import calendar
+import re
+from contextlib import contextmanager
+from datetime import date
+from django.db import connection, transaction, OperationalError
+from django.db.models import Q, Lookup, CharField, TextField
+from django.db.models.expressions import RawSQL
+
+# text search configuration of the full-text index
+FULL_TEXT_SEARCH_CONFIG = "english"
+
+# Product fields with a trigram index (substring and regular expression search)
+TRIGRAM_SEARCH_FIELDS = ("product_id", "description", "tags")
+
+# Product fields with a full-text index
+FULL_TEXT_SEARCH_FIELDS = ("description",)
+
+REGEX_CHARACTERS = re.compile(r"[\^\$\*\+\?\{\}\[\]\\\|\(\)]")
+
+# limits for the complexity of the regular expressions that are executed by the database
+MAX_REGEX_LENGTH = 128
+MAX_REGEX_REPETITION = 100
+REGEX_BOUNDED_REPETITION = re.compile(r"\{(\d*)(?:,(\d*))?\}")
+REGEX_BACK_REFERENCE = re.compile(r"\\[1-9]")
+REGEX_NESTED_QUANTIFIER = re.compile(r"\([^()]*(?:[*+]|\{\d*(?:,\d*)?\})[^()]*\)[*+{]")
+
+# value types of the range filters
+RANGE_FILTER_NUMBER = "number"
+RANGE_FILTER_DATE = "date"
+
+RANGE_OPERATOR = re.compile(r"^(>=|<=|>|<|=)\s*(.+)$")
+NUMBER_VALUE = re.compile(r"^\d+(?:\.\d+)?$")
+DATE_VALUE = re.compile(r"^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?$")
+
+# statement timeout in milliseconds for queries that contain a regular expression search
+REGEX_SEARCH_STATEMENT_TIMEOUT = 5000
+
+# SQLSTATE of a query that was cancelled by the statement_timeout
+QUERY_CANCELED_PGCODE = "57014"
+
+
+class SearchTimeout(Exception):
+    """
+    a search query was cancelled by the statement_timeout
+    """
+    pass
+
+
+class TrigramIContains(Lookup):
+    """
+    case insensitive substring match using ILIKE (the UPPER(...) LIKE statement of the icontains lookup cannot use the
+    trigram indexes)
+    """
+    lookup_name = "trgm_icontains"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        rhs_params = ["%%%s%%" % connection.ops.prep_for_like_query(e) for e in rhs_params]
+        return "%s::text ILIKE %s" % (lhs, rhs), lhs_params + rhs_params
+
+
+class FullTextMatch(Lookup):
+    """
+    full-text match of all words within the search term (uses the tsvector index)
+    """
+    lookup_name = "fulltext"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return "to_tsvector('%s', %s) @@ plainto_tsquery('%s', %s)" % (
+            FULL_TEXT_SEARCH_CONFIG, lhs, FULL_TEXT_SEARCH_CONFIG, rhs
+        ), lhs_params + rhs_params
+
+
+class IExactIn(Lookup):
+    """
+    case insensitive match of a list of values within a single statement, the values are passed as a single array
+    parameter and the comparison uses the UPPER(...) expression index (see migration 0033_product_id_upper_index)
+    """
+    lookup_name = "iexact_in"
+
+    def get_prep_lookup(self):
+        return [self.lhs.output_field.get_prep_value(e) for e in self.rhs]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return "UPPER(%s::text) = ANY(ARRAY(SELECT UPPER(unnest(%%s::text[]))))" % lhs, lhs_params + [self.rhs]
+
+
+CharField.register_lookup(TrigramIContains)
+CharField.register_lookup(IExactIn)
+TextField.register_lookup(TrigramIContains)
+TextField.register_lookup(FullTextMatch)
+
+
+def is_plain_search_term(search_term):
+    """
+    True if the search term contains no regular expression characters (words that can be ranked)
+    """
+    return not REGEX_CHARACTERS.search(search_term)
+
+
+def is_safe_regex(search_term):
+    """
+    True if the complexity of the regular expression is bounded: limited length and repetition counts, no back
+    references and no nested quantifiers (e.g. "(a+)+")
+    """
+    if len(search_term) > MAX_REGEX_LENGTH:
+        return False
+
+    if REGEX_BACK_REFERENCE.search(search_term) or REGEX_NESTED_QUANTIFIER.search(search_term):
+        return False
+
+    for match in REGEX_BOUNDED_REPETITION.finditer(search_term):
+        if any([e and int(e) > MAX_REGEX_REPETITION for e in match.groups()]):
+            return False
+
+    return True
+
+
+@contextmanager
+def statement_timeout(milliseconds=REGEX_SEARCH_STATEMENT_TIMEOUT):
+    """
+    executes the queries within the block with the given PostgreSQL statement_timeout (within a transaction or a
+    savepoint), raises a SearchTimeout if a query is cancelled
+    """
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW statement_timeout")
+                previous_timeout = cursor.fetchone()[0]
+                cursor.execute("SET LOCAL statement_timeout = %s", [milliseconds])
+
+            yield
+
+            # restore the value for the remaining part of an outer transaction
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", [previous_timeout])
+
+    except OperationalError as ex:
+        if getattr(ex.__cause__, "pgcode", None) == QUERY_CANCELED_PGCODE:
+            raise SearchTimeout("search query cancelled after %d ms" % milliseconds) from ex
+        raise
+
+
+def parse_range_value(value, value_type):
+    """
+    returns the first and the last value of the interval that is described by a single value of a range filter (a
+    date value is a year, a month or a day, e.g. "2017", "2017-03" or "2017-03-31"), None if the value is not valid
+    """
+    value = value.strip()
+    if value_type == RANGE_FILTER_NUMBER:
+        if not NUMBER_VALUE.match(value):
+            return None
+
+        return float(value), float(value)
+
+    match = DATE_VALUE.match(value)
+    if not match:
+        return None
+
+    year, month, day = [int(e) if e else None for e in match.groups()]
+    try:
+        if day:
+            return date(year, month, day), date(year, month, day)
+
+        elif month:
+            return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+        return date(year, 1, 1), date(year, 12, 31)
+
+    except ValueError:
+        return None
+
+
+def get_range_q(field_name, value, value_type):
+    """
+    returns a Q object with native comparisons for a range filter on a number or date field, None if the filter value
+    is not valid. Supported filter values (dates within the same notation):
+     * "100" - exact value
+     * ">1000", ">=1000", "<100", "<=100", "=100" - comparison
+     * "100-500" or "100..500" - inclusive range
+
+    :param field_name: name of the field
+    :param value: filter value
+    :param value_type: RANGE_FILTER_NUMBER or RANGE_FILTER_DATE
+    """
+    value = value.strip()
+
+    match = RANGE_OPERATOR.match(value)
+    if match:
+        operator, operand = match.groups()
+        interval = parse_range_value(operand, value_type)
+        if interval is None:
+            return None
+
+        first, last = interval
+        if operator == ">":
+            return Q(**{"%s__gt" % field_name: last})
+
+        elif operator == ">=":
+            return Q(**{"%s__gte" % field_name: first})
+
+        elif operator == "<":
+            return Q(**{"%s__lt" % field_name: first})
+
+        elif operator == "<=":
+            return Q(**{"%s__lte" % field_name: last})
+
+        return Q(**{"%s__range" % field_name: interval})
+
+    interval = parse_range_value(value, value_type)
+    if interval is not None:
+        return Q(**{"%s__range" % field_name: interval})
+
+    # inclusive range, the hyphen is also part of the date values
+    if ".." in value:
+        separators = [(value.index(".."), 2)]
+
+    else:
+        separators = [(pos, 1) for pos, char in enumerate(value) if char == "-"]
+
+    for pos, length in separators:
+        lower = parse_range_value(value[:pos], value_type)
+        upper = parse_range_value(value[pos + length:], value_type)
+        if lower is not None and upper is not None:
+            return Q(**{"%s__range" % field_name: (lower[0], upper[1])})
+
+    return None
+
+
+def get_search_lookup(field_name, regex=False):
+    """
+    returns the lookup for a substring or regular expression search within the given field, the trigram lookup is
+    only used for the indexed fields
+    """
+    if regex:
+        return "%s__iregex" % field_name
+
+    if field_name in TRIGRAM_SEARCH_FIELDS:
+        return "%s__trgm_icontains" % field_name
+
+    return "%s__icontains" % field_name
+
+
+def get_search_q(field_names, search_term, regex=False, full_text=False):
+    """
+    returns a Q object that matches the search term within any of the given fields
+
+    :param field_names: names of the fields
+    :param search_term: search term
+    :param regex: search term is a regular expression
+    :param full_text: match also the words of the search term within the full-text indexed fields
+    """
+    q = Q()
+    for field_name in field_names:
+        q |= Q(**{get_search_lookup(field_name, regex): search_term})
+        if full_text and field_name in FULL_TEXT_SEARCH_FIELDS and is_plain_search_term(search_term):
+            q |= Q(**{"%s__fulltext" % field_name: search_term})
+
+    return q
+
+
+def annotate_search_rank(queryset, search_term, field_name="description"):
+    """
+    annotate the full-text rank of the search term as search_rank to the Product queryset
+    """
+    return queryset.annotate(search_rank=RawSQL(
+        "ts_rank(to_tsvector('%s', %s.%s), plainto_tsquery('%s', %%s))" % (
+            FULL_TEXT_SEARCH_CONFIG,
+            '"%s"' % queryset.model._meta.db_table,
+            '"%s"' % queryset.model._meta.get_field(field_name).column,
+            FULL_TEXT_SEARCH_CONFIG
+        ),
+        (search_term,)
+    ))
@@ -1,12 +1,220 @@
+from collections import OrderedDict
+from types import SimpleNamespace
 from rest_framework.serializers import HyperlinkedModelSerializer, BooleanField
 from rest_framework import serializers
-from rest_framework.serializers import ChoiceField, CharField, DecimalField, PrimaryKeyRelatedField
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField, DateField, IntegerField, URLField
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PKOnlyObject, HyperlinkedIdentityField
+from rest_framework.serializers import ChoiceField, CharField, DecimalField, PrimaryKeyRelatedField, ListSerializer
+from django.core.exceptions import FieldDoesNotExist
 from django.core.validators import MinValueValidator
+from django.db import models
 from app.productdb.models import Product, Vendor, CURRENCY_CHOICES, ProductGroup, ProductList, ProductMigrationSource, \
-    ProductMigrationOption
+    ProductMigrationOption, ChangeLogEntry
 
 
-class VendorSerializer(HyperlinkedModelSerializer):
+def get_query_param_values(request, name):
+    """returns the set of comma separated values of the query parameter"""
+    return {e.strip() for e in request.query_params.get(name, "").split(",") if e.strip()}
+
+
+def get_sparse_field_names(request, field_names):
+    """
+    returns the field names that are selected by the ?fields= and ?omit= query parameters (comma separated field
+    names), raises a ValidationError if a parameter contains an unknown field name
+
+    :param request: API request
+    :param field_names: ordered list of the available field names
+    """
+    fields = get_query_param_values(request, "fields")
+    omit = get_query_param_values(request, "omit")
+    for param_name, values in (("fields", fields), ("omit", omit)):
+        unknown_field_names = values - set(field_names)
+        if unknown_field_names:
+            raise ValidationError({
+                param_name: "unknown field(s): %s" % ", ".join(sorted(unknown_field_names))
+            })
+
+    return [e for e in field_names if (not fields or e in fields) and e not in omit]
+
+
+class SparseFieldsetMixin:
+    """
+    limits the fields within the responses of the API endpoints to the fields of the ?fields= query parameter and
+    removes the fields of the ?omit= query parameter (comma separated field names, only for read requests)
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or "view" not in self.context or request.method not in SAFE_METHODS:
+            return
+
+        selected_field_names = get_sparse_field_names(request, list(self.fields.keys()))
+        for field_name in list(self.fields.keys()):
+            if field_name not in selected_field_names:
+                self.fields.pop(field_name)
+
+
+# serializer fields with a representation that depends only on the value (the results are reused for equal values)
+VALUE_CACHED_FIELD_CLASSES = (DecimalField, DateField, ChoiceField, BooleanField)
+
+# serializer fields that represent the value as a string or an integer
+STRING_FIELD_CLASSES = (CharField, URLField)
+INTEGER_FIELD_CLASSES = (IntegerField,)
+
+# lookup value that is used to reverse the URL template of a HyperlinkedIdentityField
+URL_TEMPLATE_LOOKUP_VALUE = 987654321
+
+
+def get_model_field(field, model):
+    """
+    returns the concrete model field that is the source of the serializer field, None if the value is not directly
+    read from a column of the model
+    """
+    if len(field.source_attrs) != 1:
+        return None
+
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+
+    except FieldDoesNotExist:
+        return None
+
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+
+    return model_field
+
+
+def get_default_representation_function(field):
+    """
+    returns a function that creates the representation of the field for an instance (same steps as the
+    to_representation method of the Serializer, raises a SkipField exception if the field is not part of the result)
+    """
+    def to_representation(instance):
+        attribute = field.get_attribute(instance)
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        return None if check_for_none is None else field.to_representation(attribute)
+
+    return to_representation
+
+
+def get_url_representation_function(field, model):
+    """
+    the URL of the HyperlinkedIdentityField is reversed once for a placeholder value, the lookup value of every
+    instance is inserted into the result (only for integer lookup fields)
+    """
+    model_field = model._meta.pk if field.lookup_field == "pk" else model._meta.get_field(field.lookup_field)
+    if not isinstance(model_field, (models.AutoField, models.IntegerField)):
+        return get_default_representation_function(field)
+
+    placeholder = {"pk": URL_TEMPLATE_LOOKUP_VALUE, field.lookup_field: URL_TEMPLATE_LOOKUP_VALUE}
+    parts = str(field.to_representation(SimpleNamespace(**placeholder))).split(str(URL_TEMPLATE_LOOKUP_VALUE))
+    if len(parts) != 2:
+        return get_default_representation_function(field)
+
+    prefix, suffix = parts
+    attname = model_field.attname
+
+    def to_representation(instance):
+        value = getattr(instance, attname)
+        # unsaved objects have no URL
+        return None if value is None else prefix + str(value) + suffix
+
+    return to_representation
+
+
+def get_fast_representation_function(field, model):
+    """
+    returns a function that creates the same representation of the field as the Serializer for an instance of the
+    model, the value is read directly from the model attribute for the common field classes
+    """
+    field_class = type(field)
+    if field_class is HyperlinkedIdentityField:
+        return get_url_representation_function(field, model)
+
+    model_field = get_model_field(field, model)
+    if model_field is None:
+        return get_default_representation_function(field)
+
+    attname = model_field.attname
+    if field_class is PrimaryKeyRelatedField and model_field.is_relation and field.pk_field is None:
+        def to_representation(instance):
+            return getattr(instance, attname)
+
+    elif model_field.is_relation:
+        return get_default_representation_function(field)
+
+    elif field_class in STRING_FIELD_CLASSES:
+        def to_representation(instance):
+            value = getattr(instance, attname)
+            return None if value is None else str(value)
+
+    elif field_class in INTEGER_FIELD_CLASSES:
+        def to_representation(instance):
+            value = getattr(instance, attname)
+            return None if value is None else int(value)
+
+    elif field_class in VALUE_CACHED_FIELD_CLASSES:
+        results = {}
+
+        def to_representation(instance):
+            value = getattr(instance, attname)
+            if value is None:
+                return None
+
+            try:
+                return results[value]
+
+            except KeyError:
+                result = results[value] = field.to_representation(value)
+                return result
+
+    else:
+        return get_default_representation_function(field)
+
+    return to_representation
+
+
+class FastListSerializer(ListSerializer):
+    """
+    read only fast path for the representation of large lists of model instances (e.g. the pages of the API
+    endpoints), creates the same representation as the child serializer, but the conversion of every field is
+    prepared once per list instead of running the generic field machinery for every value
+    """
+    def to_representation(self, data):
+        child_class = type(self.child)
+        if child_class.to_representation is not serializers.Serializer.to_representation or \
+                not hasattr(getattr(child_class, "Meta", None), "model"):
+            return super().to_representation(data)
+
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        instances = list(iterable)
+        if not instances:
+            return []
+
+        functions = [
+            (field.field_name, get_fast_representation_function(field, child_class.Meta.model))
+            for field in self.child._readable_fields
+        ]
+
+        result = []
+        for instance in instances:
+            ret = OrderedDict()
+            for field_name, to_representation in functions:
+                try:
+                    ret[field_name] = to_representation(instance)
+
+                except SkipField:
+                    continue
+
+            result.append(ret)
+
+        return result
+
+
+class VendorSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     class Meta:
         model = Vendor
         fields = (
@@ -23,7 +231,7 @@ class VendorSerializer(HyperlinkedModelSerializer):
         depth = 0
 
 
-class ProductGroupSerializer(HyperlinkedModelSerializer):
+class ProductGroupSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     vendor = PrimaryKeyRelatedField(
         many=False,
         queryset=Vendor.objects.all(),
@@ -53,7 +261,7 @@ class ProductListItemField(serializers.Field):
         return value.split("\n")
 
 
-class ProductListSerializer(HyperlinkedModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     """Read only Product List endpoint"""
     contact_email = serializers.SerializerMethodField(
         'get_update_user_email',
@@ -87,7 +295,7 @@ class ProductListSerializer(HyperlinkedModelSerializer):
         depth = 0
 
 
-class ProductSerializer(HyperlinkedModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     currency = ChoiceField(
         choices=CURRENCY_CHOICES,
         initial="USD",
@@ -177,9 +385,55 @@ class ProductSerializer(HyperlinkedModelSerializer):
             }
         }
         depth = 0
+        # fast representation of the list responses (e.g. large pages)
+        list_serializer_class = FastListSerializer
+
+
+class PreloadedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+    primary key relation that uses the objects from the serializer context (dictionary "related_objects" with the
+    objects per field name and primary key) instead of a query per value
+    """
+    def to_internal_value(self, data):
+        objects = self.context.get("related_objects", {}).get(self.field_name)
+        if objects is None:
+            return super().to_internal_value(data)
+
+        try:
+            return objects[int(data)]
+
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
 
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
 
-class ProductMigrationOptionSerializer(HyperlinkedModelSerializer):
+
+class BulkProductSerializer(ProductSerializer):
+    """
+    Product serializer for the bulk operations of the API, the Vendors and Product Groups are taken from the
+    serializer context and the unique Product IDs are verified for the entire batch (see productdb.bulk module)
+    """
+    product_group = PreloadedPrimaryKeyRelatedField(
+        many=False,
+        queryset=ProductGroup.objects.all(),
+        read_only=False,
+        required=False,
+        allow_null=True
+    )
+
+    vendor = PreloadedPrimaryKeyRelatedField(
+        many=False,
+        queryset=Vendor.objects.all(),
+        read_only=False,
+        required=False
+    )
+
+    class Meta(ProductSerializer.Meta):
+        extra_kwargs = dict(ProductSerializer.Meta.extra_kwargs, product_id={"validators": []})
+
+
+class ProductMigrationOptionSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     product = PrimaryKeyRelatedField(
         many=False,
         queryset=Product.objects.all(),
@@ -213,7 +467,7 @@ class ProductMigrationOptionSerializer(HyperlinkedModelSerializer):
         depth = 0
 
 
-class ProductMigrationSourceSerializer(HyperlinkedModelSerializer):
+class ProductMigrationSourceSerializer(SparseFieldsetMixin, HyperlinkedModelSerializer):
     class Meta:
         model = ProductMigrationSource
         fields = (
@@ -230,3 +484,17 @@ class ProductMigrationSourceSerializer(HyperlinkedModelSerializer):
             }
         }
         depth = 0
+
+
+class ChangeLogEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Read only change feed endpoint"""
+    class Meta:
+        model = ChangeLogEntry
+        fields = (
+            "id",
+            "object_type",
+            "object_id",
+            "action",
+            "timestamp"
+        )
+        read_only_fields = fields
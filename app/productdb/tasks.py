@@ -1,9 +1,12 @@
 import logging
+from datetime import timedelta
 from django.contrib.auth.models import User
+from django.utils import timezone
 from app.config.models import NotificationMessage
 from app.productdb.excel_import import ProductsExcelImporter, InvalidImportFormatException, InvalidExcelFileFormat, \
     ProductMigrationsExcelImporter
-from app.productdb.models import JobFile, ProductCheck
+from app.productdb.models import JobFile, ProductCheck, ProductMigrationPath, ProductMigrationOption, ChangeLogEntry
+from app.productdb import reports
 from django_project.celery import app, TaskState
 import time
 
@@ -15,6 +18,33 @@ def delete_all_product_checks():
     ProductCheck.objects.all().delete()
 
 
+@app.task(name="productdb.delete_old_change_log_entries")
+def delete_old_change_log_entries():
+    """remove the change log entries that are older than the retention period"""
+    ChangeLogEntry.objects.filter(
+        timestamp__lt=timezone.now() - timedelta(days=ChangeLogEntry.RETENTION_DAYS)
+    ).delete()
+
+
+@app.task(name="productdb.rebuild_product_migration_paths")
+def rebuild_product_migration_paths():
+    """recompute all materialized migration paths"""
+    ProductMigrationPath.objects.rebuild()
+
+
+@app.task(name="productdb.rebuild_replacement_product_links")
+def rebuild_replacement_product_links():
+    """relink all Product Migration Options with the database Products of their replacement Product ID"""
+    if ProductMigrationOption.objects.update_replacement_db_products():
+        ProductMigrationPath.objects.rebuild()
+
+
+@app.task(name="productdb.update_homepage_context")
+def update_homepage_context():
+    """recompute the cached homepage counters if the product data has changed since the last update"""
+    reports.refresh_homepage_context()
+
+
 @app.task(serializer="json", name="productdb.perform_product_check", bind=True)
 def perform_product_check(self, product_check_id):
     """
@@ -0,0 +1,55 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.template import TemplateSyntaxError, VariableDoesNotExist
+from django_project import cache as protected_cache
+
+register = template.Library()
+
+
+class ProtectedCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.expire_time_var = expire_time_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            expire_time = int(self.expire_time_var.resolve(context))
+
+        except (VariableDoesNotExist, ValueError, TypeError):
+            raise TemplateSyntaxError('"protected_cache" tag got an invalid timeout value: %r' % self.expire_time_var)
+
+        vary_on = [var.resolve(context) for var in self.vary_on]
+
+        return protected_cache.get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            timeout=expire_time
+        )
+
+
+@register.tag("protected_cache")
+def do_protected_cache(parser, token):
+    """
+    same as the cache tag from django, but only a single worker renders an expired fragment (see django_project.cache)
+
+    Usage::
+
+        {% load protected_cache %}
+        {% protected_cache [expire_time] [fragment_name] [var1] [var2] .. %}
+            .. some expensive processing ..
+        {% endprotected_cache %}
+    """
+    nodelist = parser.parse(("endprotected_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError("'%r' tag requires at least 2 arguments." % tokens[0])
+
+    return ProtectedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]]
+    )
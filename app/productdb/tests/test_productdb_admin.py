@@ -28,6 +28,32 @@ class TestProductAdmin:
 
         assert result == expected, "should return a HTML representation of the current lifecycle states"
 
+    @pytest.mark.usefixtures("import_default_vendors")
+    def test_lifecycle_state_list_filter(self):
+        site = AdminSite()
+        product_admin = admin.ProductAdmin(models.Product, site)
+        mixer.blend("productdb.Product", eox_update_time_stamp=datetime.datetime.now())
+        mixer.blend(
+            "productdb.Product",
+            eol_ext_announcement_date=datetime.date(2016, 1, 1),
+            end_of_sale_date=datetime.date(2016, 1, 1)
+        )
+        queryset = product_admin.get_queryset(None)
+
+        list_filter = admin.LifecycleStateListFilter(
+            None,
+            {"lifecycle_state": models.Product.END_OF_SALE_STR},
+            models.Product,
+            product_admin
+        )
+        assert list_filter.queryset(None, queryset).count() == 1
+
+        obj = list_filter.queryset(None, queryset).get()
+        assert product_admin.current_lifecycle_states(obj) == models.Product.END_OF_SALE_STR
+
+        list_filter = admin.LifecycleStateListFilter(None, {}, models.Product, product_admin)
+        assert list_filter.queryset(None, queryset).count() == 2
+
     def test_search_fields(self):
         for fieldname in admin.ProductAdmin.search_fields:
             query = "%s__icontains" % fieldname
@@ -2,6 +2,7 @@
 Test suite for the productdb.api_views module
 """
 import pytest
+from contextlib import contextmanager
 from urllib.parse import quote
 
 import requests
@@ -10,13 +11,18 @@ from django.utils.formats import get_format
 from django.conf import settings
 from django.contrib.auth.models import User, Permission
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.datetime_safe import date, datetime
 from mixer.backend.django import mixer
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
+from app.productdb import search
+from app.productdb.api_views import ProductViewSet
+from django_project import pagination
 from app.productdb.models import Vendor, ProductGroup, Product, ProductList, ProductMigrationOption, \
-    ProductMigrationSource
+    ProductMigrationSource, ChangeLogEntry
 
 pytestmark = pytest.mark.django_db
 
@@ -37,6 +43,11 @@ REST_PRODUCT_GROUP_COUNT = REST_PRODUCT_GROUP_LIST + "count/"
 REST_PRODUCT_GROUP_DETAIL = REST_PRODUCT_GROUP_LIST + "%d/"
 REST_PRODUCT_LIST = reverse("productdb:products-list")
 REST_PRODUCT_COUNT = REST_PRODUCT_LIST + "count/"
+REST_PRODUCT_BULK = REST_PRODUCT_LIST + "bulk/"
+REST_PRODUCT_EXPORT = REST_PRODUCT_LIST + "export/"
+REST_PRODUCT_LOOKUP = REST_PRODUCT_LIST + "lookup/"
+REST_PRODUCT_MIGRATION_PATHS = REST_PRODUCT_LIST + "migration_paths/"
+REST_PRODUCT_LIFECYCLE_TIMELINE = REST_PRODUCT_LIST + "lifecycle_timeline/"
 REST_PRODUCT_DETAIL = REST_PRODUCT_LIST + "%d/"
 REST_PRODUCTLIST_LIST = reverse("productdb:productlists-list")
 REST_PRODUCTLIST_DETAIL = REST_PRODUCTLIST_LIST + "%d/"
@@ -44,6 +55,7 @@ REST_PRODUCTMIGRATIONSOURCE_LIST = reverse("productdb:productmigrationsources-li
 REST_PRODUCTMIGRATIONSOURCE_DETAIL = REST_PRODUCTMIGRATIONSOURCE_LIST + "%d/"
 REST_PRODUCTMIGRATIONOPTION_LIST = reverse("productdb:productmigrationoptions-list")
 REST_PRODUCTMIGRATIONOPTION_DETAIL = REST_PRODUCTMIGRATIONOPTION_LIST + "%d/"
+REST_CHANGES_LIST = reverse("productdb:changes-list")
 
 COMMON_API_ENDPOINT_BEHAVIOR = [
     REST_VENDOR_LIST,
@@ -121,7 +133,7 @@ class TestCommonAPIEndpoint:
 
             assert response.status_code == status.HTTP_200_OK
 
-    def test_page_size(self):
+    def test_page_size(self, monkeypatch):
         for e in range(1, 50):
             mixer.blend("productdb.Product")
 
@@ -144,6 +156,52 @@ class TestCommonAPIEndpoint:
         assert jdata["pagination"]["page_records"] == 40, "should contain 40 elements"
         assert jdata["pagination"]["total_records"] == 50, "total records should be all products"
 
+        # the page size is limited
+        response = client.get(REST_PRODUCT_LIST + "?page_size=%d" % (pagination.MAX_PAGE_SIZE + 1))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["pagination"]["page_records"] == 50
+
+        monkeypatch.setattr(pagination.CustomPagination, "max_page_size", 10)
+        response = client.get(REST_PRODUCT_LIST + "?page_size=40")
+        jdata = response.json()
+        assert jdata["pagination"]["page_records"] == 10
+        assert jdata["pagination"]["last_page"] == 5
+
+    def test_cursor_pagination(self, monkeypatch):
+        for e in range(1, 50):
+            mixer.blend("productdb.Product")
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        # no count query within the cursor pagination mode
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(REST_PRODUCT_LIST + "?cursor=&page_size=20")
+        assert response.status_code == status.HTTP_200_OK
+        assert not [e for e in context.captured_queries if "COUNT(" in e["sql"].upper()]
+
+        jdata = response.json()
+        assert "total_records" not in jdata["pagination"]
+        assert jdata["pagination"]["page_records"] == 20
+        assert jdata["pagination"]["url"]["previous"] is None
+
+        product_ids = [e["id"] for e in jdata["data"]]
+        while jdata["pagination"]["url"]["next"]:
+            response = client.get(jdata["pagination"]["url"]["next"])
+            assert response.status_code == status.HTTP_200_OK
+            jdata = response.json()
+            product_ids += [e["id"] for e in jdata["data"]]
+
+        assert product_ids == list(Product.objects.order_by("id").values_list("id", flat=True))
+
+        # the maximum page size is also enforced in the cursor pagination mode
+        monkeypatch.setattr(pagination.CustomCursorPagination, "max_page_size", 10)
+        response = client.get(REST_PRODUCT_LIST + "?cursor=&page_size=20")
+        assert response.json()["pagination"]["page_records"] == 10
+
+        response = client.get(REST_PRODUCT_LIST + "?cursor=invalid")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_token_authentication(self):
         for e in range(1, 50):
             mixer.blend("productdb.Product")
@@ -1656,6 +1714,497 @@ class TestProductAPIEndpoint:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {'count': 3}
 
+    def test_lifecycle_state_and_date_filters(self):
+        today = date.today()
+        mixer.blend("productdb.Product", product_id="No Data")
+        mixer.blend("productdb.Product", product_id="No EoL", eox_update_time_stamp=date(2016, 1, 1))
+        mixer.blend("productdb.Product", product_id="EoS", eol_ext_announcement_date=date(2016, 1, 1),
+                    end_of_sale_date=date(2016, 6, 1), end_of_sw_maintenance_date=date(2016, 7, 1))
+        mixer.blend("productdb.Product", product_id="LDoS", eol_ext_announcement_date=date(2015, 1, 1),
+                    end_of_sale_date=date(2015, 6, 1), end_of_support_date=date(2016, 1, 1))
+        Product.objects.filter(product_id="No Data").update(update_timestamp=date(2016, 1, 1))
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        def get_product_ids(query):
+            response = client.get(REST_PRODUCT_LIST + query)
+            assert response.status_code == status.HTTP_200_OK
+            return sorted([e["product_id"] for e in response.json()["data"]])
+
+        assert get_product_ids("?lifecycle_state=eos") == ["EoS"]
+        assert get_product_ids("?lifecycle_state=eoswm") == ["EoS"]
+        assert get_product_ids("?lifecycle_state=eonsa") == []
+        assert get_product_ids("?lifecycle_state=ldos&lifecycle_state=no_eol") == ["LDoS", "No EoL"]
+        assert get_product_ids("?lifecycle_state=invalid") == []
+        assert get_product_ids("?end_of_sale_date_after=2016-01-01") == ["EoS"]
+        assert get_product_ids("?end_of_sale_date_before=2016-01-01") == ["LDoS"]
+        assert get_product_ids("?end_of_support_date=2016-01-01") == ["LDoS"]
+        assert get_product_ids("?eox_update_time_stamp_after=2016-01-01&eox_update_time_stamp_before=2016-01-01") == [
+            "No EoL"
+        ]
+        assert get_product_ids("?updated_since=%s" % today.strftime("%Y-%m-%d")) == ["EoS", "LDoS", "No EoL"]
+
+    def test_range_filters(self):
+        mixer.blend("productdb.Product", product_id="Product 1", list_price=50.0, end_of_sale_date=date(2016, 6, 1))
+        mixer.blend("productdb.Product", product_id="Product 2", list_price=500.0, end_of_sale_date=date(2017, 3, 31))
+        mixer.blend("productdb.Product", product_id="Product 3", list_price=5000.0)
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        def get_product_ids(query):
+            response = client.get(REST_PRODUCT_LIST + query)
+            assert response.status_code == status.HTTP_200_OK
+            return sorted([e["product_id"] for e in response.json()["data"]])
+
+        assert get_product_ids("?list_price=500") == ["Product 2"]
+        assert get_product_ids("?list_price=100-500") == ["Product 2"]
+        assert get_product_ids("?list_price=" + quote(">500")) == ["Product 3"]
+        assert get_product_ids("?list_price=" + quote("<=500")) == ["Product 1", "Product 2"]
+        assert get_product_ids("?end_of_sale_date=2017") == ["Product 2"]
+        assert get_product_ids("?end_of_sale_date=2016-06..2017-03") == ["Product 1", "Product 2"]
+        assert get_product_ids("?end_of_sale_date=" + quote(">2016-06")) == ["Product 2"]
+
+        response = client.get(REST_PRODUCT_LIST + "?list_price=abc")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "list_price" in response.json()
+
+    def test_bulk_endpoint(self):
+        v1 = Vendor.objects.get(id=1)
+        v2 = Vendor.objects.get(id=2)
+        pg = mixer.blend("productdb.ProductGroup", name="product group", vendor=v1)
+        existing_product = mixer.blend("productdb.Product", product_id="existing product", vendor=v1)
+        migration_source = ProductMigrationSource.objects.create(name="Migration Source")
+        option = ProductMigrationOption.objects.create(
+            product=existing_product,
+            migration_source=migration_source,
+            replacement_product_id="product 3"
+        )
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+        response = client.post(REST_PRODUCT_BULK, data=[{"product_id": "product 1"}], format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        client = APIClient()
+        client.login(**SUPER_USER)
+        response = client.post(REST_PRODUCT_BULK, data={"product_id": "product 1"}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "products" in response.json()
+
+        # create
+        response = client.post(REST_PRODUCT_BULK, data=[
+            {"product_id": "product 1", "vendor": v1.id, "product_group": pg.id, "list_price": "10.00"},
+            {"product_id": "product 2", "vendor": v2.id, "end_of_sale_date": "2017-03-31"},
+            {"product_id": "product 3", "vendor": v1.id},
+            {"product_id": "existing product"},
+            {"product_id": "product 1"},
+            {"product_id": "product 4", "vendor": v2.id, "product_group": pg.id},
+            {"product_id": "product 5", "vendor": 9999},
+            "product 6",
+        ], format="json")
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()["data"]
+        assert [e["status"] for e in result] == ["created"] * 3 + ["error"] * 5
+        assert [list(e["errors"].keys()) for e in result[3:]] == [
+            ["product_id"], ["product_id"], ["product_group"], ["vendor"], ["non_field_errors"]
+        ]
+        assert Product.objects.count() == 4
+
+        p1 = Product.objects.get(product_id="product 1")
+        p2 = Product.objects.get(product_id="product 2")
+        p3 = Product.objects.get(product_id="product 3")
+        assert result[0]["id"] == p1.id
+        assert p1.product_group == pg
+        assert p2.vendor == v2
+        assert p2.end_of_sale_date == date(2017, 3, 31)
+
+        # the Product Migration Options are linked with the new Products
+        option.refresh_from_db()
+        assert option.replacement_db_product == p3
+
+        # partial update
+        response = client.patch(REST_PRODUCT_BULK, data=[
+            {"id": p1.id, "product_id": "product 1 renamed", "list_price": "20.00"},
+            {"product_id": "product 2", "description": "updated description"},
+            {"id": p3.id, "product_id": "existing product"},
+            {"product_id": "unknown product"},
+            {"description": "no lookup"},
+            {"id": p1.id, "description": "duplicate item"},
+            {"product_id": "product 2", "vendor": v1.id, "product_group": pg.id},
+        ], format="json")
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()["data"]
+        assert [e["status"] for e in result] == ["updated"] * 2 + ["error"] * 5
+        p1.refresh_from_db()
+        p2.refresh_from_db()
+        p3.refresh_from_db()
+        assert p1.product_id == "product 1 renamed"
+        assert p1.list_price == 20.0
+        assert p1.list_price_timestamp is not None
+        assert p1.product_group == pg
+        assert p2.description == "updated description"
+        assert p2.vendor == v2
+        assert p3.product_id == "product 3"
+
+        # delete
+        response = client.delete(REST_PRODUCT_BULK, data=[
+            {"id": p1.id},
+            {"product_id": "product 3"},
+            {"product_id": "unknown product"},
+        ], format="json")
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()["data"]
+        assert [e["status"] for e in result] == ["deleted", "deleted", "error"]
+        assert set(Product.objects.values_list("product_id", flat=True)) == {"existing product", "product 2"}
+
+        option.refresh_from_db()
+        assert option.replacement_db_product is None
+
+    def test_changes_endpoint(self):
+        v = Vendor.objects.get(id=1)
+        client = APIClient()
+        response = client.get(REST_CHANGES_LIST)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # the bulk operations write the change log entries
+        client.login(**SUPER_USER)
+        response = client.post(REST_PRODUCT_BULK, data=[
+            {"product_id": "product %d" % e, "vendor": v.id} for e in range(1, 6)
+        ], format="json")
+        assert response.status_code == status.HTTP_200_OK
+        ids = [e["id"] for e in response.json()["data"]]
+        option = ProductMigrationOption.objects.create(
+            product=Product.objects.get(id=ids[0]),
+            migration_source=ProductMigrationSource.objects.create(name="Migration Source"),
+            replacement_product_id="product 2"
+        )
+        response = client.patch(REST_PRODUCT_BULK, data=[{"id": ids[1], "description": "changed"}], format="json")
+        assert response.status_code == status.HTTP_200_OK
+        response = client.delete(REST_PRODUCT_BULK, data=[{"id": ids[0]}], format="json")
+        assert response.status_code == status.HTTP_200_OK
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+        response = client.get(REST_CHANGES_LIST + "?page_size=3")
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert "total_records" not in jdata["pagination"]
+        assert list(jdata["data"][0].keys()) == ["id", "object_type", "object_id", "action", "timestamp"]
+
+        changes = jdata["data"]
+        while jdata["pagination"]["url"]["next"]:
+            jdata = client.get(jdata["pagination"]["url"]["next"]).json()
+            changes += jdata["data"]
+
+        assert [e["id"] for e in changes] == list(ChangeLogEntry.objects.order_by("id").values_list("id", flat=True))
+        changes_values = [(e["object_type"], e["object_id"], e["action"]) for e in changes]
+        assert sorted(changes_values[:5]) == [("product", e, "created") for e in sorted(ids)]
+        assert changes_values[5:] == [
+            ("productmigrationoption", option.id, "created"),
+            ("product", ids[1], "updated"),
+            ("product", ids[0], "deleted"),
+            ("productmigrationoption", option.id, "deleted"),
+        ]
+
+        # changes after the last processed change
+        response = client.get(REST_CHANGES_LIST + "?since=%d" % changes[-3]["id"])
+        assert [e["id"] for e in response.json()["data"]] == [e["id"] for e in changes[-2:]]
+
+        response = client.get(REST_CHANGES_LIST + "?object_type=productmigrationoption&action=deleted")
+        assert [e["id"] for e in response.json()["data"]] == [changes[-1]["id"]]
+
+    def test_changes_endpoint_order(self):
+        # the feed is ordered by the writing transaction, the changes of running transactions are not part of it
+        entries = [
+            ChangeLogEntry(object_type="product", object_id=e, action=ChangeLogEntry.ACTION_UPDATED, transaction_id=t)
+            for e, t in ((1, 20), (2, 10), (3, 10), (4, 2 ** 62))
+        ]
+        ChangeLogEntry.objects.bulk_create(entries)
+        entry_ids = dict(ChangeLogEntry.objects.values_list("object_id", "id"))
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+        response = client.get(REST_CHANGES_LIST + "?page_size=2")
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert [e["object_id"] for e in jdata["data"]] == [2, 3]
+        assert jdata["pagination"]["url"]["previous"] is None
+
+        jdata = client.get(jdata["pagination"]["url"]["next"]).json()
+        assert [e["object_id"] for e in jdata["data"]] == [1]
+        assert jdata["pagination"]["url"]["next"] is None
+
+        response = client.get(REST_CHANGES_LIST + "?since=%d" % entry_ids[2])
+        assert [e["object_id"] for e in response.json()["data"]] == [3, 1]
+
+        # entries that were removed after the retention period are compared by their ID
+        ChangeLogEntry.objects.filter(object_id=3).delete()
+        response = client.get(REST_CHANGES_LIST + "?since=%d" % entry_ids[3])
+        assert [e["object_id"] for e in response.json()["data"]] == []
+
+    def test_sparse_fieldsets(self):
+        p = mixer.blend("productdb.Product", product_id="product 1", vendor=Vendor.objects.get(id=1), list_price=10)
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        # only the columns of the requested fields are loaded
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(REST_PRODUCT_LIST + "?fields=product_id,list_price,end_of_support_date")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == [
+            {"product_id": "product 1", "list_price": "10.00", "end_of_support_date": None}
+        ]
+
+        queries = [e["sql"] for e in context.captured_queries if 'FROM "productdb_product"' in e["sql"]]
+        queries = [e for e in queries if "COUNT(" not in e.upper()]
+        assert len(queries) == 1
+        assert '"productdb_product"."description"' not in queries[0]
+
+        response = client.get(REST_PRODUCT_DETAIL % p.id + "?omit=url,description,tags")
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert "url" not in jdata and "description" not in jdata and "tags" not in jdata
+        assert jdata["product_id"] == "product 1"
+
+        response = client.get(REST_VENDOR_LIST + "?fields=id,name")
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.json()["data"][0].keys()) == {"id", "name"}
+
+        response = client.get(REST_PRODUCT_LIST + "?fields=product_id,unknown")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"fields": "unknown field(s): unknown"}
+
+    def test_export_endpoint(self):
+        v1 = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="product 1", vendor=v1, end_of_sale_date=date(2016, 1, 1))
+        mixer.blend("productdb.Product", product_id="product 2", vendor=v1, end_of_sale_date=date(2017, 1, 1))
+        mixer.blend("productdb.Product", product_id="product 3", vendor=v1)
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        # same filters as the Product endpoint
+        response = client.get(REST_PRODUCT_EXPORT + "?end_of_sale_date=2016..2017&fields=product_id,end_of_sale_date")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/csv"
+        assert b"".join(response.streaming_content).decode().splitlines() == [
+            "product_id,end_of_sale_date",
+            "product 1,2016-01-01",
+            "product 2,2017-01-01",
+        ]
+
+        response = client.get(REST_PRODUCT_EXPORT + "?export_format=jsonl&omit=description")
+        assert response.status_code == status.HTTP_200_OK
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert len(lines) == 3
+        assert "description" not in lines[0]
+        assert "product_id" in lines[0]
+
+        response = client.get(REST_PRODUCT_EXPORT + "?export_format=xlsx")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Disposition"] == 'attachment; filename="products.xlsx"'
+
+        response = client.get(REST_PRODUCT_EXPORT + "?export_format=pdf")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "export_format" in response.json()
+
+        response = client.get(REST_PRODUCT_EXPORT + "?fields=url")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"fields": "unknown field(s): url"}
+
+    def test_conditional_get(self):
+        p = mixer.blend("productdb.Product", product_id="product 1", vendor=Vendor.objects.get(id=1))
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        for url in [REST_PRODUCT_LIST, REST_PRODUCT_DETAIL % p.id]:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.has_header("ETag")
+            assert response.has_header("Last-Modified")
+            etag = response["ETag"]
+
+            # unchanged resources are not loaded
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert not [e for e in context.captured_queries if "productdb_product" in e["sql"]]
+
+            # the ETag depends on the query parameters
+            response = client.get(url + "?fields=product_id", HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_200_OK
+
+        response = client.get(REST_PRODUCT_LIST)
+        etag = response["ETag"]
+        p.description = "changed description"
+        p.save()
+        response = client.get(REST_PRODUCT_LIST, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+        # the Product Lists have a separate data version
+        response = client.get(REST_PRODUCTLIST_LIST)
+        etag = response["ETag"]
+        p.description = "another description"
+        p.save()
+        assert client.get(REST_PRODUCTLIST_LIST, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_lookup_endpoint(self):
+        p1 = mixer.blend("productdb.Product", product_id="WS-C2960X-24TS-L", vendor=Vendor.objects.get(id=1))
+        p2 = mixer.blend("productdb.Product", product_id="ws-c3850-24t-s", vendor=Vendor.objects.get(id=1))
+        mixer.blend("productdb.Product", product_id="WS-C3650-24TS-L", vendor=Vendor.objects.get(id=1))
+
+        client = APIClient()
+        response = client.get(REST_PRODUCT_LOOKUP + "?product_ids=WS-C2960X-24TS-L")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        client.login(**AUTH_USER)
+        response = client.get(REST_PRODUCT_LOOKUP + "?product_ids=WS-C3850-24T-S,unknown,ws-c2960x-24ts-l")
+
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert [e["id"] for e in jdata["data"]] == [p2.id, p1.id]
+        assert jdata["data"][0]["product_id"] == "ws-c3850-24t-s"
+        assert jdata["not_found"] == ["unknown"]
+
+        # the Product IDs are resolved within a single query
+        product_ids = ["ws-c2960x-24ts-l"] + ["unknown %d" % e for e in range(2000)]
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(REST_PRODUCT_LOOKUP, data={"product_ids": product_ids}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert [e["id"] for e in jdata["data"]] == [p1.id]
+        assert len(jdata["not_found"]) == 2000
+        assert len([e for e in context.captured_queries if "productdb_product" in e["sql"]]) == 1
+
+        # a list within the JSON body
+        response = client.post(REST_PRODUCT_LOOKUP, data=["WS-C2960X-24TS-L"], format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["id"] for e in response.json()["data"]] == [p1.id]
+
+        # sparse fieldsets
+        response = client.get(REST_PRODUCT_LOOKUP + "?product_ids=WS-C2960X-24TS-L&fields=product_id")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"data": [{"product_id": "WS-C2960X-24TS-L"}], "not_found": []}
+
+        # invalid requests
+        response = client.post(REST_PRODUCT_LOOKUP, data={"product_ids": "WS-C2960X-24TS-L"}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(REST_PRODUCT_LOOKUP, data={
+            "product_ids": ["Product %d" % e for e in range(ProductViewSet.LOOKUP_MAX_PRODUCT_IDS + 1)]
+        }, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"product_ids": "maximum of %d Product IDs per request exceeded" %
+                                                  ProductViewSet.LOOKUP_MAX_PRODUCT_IDS}
+
+    def test_migration_paths_endpoint(self):
+        group1 = ProductMigrationSource.objects.create(name="Group One")
+        group2 = ProductMigrationSource.objects.create(name="Group Two", preference=100)
+        root_product = mixer.blend("productdb.Product", product_id="C2960XS", vendor=Vendor.objects.get(id=1))
+        p11 = mixer.blend("productdb.Product", product_id="C2960XL", vendor=Vendor.objects.get(id=1))
+        p12 = mixer.blend(
+            "productdb.Product",
+            product_id="C2960XT",
+            vendor=Vendor.objects.get(id=1),
+            eol_ext_announcement_date=date(2016, 1, 1),
+            end_of_sale_date=date(2016, 1, 1)
+        )
+        pmo1 = ProductMigrationOption.objects.create(
+            product=root_product, migration_source=group1, replacement_product_id=p11.product_id
+        )
+        pmo2 = ProductMigrationOption.objects.create(
+            product=root_product, migration_source=group2, replacement_product_id=p12.product_id
+        )
+        pmo3 = ProductMigrationOption.objects.create(
+            product=p12, migration_source=group2, replacement_product_id="Not in Database"
+        )
+
+        client = APIClient()
+        response = client.get(REST_PRODUCT_MIGRATION_PATHS + "?product_ids=C2960XS")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        client.login(**AUTH_USER)
+        response = client.get(REST_PRODUCT_MIGRATION_PATHS + "?product_ids=C2960XS,C2960XL,Unknown")
+
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert [e["product_id"] for e in jdata["data"]] == ["C2960XS", "C2960XL", "Unknown"]
+        assert jdata["data"][0]["id"] == root_product.id
+        assert jdata["data"][0]["migration_source"] == "Group Two"
+        assert [e["id"] for e in jdata["data"][0]["migration_path"]] == [pmo2.id, pmo3.id]
+        assert jdata["data"][0]["valid_replacement_product_id"] == "Not in Database"
+        assert jdata["data"][0]["valid_replacement_product"] is None
+        assert jdata["data"][1] == {
+            "product_id": "C2960XL",
+            "id": p11.id,
+            "migration_source": None,
+            "migration_path": [],
+            "valid_replacement_product_id": None,
+            "valid_replacement_product": None
+        }
+        assert jdata["data"][2]["id"] is None
+
+        # POST request with a specific migration source
+        response = client.post(REST_PRODUCT_MIGRATION_PATHS, data={
+            "product_ids": ["C2960XS"],
+            "migration_source": "Group One"
+        }, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert [e["id"] for e in jdata["data"][0]["migration_path"]] == [pmo1.id]
+        assert jdata["data"][0]["valid_replacement_product_id"] == "C2960XL"
+        assert jdata["data"][0]["valid_replacement_product"] == p11.id
+
+        # invalid requests
+        response = client.post(REST_PRODUCT_MIGRATION_PATHS, data={
+            "product_ids": ["C2960XS"],
+            "migration_source": "Unknown Group"
+        }, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(REST_PRODUCT_MIGRATION_PATHS, data={"product_ids": "C2960XS"}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_lifecycle_timeline_endpoint(self):
+        today = datetime.now().date()
+        mixer.blend("productdb.Product", product_id="C2960XS", vendor=Vendor.objects.get(id=1), end_of_sale_date=today)
+        mixer.blend("productdb.Product", product_id="C2960XL", vendor=Vendor.objects.get(id=1))
+
+        client = APIClient()
+        response = client.get(REST_PRODUCT_LIFECYCLE_TIMELINE)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        client.login(**AUTH_USER)
+        response = client.get(REST_PRODUCT_LIFECYCLE_TIMELINE + "?months=12")
+
+        assert response.status_code == status.HTTP_200_OK
+        jdata = response.json()
+        assert len(jdata["months"]) == 12
+        assert jdata["months"][0] == today.strftime("%Y-%m")
+        assert jdata["totals"]["eos"] == [1] + [0] * 11
+        assert jdata["totals"]["ldos"] == [0] * 12
+        assert len(jdata["data"]) == 1
+        assert jdata["data"][0]["vendor"] == "Cisco Systems"
+        assert jdata["data"][0]["product_group"] is None
+
+        response = client.get(REST_PRODUCT_LIFECYCLE_TIMELINE)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["months"]) == 36
+
+        for value in ["0", "121", "abc"]:
+            response = client.get(REST_PRODUCT_LIFECYCLE_TIMELINE + "?months=" + value)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     def test_search_field_by_product_id(self):
         expected_result = {
             "pagination": {
@@ -1836,6 +2385,54 @@ class TestProductAPIEndpoint:
 
         assert jdata == expected_result, "unexpected result from API endpoint"
 
+    def test_search_with_full_text_ranking(self):
+        Product.objects.create(product_id="product 1", description="Stackable switches with 24 ports")
+        Product.objects.create(product_id="product 2", description="switch with switch ports")
+        Product.objects.create(product_id="product 3", description="router")
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        # plain words also match the stemmed words within the description, ordered by the rank
+        response = client.get(REST_PRODUCT_LIST + "?search=" + quote("switch"))
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["product_id"] for e in response.json()["data"]] == ["product 2", "product 1"]
+
+        response = client.get(REST_PRODUCT_LIST + "?search=" + quote("switch stackable"))
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["product_id"] for e in response.json()["data"]] == ["product 1"]
+
+        # regular expressions are ordered by the Product ID
+        response = client.get(REST_PRODUCT_LIST + "?search=" + quote("^product [12]$"))
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["product_id"] for e in response.json()["data"]] == ["product 1", "product 2"]
+
+    def test_guarded_regex_search(self, monkeypatch):
+        Product.objects.create(product_id="product 1")
+
+        client = APIClient()
+        client.login(**AUTH_USER)
+
+        # regular expressions with an unbounded complexity are rejected
+        response = client.get(REST_PRODUCT_LIST + "?search=" + quote("(a+)+$"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "too complex" in response.json()["search"]
+
+        # cancelled search queries
+        @contextmanager
+        def statement_timeout_mock(milliseconds):
+            raise search.SearchTimeout()
+            yield
+
+        monkeypatch.setattr(search, "statement_timeout", statement_timeout_mock)
+        response = client.get(REST_PRODUCT_LIST + "?search=" + quote("^product"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"search": "the search took too long, please use a more specific search term"}
+
+        # requests without a search are not affected
+        response = client.get(REST_PRODUCT_LIST)
+        assert response.status_code == status.HTTP_200_OK
+
     def test_filter_id_field(self):
         expected_result = {
             "pagination": {
@@ -1,14 +1,20 @@
 """
 Test suite for the productdb.datatables module
 """
+import datetime
 import pytest
+from contextlib import contextmanager
 from urllib.parse import quote
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from mixer.backend.django import mixer
 from rest_framework import status
-from app.productdb.models import UserProfile, Vendor
+from app.productdb import datatables, search, utils
+from app.productdb.models import UserProfile, Vendor, Product
 
 pytestmark = pytest.mark.django_db
 
@@ -527,3 +533,326 @@ def test_list_products_json_datatables_endpoint():
     assert "recordsFiltered" in result_json
 
     assert result_json["data"][0]["list_price"] == 12.34
+
+
+def get_count_queries(context):
+    return [e for e in context.captured_queries if "COUNT(" in e["sql"] and "productdb_product" in e["sql"]]
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_cached_total_records_on_vendor_products_endpoint():
+    v1 = Vendor.objects.get(id=1)
+    v2 = Vendor.objects.get(id=2)
+    for e in range(1, 11):
+        mixer.blend("productdb.Product", product_id="Product %d" % e, vendor=v1)
+    mixer.blend("productdb.Product", vendor=v2)
+    url_v1 = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v1.id})
+    url_v2 = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v2.id})
+
+    client = Client()
+    with CaptureQueriesContext(connection) as context:
+        result_json = client.get(url_v1).json()
+    assert result_json["recordsTotal"] == 10
+    assert result_json["recordsFiltered"] == 10
+    # the filtered amount of records is not counted if no search is applied
+    assert len(get_count_queries(context)) == 1
+
+    # the total amount of records is cached per vendor
+    with CaptureQueriesContext(connection) as context:
+        result_json = client.get(url_v1 + "?" + quote("search[value]") + "=" + quote("Product 1")).json()
+    assert result_json["recordsTotal"] == 10
+    assert result_json["recordsFiltered"] == 2
+    assert len(get_count_queries(context)) == 1
+
+    assert client.get(url_v2).json()["recordsTotal"] == 1
+
+    # any write to the product data invalidates the cached value
+    mixer.blend("productdb.Product", vendor=v1)
+    assert client.get(url_v1).json()["recordsTotal"] == 11
+
+    Product.objects.filter(product_id="Product 10").delete()
+    assert client.get(url_v1).json()["recordsTotal"] == 10
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_approximate_total_records_on_list_products_view(settings, monkeypatch):
+    v1 = Vendor.objects.get(id=1)
+    for e in range(1, 11):
+        mixer.blend("productdb.Product", vendor=v1)
+    url = reverse('productdb:datatables_list_products_view')
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE productdb_product")
+    assert datatables.get_approximate_count(Product) == 10
+
+    # disabled by default
+    monkeypatch.setattr(datatables, "get_approximate_count", lambda model: 1000)
+    client = Client()
+    assert client.get(url).json()["recordsTotal"] == 10
+
+    settings.DATATABLES_APPROXIMATE_COUNT_THRESHOLD = 500
+    mixer.blend("productdb.Product", vendor=v1)
+    result_json = client.get(url).json()
+    assert result_json["recordsTotal"] == 1000
+    assert result_json["recordsFiltered"] == 1000
+
+    # the estimated value is only used for large tables
+    settings.DATATABLES_APPROXIMATE_COUNT_THRESHOLD = 5000
+    mixer.blend("productdb.Product", vendor=v1)
+    assert client.get(url).json()["recordsTotal"] == 12
+
+    # the estimated value is not used for the views of a vendor
+    settings.DATATABLES_APPROXIMATE_COUNT_THRESHOLD = 500
+    url = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v1.id})
+    assert client.get(url).json()["recordsTotal"] == 12
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_keyset_pagination_on_vendor_products_endpoint(monkeypatch):
+    v1 = Vendor.objects.get(id=1)
+    for e in range(1, 26):
+        mixer.blend("productdb.Product", product_id="Product %02d" % e, vendor=v1)
+    url = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v1.id})
+
+    def get_page(start, direction="asc", length=10):
+        params = {
+            "order[0][column]": 0,
+            "order[0][dir]": direction,
+            "start": start,
+            "length": length
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        queries = [e["sql"] for e in ctx.captured_queries if "productdb_product" in e["sql"] and "LIMIT" in e["sql"]]
+        return [e["product_id"] for e in response.json()["data"]], queries
+
+    client = Client()
+
+    # a direct jump to a page uses the OFFSET
+    product_ids, queries = get_page(20)
+    assert product_ids == ["Product %02d" % e for e in range(21, 26)]
+    assert "OFFSET" in queries[0]
+
+    # drop the cached responses (and the keys) of the previous requests
+    utils.increment_product_data_version(vendor_id=v1.id)
+
+    # sequential paging uses the sort key of the previous page
+    product_ids, queries = get_page(0)
+    assert product_ids == ["Product %02d" % e for e in range(1, 11)]
+
+    product_ids, queries = get_page(10)
+    assert product_ids == ["Product %02d" % e for e in range(11, 21)]
+    assert "OFFSET" not in queries[0]
+
+    product_ids, queries = get_page(20)
+    assert product_ids == ["Product %02d" % e for e in range(21, 26)]
+    assert "OFFSET" not in queries[0]
+
+    # descending order
+    get_page(0, "desc")
+    product_ids, queries = get_page(10, "desc")
+    assert product_ids == ["Product %02d" % e for e in range(15, 5, -1)]
+    assert "OFFSET" not in queries[0]
+
+    # any write to the product data invalidates the keys
+    mixer.blend("productdb.Product", product_id="Product 00", vendor=v1)
+    product_ids, queries = get_page(10)
+    assert product_ids == ["Product %02d" % e for e in range(10, 20)]
+    assert "OFFSET" in queries[0]
+
+    # a cached response restores the key for the next page
+    keyset_cache_keys = []
+    get_keyset_cache_key = datatables.KeysetPaginationMixin.get_keyset_cache_key
+
+    def get_keyset_cache_key_mock(self, start):
+        keyset_cache_keys.append(get_keyset_cache_key(self, start))
+        return keyset_cache_keys[-1]
+
+    monkeypatch.setattr(datatables.KeysetPaginationMixin, "get_keyset_cache_key", get_keyset_cache_key_mock)
+    get_page(0, length=15)
+    cache.delete(keyset_cache_keys[-1])
+    product_ids, queries = get_page(0, length=15)
+    assert not queries
+    product_ids, queries = get_page(15)
+    assert product_ids == ["Product %02d" % e for e in range(15, 25)]
+    assert "OFFSET" not in queries[0]
+
+    # columns that are not part of the keyset columns use the OFFSET
+    response = client.get(url, {"order[0][column]": 3, "order[0][dir]": "asc", "start": 10, "length": 10})
+    assert len(response.json()["data"]) == 10
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_product_row_projection_on_list_products_view():
+    v1 = Vendor.objects.get(id=1)
+    pg = mixer.blend("productdb.ProductGroup", name="Product Group", vendor=v1)
+    p1 = mixer.blend("productdb.Product", product_id="Product 1", vendor=v1, product_group=pg, list_price=12.34,
+                     currency="USD")
+    mixer.blend("productdb.Product", product_id="Product 2", vendor=v1, product_group=None)
+    url = reverse('productdb:datatables_list_products_view')
+
+    client = Client()
+    client.get(url)
+
+    # the names of the Vendor and the Product Group are part of the query for the page
+    with CaptureQueriesContext(connection) as context:
+        result_json = client.get(url, {"order[0][column]": 1, "order[0][dir]": "asc"}).json()
+    assert len([e for e in context.captured_queries if "productdb_product" in e["sql"]]) == 1
+
+    assert result_json["data"][0]["vendor"] == "Cisco Systems"
+    assert result_json["data"][0]["product_group"] == "Product Group"
+    assert result_json["data"][0]["product_group_id"] == pg.id
+    assert result_json["data"][0]["list_price"] == 12.34
+    assert result_json["data"][1]["product_group"] == ""
+    assert result_json["data"][1]["product_group_id"] == ""
+    assert len(result_json["data"][0]) == 23
+
+    # only the columns within the request are returned (including the keys that are required to render the column)
+    result_json = client.get(url, {
+        "columns[0][data]": "product_id",
+        "columns[1][data]": "list_price",
+        "order[0][column]": 1,
+        "order[0][dir]": "asc"
+    }).json()
+    assert result_json["data"][0] == {"id": p1.id, "product_id": "Product 1", "list_price": 12.34, "currency": "USD"}
+
+    # all keys are returned if a column uses no key as data source
+    result_json = client.get(url, {"columns[0][data]": "product_id", "columns[1][data]": "1"}).json()
+    assert len(result_json["data"][0]) == 23
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_product_row_projection_on_products_by_group_view():
+    pg = mixer.blend("productdb.ProductGroup", name="Product Group", vendor=Vendor.objects.get(id=1))
+    mixer.blend("productdb.Product", product_id="Product 1", vendor=pg.vendor, product_group=pg)
+    url = reverse('productdb:datatables_list_products_by_group_view', kwargs={"product_group_id": pg.id})
+
+    result_json = Client().get(url).json()
+    assert "vendor" not in result_json["data"][0]
+    assert "product_group" not in result_json["data"][0]
+    assert result_json["data"][0]["product_id"] == "Product 1"
+    assert result_json["data"][0]["lifecycle_state"] is None
+
+
+@pytest.mark.usefixtures("import_default_users")
+@pytest.mark.usefixtures("import_default_vendors")
+def test_guarded_regex_search_on_list_products_view(monkeypatch):
+    for e in range(1, 4):
+        mixer.blend("productdb.Product", product_id="Product 0%d" % e)
+    mixer.blend("productdb.Product", product_id="Product 0[1-2]")
+    url = reverse('productdb:datatables_list_products_view')
+
+    up = UserProfile.objects.get(user=User.objects.get(username=AUTH_USER["username"]))
+    up.regex_search = True
+    up.save()
+
+    client = Client()
+    client.login(**AUTH_USER)
+
+    response = client.get(url + "?" + quote("search[value]") + "=" + quote("Product 0[1-2]"))
+    assert response.json()["recordsFiltered"] == 2
+
+    # regular expressions with an unbounded complexity are used as plain text
+    response = client.get(url + "?" + quote("search[value]") + "=" + quote("(Product 0+)+"))
+    assert "error" not in response.json()
+    assert response.json()["recordsFiltered"] == 0
+
+    # if the regular expression search is cancelled, the plain text search is used
+    @contextmanager
+    def statement_timeout_mock(milliseconds):
+        raise search.SearchTimeout()
+        yield
+
+    statement_timeout = search.statement_timeout
+    monkeypatch.setattr(search, "statement_timeout", statement_timeout_mock)
+    utils.increment_product_data_version()  # drop the cached response of the first search
+    response = client.get(url + "?" + quote("search[value]") + "=" + quote("Product 0[1-2]"))
+    assert "error" not in response.json()
+    assert response.json()["recordsFiltered"] == 1
+    assert response.json()["data"][0]["product_id"] == "Product 0[1-2]"
+    assert response.json()["regex_search_timed_out"] is True
+
+    # the plain text result is not cached for the regular expression search
+    monkeypatch.setattr(search, "statement_timeout", statement_timeout)
+    response = client.get(url + "?" + quote("search[value]") + "=" + quote("Product 0[1-2]"))
+    assert response.json()["recordsFiltered"] == 2
+    assert "regex_search_timed_out" not in response.json()
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_typed_column_search_on_vendor_products_endpoint():
+    v1 = Vendor.objects.get(id=1)
+    mixer.blend("productdb.Product", product_id="Product 1", vendor=v1, list_price=50.0,
+                end_of_sale_date=datetime.date(2016, 6, 1))
+    mixer.blend("productdb.Product", product_id="Product 2", vendor=v1, list_price=500.0,
+                end_of_sale_date=datetime.date(2017, 3, 31))
+    mixer.blend("productdb.Product", product_id="Product 3", vendor=v1, list_price=5000.0)
+    url = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v1.id})
+
+    client = Client()
+
+    def get_product_ids(column, value):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {"columns[%d][search][value]" % column: value})
+        assert response.status_code == status.HTTP_200_OK
+        # native comparisons without a text cast of the column
+        assert not [e for e in context.captured_queries if "::text" in e["sql"]]
+        return sorted([e["product_id"] for e in response.json()["data"]])
+
+    # list price column
+    assert get_product_ids(3, "100-500") == ["Product 2"]
+    assert get_product_ids(3, ">500") == ["Product 3"]
+    assert get_product_ids(3, "<=500") == ["Product 1", "Product 2"]
+
+    # End-of-Sale date column
+    assert get_product_ids(7, "2017") == ["Product 2"]
+    assert get_product_ids(7, "2016-06..2017-03") == ["Product 1", "Product 2"]
+
+
+@pytest.mark.usefixtures("import_default_users")
+@pytest.mark.usefixtures("import_default_vendors")
+def test_cached_response_on_vendor_products_endpoint():
+    v1 = Vendor.objects.get(id=1)
+    v2 = Vendor.objects.get(id=2)
+    p1 = mixer.blend("productdb.Product", product_id="Product 1", vendor=v1)
+    mixer.blend("productdb.Product", product_id="Product 2", vendor=v2)
+    url = reverse('productdb:datatables_vendor_products_endpoint', kwargs={"vendor_id": v1.id})
+
+    client = Client()
+    result_json = client.get(url, {"draw": 1}).json()
+    assert result_json["draw"] == 1
+    assert result_json["recordsTotal"] == 1
+
+    # same parameters (the draw counter and the jQuery cache buster are ignored)
+    with CaptureQueriesContext(connection) as context:
+        result_json = client.get(url, {"draw": 2, "_": "12345"}).json()
+    assert not [e for e in context.captured_queries if "productdb_product" in e["sql"]]
+    assert result_json["draw"] == 2
+    assert result_json["data"][0]["product_id"] == "Product 1"
+
+    # the regular expression search setting of the user is part of the key
+    up = UserProfile.objects.get(user=User.objects.get(username=AUTH_USER["username"]))
+    up.regex_search = True
+    up.save()
+    client.login(**AUTH_USER)
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    assert [e for e in context.captured_queries if "productdb_product" in e["sql"]]
+
+    # writes to the products of other vendors don't invalidate the response
+    mixer.blend("productdb.Product", product_id="Product 3", vendor=v2)
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    assert not [e for e in context.captured_queries if "productdb_product" in e["sql"]]
+
+    # changes of the product data of the vendor invalidate the response
+    p1.description = "new description"
+    p1.save()
+    result_json = client.get(url).json()
+    assert result_json["data"][0]["description"] == "new description"
+
+    # the previous vendor of a product is also invalidated
+    p1.vendor = v2
+    p1.save()
+    assert client.get(url).json()["recordsTotal"] == 0
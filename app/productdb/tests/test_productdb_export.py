@@ -0,0 +1,63 @@
+"""
+Test suite for the productdb.export module
+"""
+import datetime
+import json
+import pytest
+import xlrd
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from app.productdb import export
+from app.productdb.models import Product, Vendor
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestExport:
+    def create_products(self):
+        v = Vendor.objects.get(id=1)
+        for e in range(1, 6):
+            mixer.blend(
+                "productdb.Product", product_id="Product %d" % e, vendor=v, list_price=e * 10,
+                end_of_sale_date=datetime.date(2017, 3, e)
+            )
+
+    def test_iter_rows(self):
+        self.create_products()
+
+        # the Products are read in chunks ordered by ID
+        with CaptureQueriesContext(connection) as context:
+            rows = list(export.iter_rows(Product.objects.all(), ["product_id"], chunk_size=2))
+        assert rows == [(e,) for e in Product.objects.order_by("id").values_list("product_id", flat=True)]
+        assert len([e for e in context.captured_queries if "productdb_product" in e["sql"]]) == 3
+
+        rows = list(export.iter_rows(Product.objects.filter(product_id__in=["Product 2", "Product 4"]), ["product_id"]))
+        assert sorted(rows) == [("Product 2",), ("Product 4",)]
+
+    def test_export_formats(self):
+        self.create_products()
+        field_names = ["product_id", "list_price", "end_of_sale_date", "vendor"]
+
+        response = export.get_export_response(Product.objects.all(), export.EXPORT_FORMAT_CSV, field_names)
+        assert response["Content-Type"] == "text/csv"
+        assert response["Content-Disposition"] == 'attachment; filename="products.csv"'
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert lines[0] == "product_id,list_price,end_of_sale_date,vendor"
+        assert "Product 1,10.00,2017-03-01,1" in lines
+        assert len(lines) == 6
+
+        response = export.get_export_response(Product.objects.all(), export.EXPORT_FORMAT_JSON_LINES, field_names)
+        rows = [json.loads(e) for e in b"".join(response.streaming_content).decode().splitlines()]
+        assert len(rows) == 5
+        assert {
+            "product_id": "Product 1", "list_price": "10.00", "end_of_sale_date": "2017-03-01", "vendor": 1
+        } in rows
+
+        response = export.get_export_response(Product.objects.all(), export.EXPORT_FORMAT_XLSX, field_names)
+        workbook = xlrd.open_workbook(file_contents=b"".join(response.streaming_content))
+        sheet = workbook.sheet_by_index(0)
+        assert sheet.nrows == 6
+        assert sheet.row_values(0) == field_names
+        assert ["Product 1", "10.00", "2017-03-01", "1"] in [sheet.row_values(e) for e in range(1, 6)]
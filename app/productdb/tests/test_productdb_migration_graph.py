@@ -0,0 +1,102 @@
+"""
+Test suite for the productdb.migration_graph module
+"""
+import pytest
+import datetime
+from mixer.backend.django import mixer
+from app.productdb.migration_graph import MigrationGraph
+from app.productdb.models import ProductMigrationSource, ProductMigrationOption, ProductMigrationPath, Vendor
+
+pytestmark = pytest.mark.django_db
+
+
+def create_eol_product(product_id):
+    return mixer.blend(
+        "productdb.Product",
+        product_id=product_id,
+        vendor=Vendor.objects.get(id=1),
+        eol_ext_announcement_date=datetime.date(2016, 1, 1),
+        end_of_sale_date=datetime.date(2016, 1, 1)
+    )
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestMigrationGraph:
+    def test_resolve_chain(self):
+        source = ProductMigrationSource.objects.create(name="Group One")
+        p1 = create_eol_product("Product 1")
+        p2 = create_eol_product("Product 2")
+        p3 = mixer.blend("productdb.Product", product_id="Product 3", vendor=Vendor.objects.get(id=1))
+        pmo1 = ProductMigrationOption.objects.create(
+            product=p1, migration_source=source, replacement_product_id=p2.product_id
+        )
+        pmo2 = ProductMigrationOption.objects.create(
+            product=p2, migration_source=source, replacement_product_id=p3.product_id
+        )
+
+        graph = MigrationGraph(migration_source=source)
+
+        assert len(graph) == 2
+        assert graph.get_option(p1.id, source.id) == pmo1
+        assert graph.get_option(p3.id, source.id) is None
+        assert graph.get_migration_path(p1.id, source.id) == [pmo1, pmo2]
+        assert graph.get_migration_path(p2.id, source.id) == [pmo2]
+        assert graph.get_migration_path(p3.id, source.id) == []
+        assert graph.cycles == []
+
+        result = graph.resolve_all()
+        assert result == {
+            (p1.id, source.id): [pmo1, pmo2],
+            (p2.id, source.id): [pmo2]
+        }
+
+        # memoized, the resolution requires no additional lookups
+        assert graph.resolve(pmo1) is result[(p1.id, source.id)]
+
+    def test_lazy_loading(self):
+        source = ProductMigrationSource.objects.create(name="Group One")
+        p1 = create_eol_product("Product 1")
+        p2 = create_eol_product("Product 2")
+        pmo1 = ProductMigrationOption.objects.create(
+            product=p1, migration_source=source, replacement_product_id=p2.product_id
+        )
+        pmo2 = ProductMigrationOption.objects.create(
+            product=p2, migration_source=source, replacement_product_id="Product 3"
+        )
+
+        graph = MigrationGraph(product_migration_options=[pmo1])
+        assert graph.get_migration_path(p1.id, source.id) == [pmo1]
+
+        graph = MigrationGraph(product_migration_options=[pmo1], lazy=True)
+        assert graph.get_migration_path(p1.id, source.id) == [pmo1, pmo2]
+
+    def test_cycle_detection(self):
+        source = ProductMigrationSource.objects.create(name="Group One")
+        p0 = create_eol_product("Product 0")
+        p1 = create_eol_product("Product 1")
+        p2 = create_eol_product("Product 2")
+        pmo0 = ProductMigrationOption.objects.create(
+            product=p0, migration_source=source, replacement_product_id=p1.product_id
+        )
+        pmo1 = ProductMigrationOption.objects.create(
+            product=p1, migration_source=source, replacement_product_id=p2.product_id
+        )
+        pmo2 = ProductMigrationOption.objects.create(
+            product=p2, migration_source=source, replacement_product_id=p1.product_id
+        )
+
+        graph = MigrationGraph()
+        assert graph.get_migration_path(p0.id, source.id) == [pmo0, pmo1, pmo2]
+        assert graph.get_migration_path(p1.id, source.id) == [pmo1, pmo2]
+        assert graph.get_migration_path(p2.id, source.id) == [pmo2, pmo1]
+        assert graph.cycles == [[pmo1, pmo2]]
+
+        graph = MigrationGraph()
+        assert len(graph.resolve_all()) == 3
+        assert len(graph.cycles) == 1
+
+        # the materialized migration paths are computed using the same graph
+        mp = ProductMigrationPath.objects.get(product=p0, migration_source=source)
+        assert mp.path_option_ids == [pmo0.id, pmo1.id, pmo2.id]
+        assert mp.valid_replacement_product is None
+        assert p0.get_migration_path() == [pmo0, pmo1, pmo2]
@@ -12,8 +12,10 @@ from django.core.files import File
 from django.db.models import QuerySet
 from mixer.backend.django import mixer
 from app.productdb.models import Vendor, ProductList, JobFile, Product, UserProfile, ProductGroup, ProductMigrationSource, \
-    ProductMigrationOption, ProductCheck, ProductCheckEntry, ProductCheckInputChunks
+    ProductMigrationOption, ProductCheck, ProductCheckEntry, ProductCheckInputChunks, ProductMigrationPath, \
+    ChangeLogEntry
 from django.utils.timezone import datetime
+from app.productdb import bulk
 
 pytestmark = pytest.mark.django_db
 
@@ -271,6 +273,53 @@ class TestProduct:
         p.end_of_support_date = _datetime.date.today()
         assert p.current_lifecycle_states == [Product.END_OF_SUPPORT_STR]
 
+    def test_lifecycle_state_annotation(self):
+        today = _datetime.date.today()
+        yesterday = today - _datetime.timedelta(days=1)
+        tomorrow = today + _datetime.timedelta(days=1)
+        products = [
+            Product.objects.create(product_id="No Data"),
+            Product.objects.create(product_id="No EoL", eox_update_time_stamp=today),
+            Product.objects.create(product_id="EoS announced", eol_ext_announcement_date=yesterday,
+                                   end_of_sale_date=tomorrow),
+            Product.objects.create(product_id="EoS", eol_ext_announcement_date=yesterday, end_of_sale_date=today),
+            Product.objects.create(product_id="EoS with EoSWM", eol_ext_announcement_date=yesterday,
+                                   end_of_sale_date=yesterday, end_of_sw_maintenance_date=today,
+                                   end_of_support_date=tomorrow),
+            Product.objects.create(product_id="EoS and all", eol_ext_announcement_date=yesterday,
+                                   end_of_sale_date=yesterday, end_of_new_service_attachment_date=yesterday,
+                                   end_of_sw_maintenance_date=yesterday, end_of_routine_failure_analysis=yesterday,
+                                   end_of_service_contract_renewal=yesterday, end_of_sec_vuln_supp_date=yesterday),
+            Product.objects.create(product_id="EoSupport", eol_ext_announcement_date=yesterday,
+                                   end_of_sale_date=yesterday, end_of_sw_maintenance_date=yesterday,
+                                   end_of_support_date=today),
+        ]
+
+        # the annotation must return the same result as the property
+        expected_states = {p.product_id: p.current_lifecycle_states for p in products}
+        for p in Product.objects.with_lifecycle_state():
+            assert Product.get_annotated_lifecycle_states(p) == expected_states[p.product_id], p.product_id
+
+        for values in Product.objects.with_lifecycle_state().values():
+            assert Product.get_annotated_lifecycle_states(values) == expected_states[values["product_id"]]
+
+        # the state is computed against the given date
+        p = Product.objects.with_lifecycle_state(today=yesterday - _datetime.timedelta(days=1)).get(product_id="EoS")
+        assert Product.get_annotated_lifecycle_states(p) == [Product.EOS_ANNOUNCED_STR]
+
+        # filter, sort and count by lifecycle state
+        assert Product.objects.filter_lifecycle_state(Product.END_OF_SALE_STR).count() == 3
+        assert Product.objects.filter_lifecycle_state(Product.END_OF_SW_MAINTENANCE_RELEASES_STR).count() == 2
+        assert Product.objects.filter_lifecycle_state(
+            Product.NO_EOL_ANNOUNCEMENT_STR,
+            Product.END_OF_SUPPORT_STR
+        ).count() == 2
+        assert list(Product.objects.with_lifecycle_state().order_by(
+            "-lifecycle_state_order", "product_id"
+        ).values_list("product_id", flat=True)) == [
+            "EoSupport", "EoS", "EoS and all", "EoS with EoSWM", "EoS announced", "No EoL", "No Data"
+        ]
+
     def test_product_id_unique_constraint(self):
         test_name = "my product id"
         mixer.blend("productdb.Product", product_id=test_name)
@@ -1361,3 +1410,262 @@ class TestProductMigrationOption:
         assert pmo3.is_replacement_in_db() is False
         assert pmo3.get_product_replacement_id() is None
         assert pmo3.replacement_db_product is None
+
+    def test_update_replacement_db_products(self):
+        p = mixer.blend("productdb.Product", product_id="My Product ID", vendor=Vendor.objects.get(id=1))
+        promiggrp = ProductMigrationSource.objects.create(name="Test")
+        pmo = ProductMigrationOption.objects.create(
+            product=p,
+            migration_source=promiggrp,
+            replacement_product_id="replaced product"
+        )
+        assert pmo.is_replacement_in_db() is False
+
+        # the relation is updated if the replacement product is created
+        repl_p = mixer.blend("productdb.Product", product_id="replaced product", vendor=Vendor.objects.get(id=1))
+        pmo = ProductMigrationOption.objects.get(id=pmo.id)
+        assert pmo.replacement_db_product == repl_p
+
+        # nothing to update
+        assert ProductMigrationOption.objects.update_replacement_db_products([repl_p]) == set()
+        assert ProductMigrationOption.objects.update_replacement_db_products([]) == set()
+
+        # the relation is removed if the product ID of the replacement product changes
+        repl_p.product_id = "renamed product"
+        repl_p.save()
+        pmo = ProductMigrationOption.objects.get(id=pmo.id)
+        assert pmo.is_replacement_in_db() is False
+
+        # relink all options (batch), the Product was renamed without signals
+        Product.objects.filter(id=repl_p.id).update(product_id="replaced product")
+        assert ProductMigrationOption.objects.update_replacement_db_products() == {p.id}
+        pmo = ProductMigrationOption.objects.get(id=pmo.id)
+        assert pmo.replacement_db_product == repl_p
+
+        # an option is never linked with its own Product
+        Product.objects.filter(id=repl_p.id).update(product_id="renamed product")
+        Product.objects.filter(id=p.id).update(product_id="replaced product")
+        assert ProductMigrationOption.objects.update_replacement_db_products() == {p.id}
+        pmo = ProductMigrationOption.objects.get(id=pmo.id)
+        assert pmo.replacement_db_product is None
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestProductMigrationPath:
+    """Test the materialized migration paths"""
+    @staticmethod
+    def create_migration_chain():
+        group1 = ProductMigrationSource.objects.create(name="Group One")
+        group2 = ProductMigrationSource.objects.create(name="Group Two", preference=100)
+        root_product = mixer.blend("productdb.Product", product_id="C2960XS", vendor=Vendor.objects.get(id=1))
+        p11 = mixer.blend("productdb.Product", product_id="C2960XL", vendor=Vendor.objects.get(id=1))
+        p12 = mixer.blend("productdb.Product", product_id="C2960XT", vendor=Vendor.objects.get(id=1))
+        p23 = mixer.blend("productdb.Product", product_id="C2960XR", vendor=Vendor.objects.get(id=1))
+        ProductMigrationOption.objects.create(
+            product=root_product,
+            migration_source=group1,
+            replacement_product_id=p11.product_id
+        )
+        ProductMigrationOption.objects.create(
+            product=root_product,
+            migration_source=group2,
+            replacement_product_id=p12.product_id
+        )
+        ProductMigrationOption.objects.create(
+            product=p12,
+            migration_source=group2,
+            replacement_product_id=p23.product_id
+        )
+
+        return group1, group2, root_product, p11, p12, p23
+
+    def test_model(self):
+        group1, group2, root_product, p11, p12, p23 = self.create_migration_chain()
+
+        assert ProductMigrationPath.objects.count() == 3
+        assert ProductMigrationPath.objects.filter(product=p11).count() == 0, "p11 has no migration options"
+
+        mp = ProductMigrationPath.objects.get(product=root_product, migration_source=group2)
+        pmo = ProductMigrationOption.objects.get(product=root_product, migration_source=group2)
+        assert str(mp) == "migration path for %d" % root_product.id
+        assert mp.path_option_ids == [pmo.id]
+        assert mp.get_migration_options() == [pmo]
+        assert mp.replacement_option == pmo
+        assert mp.valid_replacement_product == p12
+        assert mp.is_preferred is True
+
+        mp = ProductMigrationPath.objects.get(product=root_product, migration_source=group1)
+        assert mp.is_preferred is False
+        assert mp.valid_replacement_product == p11
+
+    def test_update_if_replacement_product_changes(self):
+        group1, group2, root_product, p11, p12, p23 = self.create_migration_chain()
+
+        # the replacement option is now end of life
+        p12.eol_ext_announcement_date = _datetime.date(2016, 1, 1)
+        p12.end_of_sale_date = _datetime.date(2016, 1, 1)
+        p12.save()
+
+        mp = ProductMigrationPath.objects.get(product=root_product, migration_source=group2)
+        assert [e.replacement_product_id for e in mp.get_migration_options()] == ["C2960XT", "C2960XR"]
+        assert mp.replacement_option == ProductMigrationOption.objects.get(product=p12, migration_source=group2)
+        assert mp.valid_replacement_product == p23
+
+        # drop the last replacement product from the database, the replacement is still valid but not in the database
+        p23.delete()
+
+        mp = ProductMigrationPath.objects.get(product=root_product, migration_source=group2)
+        assert [e.replacement_product_id for e in mp.get_migration_options()] == ["C2960XT", "C2960XR"]
+        assert mp.valid_replacement_product is None
+        assert mp.replacement_option.is_valid_replacement() is True
+
+    def test_update_if_product_migration_option_changes(self):
+        group1, group2, root_product, p11, p12, p23 = self.create_migration_chain()
+
+        # a new option in the middle of the chain of group one
+        p11.end_of_sale_date = _datetime.date(2016, 1, 1)
+        p11.eol_ext_announcement_date = _datetime.date(2016, 1, 1)
+        p11.save()
+        pmo = ProductMigrationOption.objects.create(
+            product=p11,
+            migration_source=group1,
+            replacement_product_id="Not in Database"
+        )
+
+        assert [e.id for e in root_product.get_migration_path(group1.name)] == [
+            ProductMigrationOption.objects.get(product=root_product, migration_source=group1).id,
+            pmo.id
+        ]
+
+        pmo.delete()
+
+        assert [e.replacement_product_id for e in root_product.get_migration_path(group1.name)] == ["C2960XL"]
+        assert ProductMigrationPath.objects.filter(product=p11).count() == 0
+
+    def test_update_if_migration_source_preference_changes(self):
+        group1, group2, root_product, p11, p12, p23 = self.create_migration_chain()
+
+        assert root_product.get_preferred_replacement_option().migration_source == group2
+
+        group1.preference = 100
+        group1.save()
+        group2.preference = 25
+        group2.save()
+
+        assert root_product.get_preferred_replacement_option().migration_source == group1
+        assert ProductMigrationPath.objects.get(product=root_product, is_preferred=True).migration_source == group1
+
+        group1.preference = 10
+        group1.save()
+
+        assert root_product.get_preferred_replacement_option() is None
+        assert root_product.get_migration_path() == []
+        assert ProductMigrationPath.objects.filter(is_preferred=True).count() == 0
+
+    def test_rebuild(self):
+        group1, group2, root_product, p11, p12, p23 = self.create_migration_chain()
+        expected_paths = list(ProductMigrationPath.objects.order_by("product", "migration_source").values_list(
+            "product", "migration_source", "path", "valid_replacement_product", "is_preferred"
+        ))
+
+        ProductMigrationPath.objects.all().delete()
+        assert root_product.get_migration_path() == []
+
+        ProductMigrationPath.objects.rebuild()
+
+        assert list(ProductMigrationPath.objects.order_by("product", "migration_source").values_list(
+            "product", "migration_source", "path", "valid_replacement_product", "is_preferred"
+        )) == expected_paths
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+@pytest.mark.usefixtures("import_default_users")
+class TestChangeLogEntry:
+    """Test the change log that is written by the receivers"""
+    @staticmethod
+    def get_changes(since=0):
+        return list(ChangeLogEntry.objects.filter(id__gt=since).values_list("object_type", "object_id", "action"))
+
+    def test_model(self):
+        ChangeLogEntry.objects.log_changes(Product, [1, 2], ChangeLogEntry.ACTION_DELETED)
+        ChangeLogEntry.objects.log_changes(Product, [], ChangeLogEntry.ACTION_DELETED)
+
+        assert self.get_changes() == [("product", 1, "deleted"), ("product", 2, "deleted")]
+        assert str(ChangeLogEntry.objects.first()) == "product 1 deleted"
+
+        # the entries contain the ID of the writing transaction, the changes of the current transaction are part of
+        # the feed
+        assert len(set(ChangeLogEntry.objects.values_list("transaction_id", flat=True))) == 1
+        assert ChangeLogEntry.objects.get_feed().count() == 2
+
+    def test_receivers(self):
+        v = Vendor.objects.get(id=1)
+        pg = ProductGroup.objects.create(name="Group", vendor=v)
+        p = Product.objects.create(product_id="Product", vendor=v, product_group=pg)
+        pmo = ProductMigrationOption.objects.create(
+            product=p,
+            migration_source=ProductMigrationSource.objects.create(name="Source"),
+            replacement_product_id="Replacement"
+        )
+        pl = ProductList.objects.create(
+            name="List",
+            string_product_list="Product",
+            update_user=User.objects.get(username="api")
+        )
+        assert self.get_changes() == [
+            ("productgroup", pg.id, "created"),
+            ("product", p.id, "created"),
+            ("productmigrationoption", pmo.id, "created"),
+            ("productlist", pl.id, "created"),
+        ]
+        last_id = ChangeLogEntry.objects.last().id
+
+        p.description = "changed"
+        p.save()
+        pl.delete()
+        assert self.get_changes(last_id) == [("product", p.id, "updated"), ("productlist", pl.id, "deleted")]
+        last_id = ChangeLogEntry.objects.last().id
+
+        # the Product Group is removed from the Product without a save signal
+        pg.delete()
+        assert self.get_changes(last_id) == [("product", p.id, "updated"), ("productgroup", pg.id, "deleted")]
+        last_id = ChangeLogEntry.objects.last().id
+
+        # the Product Migration Options are deleted with the Product
+        p.delete()
+        assert set(self.get_changes(last_id)) == {
+            ("product", p.id, "deleted"),
+            ("productmigrationoption", pmo.id, "deleted")
+        }
+
+    def test_migration_option_updates_without_save_signal(self):
+        v = Vendor.objects.get(id=1)
+        pmo = ProductMigrationOption.objects.create(
+            product=Product.objects.create(product_id="Product", vendor=v),
+            migration_source=ProductMigrationSource.objects.create(name="Source"),
+            replacement_product_id="Replacement"
+        )
+        last_id = ChangeLogEntry.objects.last().id
+
+        # the option is linked with the new replacement Product (raw UPDATE statement)
+        r = Product.objects.create(product_id="Replacement", vendor=v)
+        assert set(self.get_changes(last_id)) == {
+            ("product", r.id, "created"),
+            ("productmigrationoption", pmo.id, "updated")
+        }
+        last_id = ChangeLogEntry.objects.last().id
+
+        # the replacement Product is removed from the option (SET_NULL)
+        r.delete()
+        assert set(self.get_changes(last_id)) == {
+            ("product", r.id, "deleted"),
+            ("productmigrationoption", pmo.id, "updated")
+        }
+        r = Product.objects.create(product_id="Replacement", vendor=v)
+        last_id = ChangeLogEntry.objects.last().id
+
+        bulk.delete_products([{"id": r.id}])
+        assert set(self.get_changes(last_id)) == {
+            ("product", r.id, "deleted"),
+            ("productmigrationoption", pmo.id, "updated")
+        }
@@ -0,0 +1,188 @@
+"""
+Test suite for the productdb.reports module
+"""
+import datetime
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from app.config.models import NotificationMessage
+from app.productdb import reports
+from app.productdb.models import Vendor, ProductGroup
+from django_project import cache as protected_cache
+
+pytestmark = pytest.mark.django_db
+
+
+def test_add_months():
+    assert reports.add_months(datetime.date(2017, 3, 15), 0) == datetime.date(2017, 3, 1)
+    assert reports.add_months(datetime.date(2017, 3, 15), 9) == datetime.date(2017, 12, 1)
+    assert reports.add_months(datetime.date(2017, 3, 15), 10) == datetime.date(2018, 1, 1)
+    assert reports.add_months(datetime.date(2017, 12, 31), 36) == datetime.date(2020, 12, 1)
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestLifecycleTimeline:
+    TODAY = datetime.date(2017, 3, 15)
+
+    def test_lifecycle_timeline(self):
+        v1 = Vendor.objects.get(id=1)
+        v2 = Vendor.objects.get(id=2)
+        group = ProductGroup.objects.create(name="Catalyst 2960", vendor=v1)
+        mixer.blend(
+            "productdb.Product", product_id="Product 1", vendor=v1, product_group=group,
+            end_of_sale_date=datetime.date(2017, 3, 1), end_of_support_date=datetime.date(2020, 2, 29)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 2", vendor=v1, product_group=group,
+            end_of_sale_date=datetime.date(2017, 3, 31), end_of_support_date=datetime.date(2020, 3, 1)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 3", vendor=v1,
+            end_of_sale_date=datetime.date(2018, 1, 10), end_of_support_date=datetime.date(2023, 1, 1)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 4", vendor=v2,
+            end_of_sale_date=datetime.date(2017, 2, 28), end_of_support_date=datetime.date(2017, 4, 1)
+        )
+        mixer.blend("productdb.Product", product_id="Product 5", vendor=v2)
+
+        result = reports.get_lifecycle_timeline(today=self.TODAY)
+
+        assert len(result["months"]) == 36
+        assert result["months"][0] == "2017-03"
+        assert result["months"][-1] == "2020-02"
+        assert list(result["milestones"].keys()) == ["eos", "ldos"]
+
+        # Products without a Product Group are listed after the Product Groups of the Vendor
+        assert [(e["vendor_id"], e["product_group"]) for e in result["data"]] == [
+            (1, "Catalyst 2960"), (1, None), (2, None)
+        ]
+        assert result["data"][0]["eos"][0] == 2
+        assert sum(result["data"][0]["eos"]) == 2
+        assert result["data"][0]["ldos"][35] == 1
+        assert sum(result["data"][0]["ldos"]) == 1
+        assert result["data"][1]["eos"][10] == 1
+        assert sum(result["data"][1]["ldos"]) == 0
+        assert sum(result["data"][2]["eos"]) == 0
+        assert result["data"][2]["ldos"][1] == 1
+
+        assert result["totals"]["eos"][0] == 2
+        assert sum(result["totals"]["eos"]) == 3
+        assert sum(result["totals"]["ldos"]) == 2
+
+        result = reports.get_lifecycle_timeline(months=1, today=self.TODAY)
+        assert result["months"] == ["2017-03"]
+        assert result["totals"] == {"eos": [2], "ldos": [0]}
+
+        with pytest.raises(ValueError):
+            reports.get_lifecycle_timeline(months=0)
+
+        with pytest.raises(ValueError):
+            reports.get_lifecycle_timeline(months=reports.LIFECYCLE_TIMELINE_MAX_MONTHS + 1)
+
+    def test_lifecycle_timeline_cache(self):
+        v1 = Vendor.objects.get(id=1)
+        p = mixer.blend(
+            "productdb.Product", product_id="Product 1", vendor=v1, end_of_sale_date=datetime.date(2017, 5, 1)
+        )
+
+        result = reports.get_lifecycle_timeline(today=self.TODAY)
+        assert sum(result["totals"]["eos"]) == 1
+
+        # the cached result is used as long as the product data doesn't change
+        with CaptureQueriesContext(connection) as context:
+            assert reports.get_lifecycle_timeline(today=self.TODAY) == result
+        assert not [e for e in context.captured_queries if "productdb_product" in e["sql"]]
+
+        # any change of a Product, Product Group or Vendor invalidates the result
+        p.end_of_sale_date = datetime.date(2016, 5, 1)
+        p.save()
+        assert sum(reports.get_lifecycle_timeline(today=self.TODAY)["totals"]["eos"]) == 0
+
+        group = ProductGroup.objects.create(name="Catalyst 2960", vendor=v1)
+        mixer.blend(
+            "productdb.Product", product_id="Product 2", vendor=v1, product_group=group,
+            end_of_sale_date=datetime.date(2017, 5, 1)
+        )
+        assert reports.get_lifecycle_timeline(today=self.TODAY)["data"][0]["product_group"] == "Catalyst 2960"
+
+        group.name = "Catalyst 2960X"
+        group.save()
+        assert reports.get_lifecycle_timeline(today=self.TODAY)["data"][0]["product_group"] == "Catalyst 2960X"
+
+        v1.name = "Cisco"
+        v1.save()
+        assert reports.get_lifecycle_timeline(today=self.TODAY)["data"][0]["vendor"] == "Cisco"
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestHomepageContext:
+    def test_product_statistics(self):
+        today = datetime.date(2017, 3, 15)
+        v1 = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="Product 1", vendor=v1, list_price=None)
+        mixer.blend(
+            "productdb.Product", product_id="Product 2", vendor=v1, list_price=1.0,
+            eox_update_time_stamp=datetime.date(2017, 1, 1)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 3", vendor=v1, list_price=None,
+            eox_update_time_stamp=datetime.date(2017, 1, 1),
+            eol_ext_announcement_date=datetime.date(2017, 1, 1),
+            end_of_sale_date=datetime.date(2017, 6, 1)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 4", vendor=v1, list_price=None,
+            eol_ext_announcement_date=datetime.date(2016, 1, 1),
+            end_of_sale_date=datetime.date(2016, 6, 1)
+        )
+        mixer.blend(
+            "productdb.Product", product_id="Product 5", vendor=v1, list_price=None,
+            eol_ext_announcement_date=datetime.date(2016, 1, 1),
+            end_of_sale_date=datetime.date(2016, 6, 1),
+            end_of_support_date=datetime.date(2017, 3, 15)
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            result = reports.get_product_statistics(today=today)
+        assert len([e for e in context.captured_queries if "productdb_product" in e["sql"]]) == 1
+
+        assert result == {
+            "product_count": 5,
+            "product_lifecycle_count": 2,
+            "product_no_eol_announcement_count": 1,
+            "product_eol_announcement_count": 1,
+            "product_eos_count": 1,
+            "product_eol_count": 1,
+            "product_price_count": 1,
+        }
+
+    def test_refresh_homepage_context(self):
+        v1 = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="Product 1", vendor=v1)
+
+        assert reports.refresh_homepage_context() is True
+        assert reports.refresh_homepage_context() is False
+        assert reports.get_homepage_context()["product_count"] == 1
+
+        # a change of the product data doesn't invalidate the values directly, they are updated on the next refresh
+        mixer.blend("productdb.Product", product_id="Product 2", vendor=v1)
+        mixer.blend("productdb.Product", product_id="Product 3", vendor=v1)
+        assert reports.get_homepage_context()["product_count"] == 1
+
+        assert reports.refresh_homepage_context() is True
+        assert reports.get_homepage_context()["product_count"] == 3
+        assert reports.refresh_homepage_context() is False
+
+        # new Notification Messages are part of the recent events after the next refresh
+        NotificationMessage.add_info_message(title="Title", summary_message="Summary", detailed_message="Details")
+        assert reports.get_homepage_context()["recent_events"] == []
+        assert reports.refresh_homepage_context() is True
+        assert len(reports.get_homepage_context()["recent_events"]) == 1
+        assert reports.refresh_homepage_context() is False
+
+        # the values are recomputed before they become stale on the request path
+        protected_cache.set_value(reports.HOMEPAGE_CONTEXT_CACHE_KEY, reports.get_homepage_context(), timeout=60)
+        assert reports.refresh_homepage_context() is True
+        assert reports.refresh_homepage_context() is False
@@ -0,0 +1,167 @@
+"""
+Test suite for the productdb.search module
+"""
+import datetime
+import pytest
+from django.db import connection
+from mixer.backend.django import mixer
+from app.productdb import search
+from app.productdb.models import Product, Vendor
+
+pytestmark = pytest.mark.django_db
+
+
+def test_search_indexes_exist():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'productdb_product'")
+        indexes = [e[0] for e in cursor.fetchall()]
+
+    for field_name in search.TRIGRAM_SEARCH_FIELDS:
+        assert "productdb_product_%s_trgm" % field_name in indexes
+    assert "productdb_product_description_fulltext" in indexes
+    assert "productdb_product_product_id_upper" in indexes
+
+
+def test_is_plain_search_term():
+    assert search.is_plain_search_term("WS-C2960X-24TS-L") is True
+    assert search.is_plain_search_term("switches") is True
+    assert search.is_plain_search_term("^WS-C2960") is False
+    assert search.is_plain_search_term("WS-C29(60|50)") is False
+
+
+def test_is_safe_regex():
+    assert search.is_safe_regex(r"^WS-C\d{4}") is True
+    assert search.is_safe_regex("WS-C29(60|50)") is True
+    assert search.is_safe_regex("(?:WS-C)+") is True
+    assert search.is_safe_regex("x" * (search.MAX_REGEX_LENGTH + 1)) is False
+    assert search.is_safe_regex("(a+)+$") is False
+    assert search.is_safe_regex(r"(\d{2})*") is False
+    assert search.is_safe_regex("a{2,500}") is False
+    assert search.is_safe_regex(r"(a)\1") is False
+
+
+def test_statement_timeout():
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW statement_timeout")
+        previous_timeout = cursor.fetchone()[0]
+
+    with search.statement_timeout(1000):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            assert cursor.fetchone()[0] == "1s"
+
+    with pytest.raises(search.SearchTimeout):
+        with search.statement_timeout(10):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(1)")
+
+    # the transaction is still usable and the previous value is restored
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW statement_timeout")
+        assert cursor.fetchone()[0] == previous_timeout
+
+
+def test_get_range_q():
+    def get_lookups(field_name, value, value_type):
+        q = search.get_range_q(field_name, value, value_type)
+        return q.children if q is not None else None
+
+    number = search.RANGE_FILTER_NUMBER
+    assert get_lookups("list_price", "100", number) == [("list_price__range", (100.0, 100.0))]
+    assert get_lookups("list_price", "100-500", number) == [("list_price__range", (100.0, 500.0))]
+    assert get_lookups("list_price", "100..500", number) == [("list_price__range", (100.0, 500.0))]
+    assert get_lookups("list_price", ">1000", number) == [("list_price__gt", 1000.0)]
+    assert get_lookups("list_price", "<= 10.5", number) == [("list_price__lte", 10.5)]
+    assert get_lookups("list_price", "abc", number) is None
+    assert get_lookups("list_price", ">", number) is None
+
+    # dates are a day, a month or a year
+    date = search.RANGE_FILTER_DATE
+    assert get_lookups("end_of_sale_date", "2017-03-31", date) == [
+        ("end_of_sale_date__range", (datetime.date(2017, 3, 31), datetime.date(2017, 3, 31)))
+    ]
+    assert get_lookups("end_of_sale_date", "2016-02", date) == [
+        ("end_of_sale_date__range", (datetime.date(2016, 2, 1), datetime.date(2016, 2, 29)))
+    ]
+    assert get_lookups("end_of_sale_date", "2016-2017", date) == [
+        ("end_of_sale_date__range", (datetime.date(2016, 1, 1), datetime.date(2017, 12, 31)))
+    ]
+    assert get_lookups("end_of_sale_date", "2017-01-15-2017-02", date) == [
+        ("end_of_sale_date__range", (datetime.date(2017, 1, 15), datetime.date(2017, 2, 28)))
+    ]
+    assert get_lookups("end_of_sale_date", ">2017-03", date) == [("end_of_sale_date__gt", datetime.date(2017, 3, 31))]
+    assert get_lookups("end_of_sale_date", "<2017-03", date) == [("end_of_sale_date__lt", datetime.date(2017, 3, 1))]
+    assert get_lookups("end_of_sale_date", "2017-13", date) is None
+
+
+def test_get_search_lookup():
+    assert search.get_search_lookup("product_id") == "product_id__trgm_icontains"
+    assert search.get_search_lookup("product_id", regex=True) == "product_id__iregex"
+    assert search.get_search_lookup("vendor__name") == "vendor__name__icontains"
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestSearch:
+    def create_products(self):
+        v = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="WS-C2960X-24TS-L", vendor=v,
+                    description="Catalyst 2960-X 24 GigE, 4 x 1G SFP, LAN Base", tags="access")
+        mixer.blend("productdb.Product", product_id="WS-C3850-24T-S", vendor=v,
+                    description="Stackable switches with 24 ports", tags="access")
+        mixer.blend("productdb.Product", product_id="100%_UPTIME", vendor=v,
+                    description="switch switch switch", tags="")
+
+    def test_trigram_icontains(self):
+        self.create_products()
+
+        assert Product.objects.filter(product_id__trgm_icontains="c2960").count() == 1
+        assert Product.objects.filter(description__trgm_icontains="SWITCH").count() == 2
+
+        # the wildcard characters of the LIKE statement are escaped
+        assert list(Product.objects.filter(product_id__trgm_icontains="%_").values_list("product_id", flat=True)) == [
+            "100%_UPTIME"
+        ]
+        assert Product.objects.filter(product_id__trgm_icontains="_").count() == 1
+
+    def test_iexact_in(self):
+        self.create_products()
+
+        result = Product.objects.filter(product_id__iexact_in=["ws-c2960x-24ts-l", "WS-C3850-24T-S", "unknown"])
+        assert set(result.values_list("product_id", flat=True)) == {"WS-C2960X-24TS-L", "WS-C3850-24T-S"}
+        assert Product.objects.filter(product_id__iexact_in=[]).count() == 0
+
+    def test_full_text_match(self):
+        self.create_products()
+
+        # stemmed words
+        result = Product.objects.filter(description__fulltext="switch").values_list("product_id", flat=True)
+        assert set(result) == {"WS-C3850-24T-S", "100%_UPTIME"}
+
+        # all words must match
+        assert Product.objects.filter(description__fulltext="stackable switch").count() == 1
+
+    def test_get_search_q(self):
+        self.create_products()
+
+        q = search.get_search_q(["product_id", "description"], "2960")
+        assert Product.objects.filter(q).count() == 1
+
+        q = search.get_search_q(["product_id", "description"], r"^WS-C\d{4}", regex=True)
+        assert Product.objects.filter(q).count() == 2
+
+        q = search.get_search_q(["description"], "switch stackable")
+        assert Product.objects.filter(q).count() == 0
+
+        q = search.get_search_q(["description"], "switch stackable", full_text=True)
+        assert Product.objects.filter(q).count() == 1
+
+    def test_annotate_search_rank(self):
+        self.create_products()
+
+        qs = search.annotate_search_rank(
+            Product.objects.filter(description__fulltext="switch"),
+            "switch"
+        ).order_by("-search_rank")
+
+        assert [e.product_id for e in qs] == ["100%_UPTIME", "WS-C3850-24T-S"]
+        assert qs[0].search_rank > qs[1].search_rank
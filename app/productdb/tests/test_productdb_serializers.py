@@ -0,0 +1,83 @@
+"""
+Test suite for the productdb.serializers module
+"""
+import datetime
+import timeit
+import pytest
+from mixer.backend.django import mixer
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+from app.productdb.models import Product, Vendor
+from app.productdb.serializers import ProductSerializer, FastListSerializer
+
+pytestmark = pytest.mark.django_db
+benchmark = pytest.mark.skipif(not pytest.config.getoption("--benchmark"), reason="need --benchmark to run")
+
+
+def get_serializer_context(url="/api/v0/products/"):
+    return {"request": Request(APIRequestFactory().get(url)), "format": None}
+
+
+def get_default_representation(products, context):
+    """representation of the generic ListSerializer of the REST framework"""
+    return ListSerializer(products, child=ProductSerializer(context=context), context=context).data
+
+
+def create_products(count):
+    v = Vendor.objects.get(id=1)
+    pg = mixer.blend("productdb.ProductGroup", vendor=v)
+    Product.objects.bulk_create([
+        Product(
+            product_id="Product %d" % e,
+            description="description of Product %d" % e if e % 3 else None,
+            list_price=[None, 0, 12.5, 1234.565, 99.999][e % 5],
+            currency=["USD", "EUR"][e % 2],
+            tags="tag" if e % 2 else "",
+            vendor=v,
+            product_group=pg if e % 4 else None,
+            end_of_sale_date=datetime.date(2017, e % 12 + 1, 1) if e % 2 else None,
+            eol_reference_url="http://localhost/%d" % e if e % 7 else None,
+            lc_state_sync=bool(e % 2),
+        ) for e in range(count)
+    ])
+
+    return list(Product.objects.all().order_by("id"))
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestFastListSerializer:
+    def test_representation(self):
+        products = create_products(50)
+        context = get_serializer_context()
+
+        serializer = ProductSerializer(products, many=True, context=context)
+        assert isinstance(serializer, FastListSerializer)
+        assert JSONRenderer().render(serializer.data) == \
+            JSONRenderer().render(get_default_representation(products, context))
+        assert serializer.data[0]["url"] == "http://testserver/api/v0/products/%d/" % products[0].id
+
+        assert serializer.data[0]["product_group"] is None
+        assert serializer.data[1]["list_price"] == "0.00"
+
+        # sparse fieldsets
+        context = get_serializer_context("/api/v0/products/?omit=description,url")
+        context["view"] = None
+        data = ProductSerializer(products, many=True, context=context).data
+        assert JSONRenderer().render(data) == JSONRenderer().render(get_default_representation(products, context))
+        assert "url" not in data[0]
+
+        assert ProductSerializer([], many=True, context=context).data == []
+
+    @benchmark
+    def test_benchmark(self):
+        """the fast representation of a large page is at least 5 times faster"""
+        products = create_products(1000)
+        context = get_serializer_context()
+
+        default_time = min(timeit.repeat(lambda: get_default_representation(products, context), number=1, repeat=3))
+        fast_time = min(timeit.repeat(
+            lambda: ProductSerializer(products, many=True, context=context).data, number=1, repeat=3
+        ))
+        assert default_time / fast_time >= 5
@@ -3,18 +3,21 @@ Test suite for the productdb.tasks module
 """
 import pytest
 import pandas as pd
+from datetime import timedelta
 from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.urlresolvers import reverse
 from django.test import Client
+from django.utils import timezone
 from mixer.backend.django import mixer
 from app.config.settings import AppSettings
 from app.config.models import NotificationMessage
 from app.productdb import tasks
+from django_project import cache as protected_cache
 from app.productdb.excel_import import ProductsExcelImporter, ProductMigrationsExcelImporter
 from app.productdb.models import JobFile, Product, ProductMigrationSource, ProductMigrationOption, Vendor, ProductCheck, \
-    ProductCheckEntry
+    ProductCheckEntry, ProductMigrationPath, ChangeLogEntry
 
 pytestmark = pytest.mark.django_db
 
@@ -290,3 +293,47 @@ def test_delete_all_product_checks():
     tasks.delete_all_product_checks()
 
     assert ProductCheck.objects.all().count() == 0
+
+
+def test_delete_old_change_log_entries():
+    ChangeLogEntry.objects.log_changes(Product, [1, 2], ChangeLogEntry.ACTION_DELETED)
+    ChangeLogEntry.objects.filter(object_id=1).update(
+        timestamp=timezone.now() - timedelta(days=ChangeLogEntry.RETENTION_DAYS + 1)
+    )
+    tasks.delete_old_change_log_entries()
+
+    assert list(ChangeLogEntry.objects.values_list("object_id", flat=True)) == [2]
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_rebuild_replacement_product_links():
+    p = mixer.blend("productdb.Product", product_id="Product", vendor=Vendor.objects.get(id=1))
+    pmo = ProductMigrationOption.objects.create(
+        product=p,
+        migration_source=ProductMigrationSource.objects.create(name="Test"),
+        replacement_product_id="Replacement"
+    )
+
+    # create the replacement product without signals
+    Product.objects.bulk_create([Product(product_id="Replacement", vendor=Vendor.objects.get(id=1))])
+    repl_p = Product.objects.get(product_id="Replacement")
+    assert ProductMigrationOption.objects.get(id=pmo.id).replacement_db_product is None
+
+    tasks.rebuild_replacement_product_links()
+
+    assert ProductMigrationOption.objects.get(id=pmo.id).replacement_db_product == repl_p
+    assert ProductMigrationPath.objects.get(product=p).valid_replacement_product == repl_p
+
+
+@pytest.mark.usefixtures("import_default_vendors")
+def test_update_homepage_context():
+    mixer.blend("productdb.Product", product_id="Product", vendor=Vendor.objects.get(id=1))
+
+    tasks.update_homepage_context()
+    assert protected_cache.get_value("PDB_HOMEPAGE_CONTEXT")["product_count"] == 1
+
+    mixer.blend("productdb.Product", product_id="Product 2", vendor=Vendor.objects.get(id=1))
+    assert protected_cache.get_value("PDB_HOMEPAGE_CONTEXT")["product_count"] == 1
+
+    tasks.update_homepage_context()
+    assert protected_cache.get_value("PDB_HOMEPAGE_CONTEXT")["product_count"] == 2
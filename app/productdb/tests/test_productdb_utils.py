@@ -7,8 +7,11 @@ from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory
 from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 from mixer.backend.django import mixer
-from app.productdb import utils
+from app.productdb import utils, bulk
+from app.productdb.models import Vendor, Product, ChangeLogEntry
 from app.productdb.utils import login_required_if_login_only_mode
 
 pytestmark = pytest.mark.django_db
@@ -161,6 +164,66 @@ def test_login_required_if_login_only_mode(monkeypatch):
         "Authenticated users are logged in and should not be redirected"
 
 
+def test_product_data_version():
+    cache.delete(utils.PRODUCT_DATA_VERSION_CACHE_KEY)
+
+    version = utils.get_product_data_version()
+    assert version > 0
+    assert utils.get_product_data_version() == version
+
+    assert utils.increment_product_data_version() == version + 1
+    assert utils.get_product_data_version() == version + 1
+
+    # the version is initialized again if the cache value was removed
+    cache.delete(utils.PRODUCT_DATA_VERSION_CACHE_KEY)
+    assert utils.increment_product_data_version() > 0
+
+    # the version of the product data of a single Vendor is independent from the global version
+    version = utils.get_product_data_version()
+    vendor_version = utils.get_product_data_version(vendor_id=1)
+    assert utils.increment_product_data_version(vendor_id=1) == vendor_version + 1
+    assert utils.get_product_data_version() == version
+
+
+
+@pytest.mark.django_db(transaction=True)
+def test_product_data_version_is_incremented_on_commit():
+    v = Vendor.objects.create(name="Vendor")
+    version = utils.get_product_data_version()
+    vendor_version = utils.get_product_data_version(vendor_id=v.id)
+
+    # a concurrent request must not cache the old product data with the new version
+    with transaction.atomic():
+        p = Product.objects.create(product_id="Product", vendor=v)
+        assert utils.get_product_data_version() == version
+        assert utils.get_product_data_version(vendor_id=v.id) == vendor_version
+
+    assert utils.get_product_data_version() > version
+    assert utils.get_product_data_version(vendor_id=v.id) > vendor_version
+
+    # bulk operations
+    version = utils.get_product_data_version()
+    vendor_version = utils.get_product_data_version(vendor_id=v.id)
+    with transaction.atomic():
+        bulk.update_product_data([p], {v.id}, ChangeLogEntry.ACTION_UPDATED)
+        assert utils.get_product_data_version() == version
+        assert utils.get_product_data_version(vendor_id=v.id) == vendor_version
+
+    assert utils.get_product_data_version() == version + 1
+    assert utils.get_product_data_version(vendor_id=v.id) == vendor_version + 1
+
+
+def test_data_last_modified():
+    key = utils.PRODUCT_LIST_DATA_VERSION_CACHE_KEY
+    cache.delete(utils.DATA_LAST_MODIFIED_CACHE_KEY % key)
+    assert utils.get_data_last_modified(key) is None
+
+    utils.increment_data_version(key)
+    last_modified = utils.get_data_last_modified(key)
+    assert last_modified is not None
+    assert last_modified <= timezone.now()
+
+
 def test_parse_cisco_show_inventory():
     with pytest.raises(AttributeError):
         # test invalid parameter
@@ -8,7 +8,9 @@ from django.contrib.auth.models import AnonymousUser, Permission
 from django.core.exceptions import PermissionDenied
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.http import Http404
+from django.test.utils import CaptureQueriesContext
 from django.test import RequestFactory
 from mixer.backend.django import mixer
 from app.productdb import views
@@ -247,6 +249,45 @@ class TestListProductListsView:
         assert response.status_code == 200, "Should be callable"
 
 
+@pytest.mark.usefixtures("import_default_vendors")
+class TestLifecycleTimelineReportView:
+    URL_NAME = "productdb:report-lifecycle_timeline"
+
+    def test_anonymous_default(self):
+        url = reverse(self.URL_NAME)
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        response = views.lifecycle_timeline_report(request)
+
+        assert response.status_code == 200, "Should be callable"
+
+    @pytest.mark.usefixtures("enable_login_only_mode")
+    def test_anonymous_login_only_mode(self):
+        url = reverse(self.URL_NAME)
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        response = views.lifecycle_timeline_report(request)
+
+        assert response.status_code == 302, "Should redirect to login page"
+        assert response.url == reverse("login") + "?next=" + url, \
+            "Should contain a next parameter for redirect"
+
+    def test_authenticated_user(self):
+        mixer.blend(
+            "productdb.Product",
+            product_id="C2960XS",
+            vendor=Vendor.objects.get(id=1),
+            end_of_sale_date=datetime.date.today()
+        )
+        url = reverse(self.URL_NAME)
+        request = RequestFactory().get(url)
+        request.user = mixer.blend("auth.User", is_superuser=False, is_staff=False)
+        response = views.lifecycle_timeline_report(request)
+
+        assert response.status_code == 200, "Should be callable"
+        assert "Cisco Systems" in response.content.decode()
+
+
 @pytest.mark.usefixtures("import_default_vendors")
 class TestDetailProductGroupView:
     URL_NAME = "productdb:detail-product_group"
@@ -351,6 +392,48 @@ class TestShareProductListView:
 
         assert response.status_code == 200, "Should be callable"
 
+    @pytest.mark.usefixtures("import_default_vendors")
+    def test_conditional_get(self, settings):
+        # without the query cache, every access to the product data is a database query
+        settings.CACHEOPS_ENABLED = False
+
+        p = mixer.blend("productdb.Product")
+        pl = mixer.blend("productdb.ProductList", string_product_list=p.product_id)
+        url = reverse(self.URL_NAME, kwargs={"product_list_id": pl.id})
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        with CaptureQueriesContext(connection) as context:
+            response = views.share_product_list(request, pl.id)
+        assert response.status_code == 200
+        assert [e for e in context.captured_queries if "productdb_" in e["sql"]]
+        assert response.has_header("ETag")
+        assert response.has_header("Last-Modified")
+
+        # unchanged Product List and product data, the page is not rendered
+        request = RequestFactory().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        request.user = AnonymousUser()
+        with CaptureQueriesContext(connection) as context:
+            assert views.share_product_list(request, pl.id).status_code == 304
+        assert not [e for e in context.captured_queries if "productdb_" in e["sql"]]
+
+        request = RequestFactory().get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        request.user = AnonymousUser()
+        assert views.share_product_list(request, pl.id).status_code == 304
+
+        # changes of the Product List or the Products invalidate the ETag
+        pl.description = "new description"
+        pl.save()
+        request = RequestFactory().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        request.user = AnonymousUser()
+        response = views.share_product_list(request, pl.id)
+        assert response.status_code == 200
+
+        p.description = "new description"
+        p.save()
+        request = RequestFactory().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        request.user = AnonymousUser()
+        assert views.share_product_list(request, pl.id).status_code == 200
+
 
 @pytest.mark.usefixtures("import_default_vendors")
 class TestDetailProductListView:
@@ -418,6 +501,8 @@ class TestDetailProductListView:
 
 class TestProductDetailsView:
     URL_NAME = "productdb:product-detail"
+    # Product, migration paths and Product Migration Options
+    QUERY_COUNT = 3
 
     @pytest.mark.usefixtures("import_default_vendors")
     def test_without_parameter(self):
@@ -510,6 +595,52 @@ class TestProductDetailsView:
 
             assert response.status_code == 200, "Should be callable"
 
+    @pytest.mark.usefixtures("import_default_vendors")
+    def test_detail_view_query_budget(self, settings):
+        # measure the database queries without the query cache
+        settings.CACHEOPS_ENABLED = False
+
+        vendor = Vendor.objects.get(id=1)
+        product = mixer.blend(
+            "productdb.Product",
+            product_id="Product",
+            vendor=vendor,
+            product_group=mixer.blend("productdb.ProductGroup", vendor=vendor)
+        )
+        for counter in range(3):
+            # migration path with 4 hops: Product -> Intermediate x-1 -> Intermediate x-2 -> ... -> Replacement x
+            source = ProductMigrationSource.objects.create(name="Group %d" % counter, preference=50 + counter)
+            chain = [product] + [
+                mixer.blend(
+                    "productdb.Product",
+                    product_id="Intermediate %d-%d" % (counter, hop),
+                    vendor=vendor,
+                    eol_ext_announcement_date=datetime.date(2016, 1, 1),
+                    end_of_sale_date=datetime.date(2016, 1, 1)
+                ) for hop in range(1, 4)
+            ]
+            replacement_product_ids = [e.product_id for e in chain[1:]] + ["Replacement %d" % counter]
+            for replaced_product, replacement_product_id in zip(chain, replacement_product_ids):
+                ProductMigrationOption.objects.create(
+                    product=replaced_product, migration_source=source,
+                    replacement_product_id=replacement_product_id
+                )
+
+        url = reverse(self.URL_NAME, kwargs={"product_id": product.id})
+        request = RequestFactory().get(url)
+        request.user = mixer.blend("auth.User", is_superuser=False, is_staff=False)
+
+        # populate the settings cache and the permission cache of the user
+        views.view_product_details(request, product.id)
+
+        # the amount of queries doesn't depend on the amount of migration sources or the length of the paths
+        with CaptureQueriesContext(connection) as context:
+            response = views.view_product_details(request, product.id)
+
+        assert response.status_code == 200, "Should be callable"
+        assert len(context.captured_queries) == self.QUERY_COUNT
+        assert "Replacement 2" in response.content.decode()
+
 
 class TestAddProductListView:
     URL_NAME = "productdb:add-product_list"
@@ -17,6 +17,7 @@ router.register(r'productgroups', api_views.ProductGroupViewSet, base_name="prod
 router.register(r'productlists', api_views.ProductListViewSet, base_name="productlists")
 router.register(r'productmigrationsources', api_views.ProductMigrationSourceViewSet, base_name="productmigrationsources")
 router.register(r'productmigrationoptions', api_views.ProductMigrationOptionViewSet, base_name="productmigrationoptions")
+router.register(r'changes', api_views.ChangeLogEntryViewSet, base_name="changes")
 
 schema_view = get_swagger_view(title="Product Database REST API")
 
@@ -81,6 +82,8 @@ urlpatterns = [
     url(r'^product/$', views.view_product_details, name='product-list'),
     url(r'^product/(?P<product_id>\d+)/$', views.view_product_details, name='product-detail'),
 
+    url(r'^reports/lifecycle_timeline/$', views.lifecycle_timeline_report, name='report-lifecycle_timeline'),
+
     url(r'^profile/edit/$', views.edit_user_profile, name='edit-user_profile'),
 
     url(r'^import/products/$', views.import_products, name='import_products'),
@@ -1,10 +1,19 @@
 import re
+import time
 import jtextfsm as textfsm
 import io
+from datetime import datetime
 from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import utc
 from app.config.settings import AppSettings
 
 DEFAULT_DATE_FORMAT = "%Y/%m/%d"
+PRODUCT_DATA_VERSION_CACHE_KEY = "PDB_PRODUCT_DATA_VERSION"
+VENDOR_PRODUCT_DATA_VERSION_CACHE_KEY = "PDB_PRODUCT_DATA_VERSION_VENDOR_%s"
+PRODUCT_LIST_DATA_VERSION_CACHE_KEY = "PDB_PRODUCT_LIST_DATA_VERSION"
+NOTIFICATION_MESSAGE_DATA_VERSION_CACHE_KEY = "PDB_NOTIFICATION_MESSAGE_DATA_VERSION"
+DATA_LAST_MODIFIED_CACHE_KEY = "%s_LAST_MODIFIED"
 
 
 def convert_product_to_dict(product_object, date_format=DEFAULT_DATE_FORMAT):
@@ -86,6 +95,88 @@ def login_required_if_login_only_mode(request):
     return False
 
 
+def get_product_data_version_cache_key(vendor_id=None):
+    if vendor_id is None:
+        return PRODUCT_DATA_VERSION_CACHE_KEY
+
+    return VENDOR_PRODUCT_DATA_VERSION_CACHE_KEY % vendor_id
+
+
+def get_data_version(key):
+    """
+    returns the current value of a data version counter within the cache, the value is part of the cache keys of all
+    values that are computed from the data, therefore these values are invalidated when the version is incremented
+    """
+    version = cache.get(key)
+    if version is None:
+        # initialize with a time based value, a version that was used before the cache was cleared is not reused
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+
+    return version
+
+
+def increment_data_version(key):
+    """
+    increment a data version counter within the cache and store the time of the change
+    """
+    cache.set(DATA_LAST_MODIFIED_CACHE_KEY % key, time.time(), timeout=None)
+    try:
+        return cache.incr(key)
+
+    except ValueError:
+        # key not in cache, initialize a new version
+        return get_data_version(key)
+
+
+def get_data_last_modified(key):
+    """
+    returns the time of the last change of a data version counter or None if the time is not known
+    """
+    timestamp = cache.get(DATA_LAST_MODIFIED_CACHE_KEY % key)
+    if timestamp is None:
+        return None
+
+    return datetime.fromtimestamp(timestamp, tz=utc)
+
+
+def get_product_data_version(vendor_id=None):
+    """
+    returns the current version of the product data (Products, Product Groups and Vendors)
+
+    :param vendor_id: returns the version of the product data of a single Vendor instead of the global version
+    """
+    return get_data_version(get_product_data_version_cache_key(vendor_id))
+
+
+def increment_product_data_version(vendor_id=None):
+    """
+    increment the version of the product data (invalidates all cache values that are based on the product data)
+
+    :param vendor_id: increment the version of the product data of a single Vendor instead of the global version
+    """
+    return increment_data_version(get_product_data_version_cache_key(vendor_id))
+
+
+def increment_product_data_version_on_commit(vendor_ids=()):
+    """
+    increment the global version and the versions of the given Vendors after the current transaction is committed
+    (immediately if no transaction is active), otherwise a request between the increment and the commit would store
+    the old product data under the new version
+
+    :param vendor_ids: IDs of the Vendors with changed product data
+    """
+    vendor_ids = set(vendor_ids)
+
+    def increment():
+        increment_product_data_version()
+        for vendor_id in vendor_ids:
+            increment_product_data_version(vendor_id=vendor_id)
+
+    transaction.on_commit(increment)
+
+
 def parse_cisco_show_inventory(content):
     """
     convert the output of a show inventory command to a list of product IDs
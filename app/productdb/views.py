@@ -1,29 +1,31 @@
+import hashlib
 import logging
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import permission_required
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import redirect, render, get_object_or_404
 from django.template.defaultfilters import safe
 from django.utils.html import escape
-from django.utils.timezone import timedelta, datetime, get_current_timezone, now
+from django.utils.timezone import timedelta, now
+from django.views.decorators.http import condition
 from django.contrib import messages
 from rest_framework.authtoken.models import Token
 from django_project.celery import is_worker_active
-from app.config.models import NotificationMessage, TextBlock
+from app.config.models import TextBlock
 from app.productdb.forms import ImportProductsFileUploadForm, ProductListForm, UserProfileForm, \
     ImportProductMigrationFileUploadForm, ProductCheckForm
-from app.productdb.models import Product, JobFile, ProductGroup, ProductList, UserProfile, ProductMigrationSource, \
+from app.productdb.models import Product, JobFile, ProductGroup, ProductList, UserProfile, ProductMigrationPath, \
     ProductCheck
 from app.productdb.models import Vendor
+from app.productdb import reports
 import app.productdb.tasks as tasks
 from django_project.celery import set_meta_data_for_task
 from app.productdb.utils import login_required_if_login_only_mode
+from app.productdb import utils
 
-HOMEPAGE_CONTEXT_CACHE_KEY = "PDB_HOMEPAGE_CONTEXT"
 logger = logging.getLogger("productdb")
 
 
@@ -44,36 +46,8 @@ def home(request):
                 message="No backend worker process is running on the server. Please check the state of the application."
             )
 
-    today_date = datetime.now().date()
-
-    context = cache.get(HOMEPAGE_CONTEXT_CACHE_KEY)
-    if not context:
-        all_products_query = Product.objects.all()
-        context = {
-            "recent_events": NotificationMessage.objects.filter(
-                created__gte=datetime.now(get_current_timezone()) - timedelta(days=30)
-            ).order_by('-created')[:5],
-            "vendors": [x.name for x in Vendor.objects.all() if x.name != "unassigned"],
-            "product_count": all_products_query.count(),
-            "product_lifecycle_count": all_products_query.filter(eox_update_time_stamp__isnull=False).count(),
-            "product_no_eol_announcement_count": all_products_query.filter(
-                eox_update_time_stamp__isnull=False,
-                eol_ext_announcement_date__isnull=True
-            ).count(),
-            "product_eol_announcement_count": all_products_query.filter(
-                eol_ext_announcement_date__isnull=False,
-                end_of_sale_date__gt=today_date
-            ).count(),
-            "product_eos_count": all_products_query.filter(
-                Q(end_of_sale_date__lte=today_date, end_of_support_date__gt=today_date)|
-                Q(end_of_sale_date__lte=today_date, end_of_support_date__isnull=True)
-            ).count(),
-            "product_eol_count": all_products_query.filter(
-                end_of_support_date__lte=today_date
-            ).count(),
-            "product_price_count": all_products_query.filter(list_price__isnull=False).count(),
-        }
-        cache.set(HOMEPAGE_CONTEXT_CACHE_KEY, context, timeout=60*10)
+    # the counters are refreshed in the background when the product data changes
+    context = reports.get_homepage_context().copy()
 
     context.update({
         "TB_HOMEPAGE_TEXT_BEFORE_FAVORITE_ACTIONS":
@@ -177,6 +151,29 @@ def detail_product_group(request, product_group_id=None):
     return render(request, "productdb/product_group/detail-product_group.html", context=context)
 
 
+def get_share_product_list_etag(request, product_list_id):
+    """the share page contains the Product List and the data of its Products, the header depends on the user"""
+    value = "%s|%s|%s|%s" % (
+        product_list_id,
+        utils.get_data_version(utils.PRODUCT_LIST_DATA_VERSION_CACHE_KEY),
+        utils.get_product_data_version(),
+        request.user.pk
+    )
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def get_share_product_list_last_modified(request, product_list_id):
+    last_modified = [
+        utils.get_data_last_modified(utils.PRODUCT_LIST_DATA_VERSION_CACHE_KEY),
+        utils.get_data_last_modified(utils.PRODUCT_DATA_VERSION_CACHE_KEY)
+    ]
+    if None in last_modified:
+        return None
+
+    return max(last_modified)
+
+
+@condition(etag_func=get_share_product_list_etag, last_modified_func=get_share_product_list_last_modified)
 def share_product_list(request, product_list_id):
     """public share link that doesn't require an authentication to view the Product List
     :param request:
@@ -248,38 +245,25 @@ def view_product_details(request, product_id=None):
 
     else:
         try:
-            view_product = Product.objects.prefetch_related("productmigrationoption_set", "vendor").get(id=product_id)
+            view_product = Product.objects.select_related("vendor", "product_group").get(id=product_id)
         except:
             raise Http404("Product with ID %s not found in database" % product_id)
 
-    # identify migration options and render to dictionary for template
+    # identify migration options and render to dictionary for template (all migration paths are resolved at once)
     dict_preferred_replacement_option = None
     dict_migration_paths = {}
+    dict_migration_source_details = {}
 
-    if view_product.has_migration_options():
-        db_preferred_replacement_option = view_product.get_preferred_replacement_option()
-        valid_replacement_product = db_preferred_replacement_option.get_valid_replacement_product()
-        dict_preferred_replacement_option = {
-            "migration_source": db_preferred_replacement_option.migration_source.name,
-            "migration_product_info_url": db_preferred_replacement_option.migration_product_info_url,
-            "comment": db_preferred_replacement_option.comment,
-            "replacement_product_id": db_preferred_replacement_option.replacement_product_id,
-            "is_valid_replacement": db_preferred_replacement_option.is_valid_replacement(),
-            "is_replacement_in_db": db_preferred_replacement_option.is_replacement_in_db(),
-            "get_valid_replacement_product": valid_replacement_product.id if valid_replacement_product else None,
-            "link_to_preferred_option": None,
+    product_migration_paths = ProductMigrationPath.objects.get_product_migration_paths(view_product)
+    for migration_path, db_migration_path in product_migration_paths.items():
+        migration_source = migration_path.migration_source
+        dict_migration_source_details[migration_source.name] = {
+            "description": migration_source.description,
+            "preference": migration_source.preference
         }
-        if dict_preferred_replacement_option["is_valid_replacement"] and \
-                dict_preferred_replacement_option["is_replacement_in_db"]:
-            dict_preferred_replacement_option["link_to_preferred_option"] = reverse("productdb:product-detail", kwargs={
-                "product_id": dict_preferred_replacement_option["get_valid_replacement_product"]
-            })
-
-    for migration_source_name in view_product.get_product_migration_source_names_set():
-        db_migration_path = view_product.get_migration_path(migration_source_name)
-        dict_migration_paths[migration_source_name] = []
+        dict_migration_paths[migration_source.name] = []
         for pmo in db_migration_path:
-            dict_migration_paths[migration_source_name].append({
+            dict_migration_paths[migration_source.name].append({
                 "replacement_product_id": pmo.replacement_product_id,
                 "is_replacement_in_db": pmo.is_replacement_in_db(),
                 "get_product_replacement_id": pmo.get_product_replacement_id(),
@@ -288,16 +272,30 @@ def view_product_details(request, product_id=None):
                 "is_valid_replacement": pmo.is_valid_replacement(),
             })
 
-    dict_migration_source_details = {}
-    for e in ProductMigrationSource.objects.all():
-        dict_migration_source_details[e.name] = {
-            "description": e.description,
-            "preference": e.preference
-        }
+        if migration_path.is_preferred and db_migration_path:
+            db_preferred_replacement_option = db_migration_path[-1]
+            valid_replacement_product = db_preferred_replacement_option.get_valid_replacement_product()
+            dict_preferred_replacement_option = {
+                "migration_source": migration_source.name,
+                "migration_product_info_url": db_preferred_replacement_option.migration_product_info_url,
+                "comment": db_preferred_replacement_option.comment,
+                "replacement_product_id": db_preferred_replacement_option.replacement_product_id,
+                "is_valid_replacement": db_preferred_replacement_option.is_valid_replacement(),
+                "is_replacement_in_db": db_preferred_replacement_option.is_replacement_in_db(),
+                "get_valid_replacement_product": valid_replacement_product.id if valid_replacement_product else None,
+                "link_to_preferred_option": None,
+            }
+            if dict_preferred_replacement_option["is_valid_replacement"] and \
+                    dict_preferred_replacement_option["is_replacement_in_db"]:
+                dict_preferred_replacement_option["link_to_preferred_option"] = reverse(
+                    "productdb:product-detail",
+                    kwargs={"product_id": dict_preferred_replacement_option["get_valid_replacement_product"]}
+                )
 
     # process migration paths for the template
     context = {
         "product": view_product,
+        "has_migration_options": len(dict_migration_paths) != 0,
         "preferred_replacement_option": dict_preferred_replacement_option,
         "migration_paths": dict_migration_paths,
         "migration_source_details": dict_migration_source_details,
@@ -307,6 +305,34 @@ def view_product_details(request, product_id=None):
     return render(request, "productdb/browse/product_detail.html", context=context)
 
 
+def lifecycle_timeline_report(request):
+    """
+    amount of Products that reach the End of Sale and the Last Date of Support per month, grouped by Vendor and Product
+    Group
+    """
+    if login_required_if_login_only_mode(request):
+        return redirect('%s?next=%s' % (settings.LOGIN_URL, request.path))
+
+    report = reports.get_lifecycle_timeline()
+
+    # one table per milestone, rows without any Product within the time frame are omitted
+    timeline_tables = []
+    for milestone, milestone_name in report["milestones"].items():
+        timeline_tables.append({
+            "id": milestone,
+            "name": milestone_name,
+            "totals": report["totals"][milestone],
+            "rows": [e for e in [
+                (row["vendor"], row["product_group"], row[milestone]) for row in report["data"]
+            ] if any(e[2])]
+        })
+
+    return render(request, "productdb/reports/lifecycle_timeline.html", context={
+        "months": report["months"],
+        "timeline_tables": timeline_tables
+    })
+
+
 def list_product_checks(request):
     """
     list all Product Checks that are available for the current user
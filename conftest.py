@@ -5,6 +5,7 @@ import requests
 from cacheops import invalidate_all
 from django.core.management import call_command
 from django.core.cache import cache
+from django.db import transaction
 from requests import Response
 from app.config.settings import AppSettings
 from app.config import utils
@@ -16,6 +17,7 @@ def pytest_addoption(parser):
     # requires test credentials in the working directory named .cisco_api_credentials
     parser.addoption("--online", action="store_true", help="run tests online (with external API access)")
     parser.addoption("--selenium", action="store_true", help="run selenium test cases (always online)")
+    parser.addoption("--benchmark", action="store_true", help="run performance test cases (timing dependent)")
 
 
 @pytest.fixture
@@ -97,3 +99,16 @@ def flush_cache():
     """delete all cached data"""
     cache.clear()
     invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def run_on_commit_callbacks_immediately(request, monkeypatch):
+    """
+    the test cases run within a transaction that is never committed, therefore the on_commit callbacks (e.g. the
+    increment of the product data version) are executed immediately, except within transactional test cases
+    """
+    marker = request.keywords.get("django_db")
+    if marker is not None and marker.kwargs.get("transaction"):
+        return
+
+    monkeypatch.setattr(transaction, "on_commit", lambda func, using=None: func())
@@ -0,0 +1,116 @@
+"""
+cache helpers with protection against cache stampedes
+
+A value has a soft and a hard expiry time. After the soft expiry, exactly one worker (the one that gets the short
+lock) recomputes the value while all other workers continue to serve the stale value until the hard expiry. If no
+value is available at all, the other workers wait briefly for the result of the worker that holds the lock.
+"""
+import logging
+import time
+import uuid
+from django.core.cache import cache
+
+logger = logging.getLogger("productdb")
+
+DEFAULT_STALE_TIMEOUT = 60 * 5
+DEFAULT_LOCK_TIMEOUT = 30
+DEFAULT_WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+
+class CachedValue:
+    """
+    value within the cache with a soft expiry time (None if the value never expires)
+    """
+    def __init__(self, value, soft_expiry=None):
+        self.value = value
+        self.soft_expiry = soft_expiry
+
+    def is_stale(self, margin=0):
+        """True if the value is stale or becomes stale within the given margin (seconds)"""
+        return self.soft_expiry is not None and self.soft_expiry <= time.time() + margin
+
+
+def get_lock_key(key):
+    return "%s_LOCK" % key
+
+
+def set_value(key, value, timeout, stale_timeout=DEFAULT_STALE_TIMEOUT):
+    """
+    store a value in the cache, the value is stale after the timeout and is removed after the timeout and the
+    stale_timeout (timeout None: the value never expires)
+    """
+    if timeout is None:
+        cache.set(key, CachedValue(value), timeout=None)
+
+    else:
+        cache.set(key, CachedValue(value, time.time() + timeout), timeout=timeout + stale_timeout)
+
+
+def get_value(key, default=None):
+    """
+    returns the value from the cache (also if it is stale) or the default value
+    """
+    entry = cache.get(key)
+    return entry.value if isinstance(entry, CachedValue) else default
+
+
+def is_stale(key, margin=0):
+    """
+    True if no value is available or if the value is stale or becomes stale within the given margin (seconds), used
+    to refresh a value in the background before a request has to recompute it
+    """
+    entry = cache.get(key)
+    return not isinstance(entry, CachedValue) or entry.is_stale(margin)
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=DEFAULT_STALE_TIMEOUT, lock_timeout=DEFAULT_LOCK_TIMEOUT,
+                   wait_timeout=DEFAULT_WAIT_TIMEOUT):
+    """
+    returns the value from the cache, if the value is stale or not available, only a single worker computes the
+    value using the given function
+
+    :param key: cache key
+    :param compute: function without arguments that computes the value
+    :param timeout: soft expiry in seconds (None if the value never expires)
+    :param stale_timeout: time in seconds a stale value is served while the value is recomputed
+    :param lock_timeout: maximum time in seconds that the computation of the value is locked for other workers
+    :param wait_timeout: maximum time in seconds to wait for a value that is computed by another worker
+    """
+    entry = cache.get(key)
+    if not isinstance(entry, CachedValue):
+        # no value in the cache (or a value that was stored without this module)
+        entry = None
+
+    elif not entry.is_stale():
+        return entry.value
+
+    lock_key = get_lock_key(key)
+    lock_token = uuid.uuid4().hex
+    if cache.add(lock_key, lock_token, timeout=lock_timeout):
+        try:
+            value = compute()
+            set_value(key, value, timeout, stale_timeout)
+            return value
+
+        finally:
+            # the lock may have expired and may be held by another worker in the meantime
+            if cache.get(lock_key) == lock_token:
+                cache.delete(lock_key)
+
+    if entry is not None:
+        # another worker is recomputing the value
+        return entry.value
+
+    deadline = time.time() + wait_timeout
+    while time.time() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, CachedValue):
+            return entry.value
+
+    logger.warning("timeout while waiting for the cache value '%s', compute it without the lock" % key)
+    value = compute()
+    set_value(key, value, timeout, stale_timeout)
+
+    return value
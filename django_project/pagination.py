@@ -1,13 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, PageNumberPagination, CursorPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 import math
 
+# maximum amount of elements per page of the API endpoints
+MAX_PAGE_SIZE = 1000
+
+
+def get_page_size(request, page_size_query_param, default, maximum):
+    """
+    returns the page size from the query parameter (limited to the maximum) or the default value
+    """
+    try:
+        page_size = int(request.query_params[page_size_query_param])
+
+    except (KeyError, ValueError):
+        return default
+
+    if page_size <= 0:
+        return default
+
+    return min(page_size, maximum)
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    cursor pagination without counts, the elements are ordered by their ID, therefore every page is loaded in the
+    same time
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ('id',)
+
+    def get_page_size(self, request):
+        return get_page_size(request, self.page_size_query_param, self.page_size, self.max_page_size)
+
+    def get_paginated_response(self, data):
+        result = {
+            'pagination': {
+                'page_records': len(data),
+                'url': {
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link(),
+                }
+            },
+            'data': data
+        }
+
+        return Response(result)
+
+
+class FeedPagination(BasePagination):
+    """
+    forward only pagination of a feed without counts, the next page continues after the last element of the current
+    page using the since query parameter (the view must filter the elements after the given ID), therefore every page
+    is loaded in the same time
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    since_query_param = 'since'
+    max_page_size = MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = get_page_size(request, self.page_size_query_param, self.page_size, self.max_page_size)
+
+        # an additional element indicates the next page
+        self.page = list(queryset[:page_size + 1])
+        self.has_next = len(self.page) > page_size
+        self.page = self.page[:page_size]
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return replace_query_param(self.request.build_absolute_uri(), self.since_query_param, self.page[-1].pk)
+
+    def get_paginated_response(self, data):
+        result = {
+            'pagination': {
+                'page_records': len(data),
+                'url': {
+                    'next': self.get_next_link(),
+                    'previous': None,
+                }
+            },
+            'data': data
+        }
+
+        return Response(result)
+
 
 class CustomPagination(PageNumberPagination):
+    """
+    page number pagination, the cursor pagination (without counts) is used if the cursor query parameter is part of
+    the request (e.g. ?cursor= for the first page)
+    """
     page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    cursor_pagination = None
+
+    def get_page_size(self, request):
+        return get_page_size(request, self.page_size_query_param, self.page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if CustomCursorPagination.cursor_query_param in request.query_params:
+            self.cursor_pagination = CustomCursorPagination()
+            return self.cursor_pagination.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
-        used_page_size = int(self.request.GET.get('page_size', self.page_size))
+        if self.cursor_pagination:
+            return self.cursor_pagination.get_paginated_response(data)
+
+        used_page_size = self.get_page_size(self.request)
         if self.page.paginator.count / used_page_size <= 1:
             last_page_index = 1
         else:
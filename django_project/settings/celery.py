@@ -37,6 +37,17 @@ CELERYBEAT_SCHEDULE = {
     'productdb.delete_all_product_checks': {
         'task': 'productdb.delete_all_product_checks',
         'schedule': crontab(hour=0, minute=0, day_of_week=0)
+    },
+    # remove the change log entries that are older than the retention period every day
+    'productdb.delete_old_change_log_entries': {
+        'task': 'productdb.delete_old_change_log_entries',
+        'schedule': crontab(hour=1, minute=0)
+    },
+    # refresh the homepage values (if the product data or the notifications have changed or if the values become
+    # stale soon, at most once per minute)
+    'productdb.update_homepage_context': {
+        'task': 'productdb.update_homepage_context',
+        'schedule': crontab()
     }
 }
 
@@ -86,6 +86,8 @@ else:
                 'ops': 'all',
                 'timeout': 48 * 60 * 60
             },
+            # the change feed is read once per client and written with bulk operations
+            'productdb.ChangeLogEntry': None,
             'config.*': {
                 'ops': 'all',
                 'timeout': 24 * 60 * 60
@@ -196,6 +198,10 @@ if not os.path.exists(DATA_DIRECTORY):
 
 ADD_REVERSION_ADMIN = True
 
+# use the estimated amount of rows from the PostgreSQL statistics for the total amount of Products in the datatables
+# views if the table contains at least the given amount of rows (disabled by default)
+DATATABLES_APPROXIMATE_COUNT_THRESHOLD = int(os.getenv("PDB_DATATABLES_APPROXIMATE_COUNT_THRESHOLD", 0)) or None
+
 if os.getenv("PDB_DEBUG"):
     from ipaddress import IPv4Interface
     # enable django debug toolbar (only installed with the dev requirements)
@@ -0,0 +1,93 @@
+"""
+Test suite for the django_project.cache module
+"""
+import pytest
+import time
+from django.core.cache import cache
+from django_project import cache as protected_cache
+
+pytestmark = pytest.mark.django_db
+
+KEY = "TEST_PROTECTED_CACHE_VALUE"
+
+
+class ComputeMock:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestProtectedCache:
+    def test_get_or_compute(self):
+        compute = ComputeMock("value")
+
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "value"
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "value"
+        assert compute.calls == 1
+        assert protected_cache.get_value(KEY) == "value"
+
+        # values without expiry and values that are not stored by the module
+        protected_cache.set_value(KEY, "other value", timeout=None)
+        assert protected_cache.get_or_compute(KEY, compute, timeout=None) == "other value"
+
+        cache.set(KEY, "plain value")
+        assert protected_cache.get_value(KEY) is None
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "value"
+        assert compute.calls == 2
+
+    def test_is_stale(self):
+        assert protected_cache.is_stale(KEY) is True
+
+        protected_cache.set_value(KEY, "value", timeout=60)
+        assert protected_cache.is_stale(KEY) is False
+        assert protected_cache.is_stale(KEY, margin=120) is True
+
+        protected_cache.set_value(KEY, "value", timeout=None)
+        assert protected_cache.is_stale(KEY, margin=120) is False
+
+    def test_stale_value_is_recomputed_by_a_single_worker(self, monkeypatch):
+        protected_cache.set_value(KEY, "stale value", timeout=60)
+        monkeypatch.setattr(time, "time", lambda: 10 ** 10)
+
+        # another worker holds the lock, the stale value is returned
+        cache.set(protected_cache.get_lock_key(KEY), True)
+        compute = ComputeMock("new value")
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "stale value"
+        assert compute.calls == 0
+
+        # lock released, the value is recomputed
+        cache.delete(protected_cache.get_lock_key(KEY))
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "new value"
+        assert compute.calls == 1
+        assert cache.get(protected_cache.get_lock_key(KEY)) is None
+
+    def test_wait_for_value_of_other_worker(self, monkeypatch):
+        cache.set(protected_cache.get_lock_key(KEY), True)
+
+        def sleep_mock(seconds):
+            # the other worker stores the value
+            protected_cache.set_value(KEY, "value of other worker", timeout=60)
+
+        monkeypatch.setattr(time, "sleep", sleep_mock)
+        compute = ComputeMock("value")
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "value of other worker"
+        assert compute.calls == 0
+
+        # the value is computed without the lock if the other worker takes too long
+        cache.delete(KEY)
+        monkeypatch.setattr(time, "sleep", lambda seconds: None)
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60, wait_timeout=0.01) == "value"
+        assert compute.calls == 1
+
+    def test_lock_of_other_worker_is_not_released(self):
+        def compute():
+            # the lock expired during the computation and was taken by another worker
+            cache.set(protected_cache.get_lock_key(KEY), "lock of other worker")
+            return "value"
+
+        assert protected_cache.get_or_compute(KEY, compute, timeout=60) == "value"
+        assert cache.get(protected_cache.get_lock_key(KEY)) == "lock of other worker"